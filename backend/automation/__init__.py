@@ -1,16 +1,32 @@
 """
 Automation pipeline package.
+
+Exports are imported lazily on first attribute access so that importing the
+package (e.g. in CLI or worker start-up) does not pull in LangChain or
+browser-use until they are needed.
 """
 
-from .config import config, Config
-from .workflow_loader import WorkflowLoader
-from .llm_client import LLMClient
-from .automation_runner import AutomationRunner
-
-__all__ = [
-    "config",
-    "Config", 
-    "WorkflowLoader",
-    "LLMClient",
-    "AutomationRunner",
-]
+import importlib
+
+_EXPORTS = {
+    "config": ".config",
+    "Config": ".config",
+    "WorkflowLoader": ".workflow_loader",
+    "LLMClient": ".llm_client",
+    "AutomationRunner": ".automation_runner",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        module = importlib.import_module(_EXPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -4,10 +4,25 @@ Uses browser-use to execute tasks based on LLM-generated descriptions.
 """
 
 import asyncio
-import os
+import time
 from typing import Optional, Callable, Awaitable
 
 from .config import config
+from .extraction_cache import CachedExtractionModel, get_extraction_cache
+from .llm_providers import create_agent_llm
+from .network_policy import NetworkPolicy, RequestBlocker, blocker_for, release_blocker
+from .rate_limiter import RateLimitedChatModel
+from .run_store import encode_step
+from .storage_profiles import StorageProfileStore, export_state
+
+
+# Seconds a stopped agent gets to finish its current step before it is cancelled
+STOP_GRACE_SECONDS = 10.0
+
+# Bounded-history mode: steps of agent memory sent to the model, and frames kept
+# in printed tracebacks
+BOUNDED_MESSAGE_ITEMS = 10
+BOUNDED_TRACEBACK_FRAMES = 3
 
 
 class AutomationRunner:
@@ -19,16 +34,92 @@ class AutomationRunner:
         llm_model: Optional[str] = None,
         enable_human_in_loop: Optional[bool] = None,
         human_input_callback: Optional[Callable[[str], Awaitable[str]]] = None,
+        llm_provider: Optional[str] = None,
+        extraction_model: Optional[str] = None,
+        step_callback: Optional[Callable[[dict], None]] = None,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[asyncio.Event] = None,
+        bounded_history: Optional[bool] = None,
+        history_sink: Optional[Callable[[list], Awaitable[None]]] = None,
+        storage_profile: Optional[str] = None,
+        network_policy: Optional[NetworkPolicy] = None,
     ):
         self.headless = headless if headless is not None else config.headless
         self.llm_model = llm_model or config.llm_model
+        self.llm_provider = llm_provider or config.llm_provider
+        self.extraction_model = extraction_model or config.extraction_model
+        self.step_callback = step_callback
+        # Budgets for each agent run, and an event that stops runs early when set
+        self.max_steps = max_steps or config.max_steps
+        timeout = timeout if timeout is not None else config.run_timeout
+        # 0 or less means no time budget
+        self.timeout: Optional[float] = timeout if timeout > 0 else None
+        self.cancel_event = cancel_event
+        # Bounded-history mode keeps only the latest step in memory; every step is
+        # passed to history_sink (encoded with run_store.encode_step) as it finishes
+        self.bounded_history = bounded_history if bounded_history is not None else config.bounded_history
+        self.history_sink = history_sink
+        # Storage-state profile loaded into new browsers and updated after successful runs
+        self.storage_profile = storage_profile if storage_profile is not None else config.storage_profile
+        # Requests blocked in headless runs (default: NETWORK_* settings)
+        self.network_policy = network_policy or NetworkPolicy.from_config()
         self.enable_human_in_loop = enable_human_in_loop if enable_human_in_loop is not None else config.enable_human_in_loop
         self.human_input_callback = human_input_callback
     
-    def _create_browser(self):
-        """Create browser instance."""
+    def _create_browser(self, keep_alive: bool = False):
+        """
+        Create browser instance, starting from the storage profile if one is set.
+        
+        A keep_alive browser stays open when an agent run ends, so it can be
+        passed to the next run_task warm (see batch_scheduler).
+        """
         from browser_use import Browser
-        return Browser(headless=self.headless)
+        return Browser(
+            headless=self.headless,
+            storage_state=self._load_storage_state(),
+            keep_alive=keep_alive or None,
+        )
+    
+    def _load_storage_state(self) -> Optional[dict]:
+        if not self.storage_profile:
+            return None
+        state = StorageProfileStore().load(self.storage_profile)
+        if state:
+            print(f"🍪 Loaded storage profile '{self.storage_profile}' ({len(state['cookies'])} cookies)")
+        return state
+    
+    async def _save_storage_state(self, browser) -> None:
+        """Merge the browser's cookies and localStorage into the storage profile."""
+        try:
+            state = await export_state(browser)
+            await StorageProfileStore().save(self.storage_profile, state)
+            print(f"🍪 Saved storage profile '{self.storage_profile}' ({len(state['cookies'])} cookies)")
+        except Exception as e:
+            print(f"⚠️  Failed to save storage profile '{self.storage_profile}': {e}")
+    
+    async def _block_requests(self, browser) -> Optional[RequestBlocker]:
+        """Start the browser and apply the network policy to it, in headless runs with a policy."""
+        if not self.headless or not self.network_policy.enabled:
+            # A warm browser may still intercept requests for an earlier run's policy
+            try:
+                await release_blocker(browser)
+            except Exception as e:
+                print(f"⚠️  Failed to remove network policy: {e}")
+            return None
+        try:
+            # Agent.run starting the browser again is a no-op
+            await browser.start()
+            return await blocker_for(browser, self.network_policy)
+        except Exception as e:
+            print(f"⚠️  Failed to apply network policy: {e}")
+            return None
+    
+    async def launch_browser(self, keep_alive: bool = False):
+        """Create and start a browser ahead of time, to pass to run_task."""
+        browser = self._create_browser(keep_alive)
+        await browser.start()
+        return browser
     
     def _create_tools(self):
         """Create tools registry with optional human-in-the-loop."""
@@ -63,46 +154,31 @@ class AutomationRunner:
         
         return tools
     
-    async def run_task(self, task_description: str) -> dict:
-        """
-        Execute a task using browser-use.
-        
-        Args:
-            task_description: Natural language description of the task to perform.
-            
-        Returns:
-            dict with execution results including history and status.
-        """
+    def _create_agent(self, task_description: str, browser):
+        """Create the browser-use agent for a task (overridden by the soak benchmark)."""
         # Import browser-use components
         try:
-            from browser_use import Agent, ChatGoogle
+            from browser_use import Agent
         except ImportError:
             raise ImportError(
                 "browser-use is not installed. Run: uv pip install browser-use"
             )
         
-        # Initialize Gemini LLM using browser-use's ChatGoogle
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY environment variable is not set. Get one at https://aistudio.google.com/app/apikey")
+        # Initialize main LLM for the configured provider; agent steps are batch
+        # traffic for the shared rate limiter
+        llm = RateLimitedChatModel(create_agent_llm(self.llm_model, self.llm_provider))
         
-        # Set environment variable for ChatGoogle
-        os.environ["GOOGLE_API_KEY"] = api_key
-        
-        # Initialize main LLM
-        llm = ChatGoogle(model=self.llm_model)
-        
-        # Use gemini-flash-lite for page extraction (faster, cheaper)
-        page_extraction_llm = ChatGoogle(model="gemini-flash-lite-latest")
-        
-        # Initialize browser
-        browser = self._create_browser()
+        # Use a smaller model for page extraction (faster, cheaper); answers for
+        # pages already extracted with the same query come from the cache
+        page_extraction_llm = RateLimitedChatModel(create_agent_llm(self.extraction_model, self.llm_provider))
+        if config.extraction_cache:
+            page_extraction_llm = CachedExtractionModel(page_extraction_llm, browser, get_extraction_cache())
         
         # Create tools (with optional human-in-the-loop)
         tools = self._create_tools()
         
-        # Create and run agent with token optimization settings
-        agent = Agent(
+        # Create agent with token optimization settings
+        return Agent(
             task=task_description,
             llm=llm,
             flash_mode=True,
@@ -116,48 +192,237 @@ class AutomationRunner:
             max_actions_per_step=3,
             # Limit retries to avoid excessive API calls
             max_failures=2,
+            # Report per-step progress (action, URL, timing) if requested
+            register_new_step_callback=self._create_step_callback(),
+            # In bounded-history mode, only the latest steps are sent back to the model
+            max_history_items=BOUNDED_MESSAGE_ITEMS if self.bounded_history else None,
         )
+    
+    def _create_step_callback(self):
+        """Adapt browser-use's per-step callback to a compact progress dict."""
+        if not self.step_callback:
+            return None
+        
+        callback = self.step_callback
+        started = time.monotonic()
+        last_step = started
+        
+        def on_new_step(browser_state, model_output, step_number: int) -> None:
+            nonlocal last_step
+            now = time.monotonic()
+            actions = []
+            for action in getattr(model_output, "action", None) or []:
+                dumped = action.model_dump(exclude_unset=True)
+                actions.extend(dumped.keys())
+            callback({
+                "type": "progress",
+                "step": step_number,
+                "actions": actions,
+                "url": getattr(browser_state, "url", ""),
+                "title": getattr(browser_state, "title", ""),
+                "elapsed_s": round(now - started, 3),
+                "step_s": round(now - last_step, 3),
+            })
+            last_step = now
+        
+        return on_new_step
+    
+    def _create_step_end_hook(self, summary: dict, browser):
+        """
+        Hook run after each agent step: stream the step and, if bounded, drop
+        older ones. After the final step of a successful run, the storage
+        profile is updated while the browser is still open.
+        """
+        sink = self.history_sink
+        bounded = self.bounded_history
+        
+        async def on_step_end(agent) -> None:
+            steps = agent.history.history
+            if not steps:
+                return
+            summary["steps"] += 1
+            if self.storage_profile and agent.history.is_done() and agent.history.is_successful() is not False:
+                await self._save_storage_state(browser)
+            if sink:
+                try:
+                    await sink(encode_step(steps[-1]))
+                except Exception as e:
+                    print(f"⚠️  Failed to store step: {e}")
+            if bounded:
+                del steps[:-1]
+        
+        return on_step_end
+    
+    async def run_task(self, task_description: str, browser=None) -> dict:
+        """
+        Execute a task using browser-use.
+        
+        The agent is stopped after `max_steps` steps, after `timeout` seconds, or
+        when `cancel_event` is set. A stopped agent finishes its current step,
+        and is cancelled if that takes longer than STOP_GRACE_SECONDS. The browser
+        is closed on every exit path, except that a keep_alive browser stays
+        open when the agent finishes by itself.
+        
+        Args:
+            task_description: Natural language description of the task to perform.
+            browser: Optional already started browser (see launch_browser).
+            
+        Returns:
+            dict with execution results including history and status. In
+            bounded-history mode "history" is None and "steps" holds the
+            step count. "network" holds the request-blocking stats of runs
+            with a network policy.
+        """
+        if self.cancel_event and self.cancel_event.is_set():
+            if browser is not None:
+                await close_browser(browser)
+            return {"success": False, "error": "Run cancelled", "task": task_description}
         
+        # Agent.run closes the browser itself when it exits
+        run: Optional[asyncio.Task] = None
+        blocker: Optional[RequestBlocker] = None
         try:
+            # Initialize browser unless one was launched ahead of time
+            browser = browser or self._create_browser()
+            blocker = await self._block_requests(browser)
+            agent = self._create_agent(task_description, browser)
+            
             print(f"\n🚀 Starting automation task:")
             print(f"   Description: {task_description}")
             print(f"   Headless: {self.headless}")
-            print(f"   Model: {self.llm_model}")
+            print(f"   Model: {self.llm_model} ({self.llm_provider})")
             print(f"   Human-in-Loop: {self.enable_human_in_loop}")
+            print(f"   Budget: {self.max_steps} steps, {f'{self.timeout:g}s' if self.timeout else 'no time limit'}")
+            if blocker:
+                print(f"   Blocking: {', '.join(self.network_policy.block_types) or 'no resource types'}"
+                      f", {len(self.network_policy.deny_domains)} domains")
             
-            history = await agent.run()
+            summary = {"steps": 0}
+            run = asyncio.create_task(agent.run(
+                max_steps=self.max_steps,
+                on_step_end=self._create_step_end_hook(summary, browser),
+            ))
+            stop_reason = await self._supervise(agent, run)
+            history = run.result() if stop_reason is None else agent.history
             
             print(f"✅ Agent execution finished")
-            if hasattr(history, 'all_results'):
+            print(f"   Steps: {summary['steps']}")
+            if hasattr(history, 'all_results') and not self.bounded_history:
                 print(f"   Results: {len(history.all_results())} actions performed")
+            if blocker:
+                print(f"   Blocked: {blocker.stats.blocked} requests (~{blocker.stats.estimated_bytes_saved / 2**20:.1f} MB)")
             
-            # Keep browser open briefly to see results
-            await asyncio.sleep(3)
+            if stop_reason is None and not history.is_done():
+                errors = [e for e in history.errors() if e]
+                stop_reason = errors[-1] if errors else f"Step budget of {self.max_steps} steps exhausted"
             
-            return {
-                "success": True,
-                "history": history,
+            result = {
+                "success": stop_reason is None,
+                "history": None if self.bounded_history else history,
+                "steps": summary["steps"],
                 "task": task_description,
+                "network": blocker.stats.to_dict() if blocker else None,
             }
+            if stop_reason:
+                result["error"] = stop_reason
+            return result
         except Exception as e:
             print(f"❌ Automation failed: {e}")
             import traceback
-            traceback.print_exc()
-            
-            # Keep browser open longer on error for debugging
-            await asyncio.sleep(5)
+            traceback.print_exc(limit=-BOUNDED_TRACEBACK_FRAMES if self.bounded_history else None)
             
             return {
                 "success": False,
                 "error": str(e),
                 "task": task_description,
+                "network": blocker.stats.to_dict() if blocker else None,
             }
+        finally:
+            if run is not None and not run.done():
+                run.cancel()
+            if browser is not None and (run is None or not run.done() or run.cancelled()):
+                await close_browser(browser)
+    
+    async def _supervise(self, agent, run: asyncio.Task) -> Optional[str]:
+        """
+        Wait for an agent run within the time and cancellation budget.
+        
+        Returns:
+            None if the run finished by itself, otherwise why it was stopped.
+        """
+        waiters = {run}
+        cancelled = asyncio.create_task(self.cancel_event.wait()) if self.cancel_event else None
+        if cancelled:
+            waiters.add(cancelled)
+        
+        try:
+            await asyncio.wait(waiters, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED)
+            if run.done():
+                return None
+            
+            if self.cancel_event and self.cancel_event.is_set():
+                stop_reason = "Run cancelled"
+            else:
+                stop_reason = f"Run exceeded its {self.timeout:g}s time budget"
+            print(f"🛑 {stop_reason}, stopping agent")
+            
+            # Let the current step finish, then cancel if it does not
+            agent.stop()
+            await asyncio.wait({run}, timeout=STOP_GRACE_SECONDS)
+            if not run.done():
+                run.cancel()
+                await asyncio.wait({run}, timeout=STOP_GRACE_SECONDS)
+            return stop_reason
+        finally:
+            if cancelled:
+                cancelled.cancel()
+    
+    async def run_segments(self, task_descriptions: list[str], max_parallel: Optional[int] = None) -> dict:
+        """
+        Execute independent tasks concurrently, each in its own browser.
+        
+        Used for workflows split by workflow_segments.split_independent_segments,
+        so wall-clock time approaches that of the longest segment.
+        
+        Args:
+            task_descriptions: One task description per independent segment.
+            max_parallel: Maximum number of concurrent browsers (default: config).
+            
+        Returns:
+            dict with overall success and the per-segment results.
+        """
+        semaphore = asyncio.Semaphore(max_parallel or config.max_parallel_segments)
+        
+        async def run_one(task: str) -> dict:
+            async with semaphore:
+                return await self.run_task(task)
+        
+        print(f"\n🔀 Running {len(task_descriptions)} independent segments in parallel")
+        results = await asyncio.gather(*(run_one(task) for task in task_descriptions))
+        
+        errors = [f"Segment {i}: {r['error']}" for i, r in enumerate(results, 1) if not r["success"]]
+        result = {
+            "success": not errors,
+            "segments": results,
+            "task": "\n".join(task_descriptions),
+        }
+        if errors:
+            result["error"] = "; ".join(errors)
+        return result
     
     def run_task_sync(self, task_description: str) -> dict:
         """Synchronous wrapper for run_task."""
         return asyncio.run(self.run_task(task_description))
 
 
+async def close_browser(browser, timeout: float = STOP_GRACE_SECONDS) -> None:
+    """Kill a browser, waiting at most `timeout` seconds; errors are logged, not raised."""
+    try:
+        await asyncio.wait_for(browser.kill(), timeout=timeout)
+    except Exception as e:
+        print(f"⚠️  Failed to close browser: {e}")
+
+
 async def run_automation(
     task_description: str,
     headless: bool = False,
@@ -0,0 +1,149 @@
+"""
+Batch Scheduler module.
+Runs batches of automation tasks grouped by target domain, so consecutive
+tasks on the same site reuse one warm browser. The browser keeps its HTTP
+cache, open connections, cookies and session from the previous task.
+
+Each lane runs tasks one after another in its own keep_alive browser. A lane
+keeps serving the domain it is warm for, up to BATCH_MAX_CONSECUTIVE tasks in a
+row. The domain then goes to the back of the rotation, so a domain with many
+queued tasks cannot starve the others; while no other domain is waiting, the
+lane stays. Domains are taken in the order their first task was queued. A lane
+only joins a domain that another lane is serving when no other domain is
+waiting.
+"""
+
+import asyncio
+import re
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlsplit
+
+from .automation_runner import AutomationRunner, close_browser
+from .config import config
+
+
+URL_PATTERN = re.compile(r"https?://[^\s\"'<>()]+", re.IGNORECASE)
+# Bare host names in task text ("Go to google.com and ...")
+HOST_PATTERN = re.compile(r"\b((?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z]{2,})\b", re.IGNORECASE)
+
+
+def task_domain(task: str, start_url: str = "") -> str:
+    """Target domain of a task: the start URL's host, else the first URL or host name in the task text."""
+    host = urlsplit(start_url).hostname if start_url else None
+    if not host:
+        match = URL_PATTERN.search(task)
+        host = urlsplit(match.group(0)).hostname if match else None
+    if not host:
+        match = HOST_PATTERN.search(task)
+        host = match.group(1) if match else ""
+    host = host.lower().rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+
+@dataclass
+class BatchTask:
+    """A queued task and the domain it is grouped under."""
+    
+    index: int
+    task: str
+    domain: str
+
+
+class DomainScheduler:
+    """
+    Runs queued tasks through one AutomationRunner, grouped by domain.
+    
+    Results are returned in the order the tasks were added, each with its
+    "domain" and whether it ran in a "warm" browser.
+    """
+    
+    def __init__(
+        self,
+        runner: AutomationRunner,
+        max_parallel: Optional[int] = None,
+        max_consecutive: Optional[int] = None,
+    ):
+        self.runner = runner
+        self.max_parallel = max_parallel or config.batch_max_parallel
+        # Tasks of one domain a lane runs in a row before others get a turn (0 = no limit)
+        self.max_consecutive = config.batch_max_consecutive if max_consecutive is None else max_consecutive
+        self._queues: OrderedDict[str, deque[BatchTask]] = OrderedDict()
+        self._serving: dict[str, int] = {}
+        self._count = 0
+    
+    def add(self, task: str, start_url: str = "") -> BatchTask:
+        """Queue a task; its domain comes from `start_url` (e.g. Workflow.start_url) or the task text."""
+        item = BatchTask(self._count, task, task_domain(task, start_url))
+        self._count += 1
+        self._queues.setdefault(item.domain, deque()).append(item)
+        return item
+    
+    def _next(self, domain: Optional[str], served: int) -> Optional[BatchTask]:
+        """The next task for a lane that has run `served` tasks of `domain` in a row."""
+        # Domains with queued tasks that no lane is serving
+        idle = [d for d in self._queues if not self._serving.get(d)]
+        if domain in self._queues:
+            if not idle or not self.max_consecutive or served < self.max_consecutive:
+                return self._pop(domain)
+            # Turn used up: the domain waits behind the others
+            self._queues.move_to_end(domain)
+        if idle:
+            return self._pop(idle[0])
+        # Every waiting domain is being served: help with the first one
+        return self._pop(next(iter(self._queues))) if self._queues else None
+    
+    def _pop(self, domain: str) -> BatchTask:
+        queue = self._queues[domain]
+        item = queue.popleft()
+        if not queue:
+            del self._queues[domain]
+        return item
+    
+    async def _lane(self, results: list) -> None:
+        browser = None
+        domain: Optional[str] = None
+        served = 0
+        try:
+            while (item := self._next(domain, served)) is not None:
+                warm = browser is not None and item.domain == domain
+                if not warm:
+                    if domain is not None:
+                        self._serving[domain] -= 1
+                    if browser is not None:
+                        await close_browser(browser)
+                    browser = await self._launch()
+                    domain, served = item.domain, 0
+                    self._serving[domain] = self._serving.get(domain, 0) + 1
+                served += 1
+                
+                print(f"🗂️  Task {item.index + 1}/{self._count} on {item.domain or 'unknown domain'}"
+                      f" ({'warm' if warm else 'new'} browser)")
+                result = await self.runner.run_task(item.task, browser=browser)
+                results[item.index] = {**result, "domain": item.domain, "warm": warm}
+                if not result["success"] and browser is not None:
+                    # The runner may have closed it, or the site left it in a bad state
+                    await close_browser(browser)
+                    browser = None
+        finally:
+            if domain is not None:
+                self._serving[domain] -= 1
+            if browser is not None:
+                await close_browser(browser)
+    
+    async def _launch(self):
+        try:
+            return await self.runner.launch_browser(keep_alive=True)
+        except Exception as e:
+            print(f"⚠️  Failed to launch a warm browser: {e}")
+            return None
+    
+    async def run(self) -> list[dict]:
+        """Run every queued task; returns their results in the order they were added."""
+        results: list[Optional[dict]] = [None] * self._count
+        domains = len(self._queues)
+        lanes = min(self.max_parallel, self._count)
+        print(f"\n🗂️  Running {self._count} tasks on {domains} domains in {lanes} browsers")
+        await asyncio.gather(*(self._lane(results) for _ in range(lanes)))
+        return results
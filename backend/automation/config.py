@@ -1,45 +1,221 @@
 """
 Configuration module for the automation pipeline.
 Loads environment variables and provides typed configuration.
+
+The .env file is read the first time a setting is resolved rather than at
+import time, so importing the package has no side effects.
 """
 
 import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from dotenv import load_dotenv
+from typing import Optional
 
-# Load .env file from the same directory as this file
+# .env file in the same directory as this file
 env_path = Path(__file__).parent / ".env"
-load_dotenv(dotenv_path=env_path)
+_env_loaded = False
+
+
+def load_env() -> None:
+    """Load the .env file once; later calls are no-ops."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=env_path)
+
+
+def getenv(name: str, default: str = "") -> str:
+    """Read an environment variable after making sure .env has been loaded."""
+    load_env()
+    return os.getenv(name, default)
+
+
+def parse_rate_limits(value: str) -> dict[str, tuple[int, int]]:
+    """Parse "model=rpm/tpm,..." into {model: (rpm, tpm)}; either limit may be omitted."""
+    limits = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        model, _, spec = item.partition("=")
+        rpm, _, tpm = spec.partition("/")
+        limits[model.strip()] = (int(rpm or 0), int(tpm or 0))
+    return limits
 
 
 @dataclass
 class Config:
     """Configuration for the automation pipeline."""
     
+    # LLM provider: "gemini", "openai" (OpenAI-compatible server) or "fake"
+    llm_provider: str = field(default_factory=lambda: getenv("LLM_PROVIDER", "gemini").lower())
+    
+    # Fake provider behaviour for load tests: median call latency in seconds, its
+    # spread (sigma of a lognormal distribution, 0 = constant) and the fraction of
+    # calls failing with a retryable 503 error
+    fake_llm_latency: float = field(default_factory=lambda: float(getenv("FAKE_LLM_LATENCY", "0")))
+    fake_llm_latency_sigma: float = field(default_factory=lambda: float(getenv("FAKE_LLM_LATENCY_SIGMA", "0")))
+    fake_llm_error_rate: float = field(default_factory=lambda: float(getenv("FAKE_LLM_ERROR_RATE", "0")))
+    
     # Google Gemini API
-    google_api_key: str = field(default_factory=lambda: os.getenv("GOOGLE_API_KEY", ""))
-    llm_model: str = field(default_factory=lambda: os.getenv("LLM_MODEL", "gemini-flash-latest"))
+    google_api_key: str = field(default_factory=lambda: getenv("GOOGLE_API_KEY", ""))
+    llm_model: str = field(default_factory=lambda: getenv("LLM_MODEL", "gemini-flash-latest"))
+    analysis_model: str = field(default_factory=lambda: getenv("ANALYSIS_MODEL", "gemini-pro-latest"))
+    extraction_model: str = field(default_factory=lambda: getenv("EXTRACTION_MODEL", "gemini-flash-lite-latest"))
+    
+    # Adaptive model routing: pick the cheapest tier for each workflow's complexity
+    adaptive_routing: bool = field(default_factory=lambda: getenv("ADAPTIVE_ROUTING", "false").lower() == "true")
+    model_tiers: list[str] = field(default_factory=lambda: [
+        m.strip() for m in getenv("MODEL_TIERS", "gemini-flash-lite-latest,gemini-flash-latest,gemini-pro-latest").split(",") if m.strip()
+    ])
+    # Complexity score limits of every tier but the last
+    model_tier_thresholds: list[float] = field(default_factory=lambda: [
+        float(t) for t in getenv("MODEL_TIER_THRESHOLDS", "5,15").split(",") if t.strip()
+    ])
+    # Larger tiers tried after a parse or agent failure
+    max_escalations: int = field(default_factory=lambda: int(getenv("MAX_ESCALATIONS", "1")))
+    
+    # LLM call resilience
+    llm_deadline: float = field(default_factory=lambda: float(getenv("LLM_DEADLINE", "90")))
+    llm_max_retries: int = field(default_factory=lambda: int(getenv("LLM_MAX_RETRIES", "2")))
+    llm_retry_base_delay: float = field(default_factory=lambda: float(getenv("LLM_RETRY_BASE_DELAY", "0.5")))
+    # Send a second request once a call is slower than the observed p95
+    llm_hedge: bool = field(default_factory=lambda: getenv("LLM_HEDGE", "false").lower() == "true")
+    breaker_failure_threshold: int = field(default_factory=lambda: int(getenv("BREAKER_FAILURE_THRESHOLD", "5")))
+    breaker_reset_seconds: float = field(default_factory=lambda: float(getenv("BREAKER_RESET_SECONDS", "30")))
+    
+    # Rate limits shared by all LLM calls in the process (0 = unlimited)
+    # LLM_RATE_LIMITS overrides the defaults per model: "model=rpm/tpm,model=rpm/tpm"
+    llm_default_rpm: int = field(default_factory=lambda: int(getenv("LLM_DEFAULT_RPM", "0")))
+    llm_default_tpm: int = field(default_factory=lambda: int(getenv("LLM_DEFAULT_TPM", "0")))
+    llm_rate_limits: dict[str, tuple[int, int]] = field(default_factory=lambda: parse_rate_limits(getenv("LLM_RATE_LIMITS", "")))
+    
+    # OpenAI-compatible server (Ollama, llama.cpp server, vLLM, ...)
+    openai_base_url: str = field(default_factory=lambda: getenv("OPENAI_BASE_URL", "http://localhost:11434/v1"))
+    openai_api_key: str = field(default_factory=lambda: getenv("OPENAI_API_KEY", "local"))
     
     # Browser-use settings
-    headless: bool = field(default_factory=lambda: os.getenv("HEADLESS", "false").lower() == "true")
+    headless: bool = field(default_factory=lambda: getenv("HEADLESS", "false").lower() == "true")
+    # Budgets for each agent run: steps and wall-clock seconds
+    max_steps: int = field(default_factory=lambda: int(getenv("MAX_STEPS", "50")))
+    run_timeout: float = field(default_factory=lambda: float(getenv("RUN_TIMEOUT", "600")))
+    # Stream each agent step to the run store and keep only the latest in memory
+    bounded_history: bool = field(default_factory=lambda: getenv("BOUNDED_HISTORY", "false").lower() == "true")
+    # Named storage-state profile (cookies, localStorage) runs start from and
+    # update after success; profiles not updated for STORAGE_PROFILE_TTL seconds expire
+    storage_profile: str = field(default_factory=lambda: getenv("STORAGE_PROFILE", ""))
+    storage_profile_ttl: float = field(default_factory=lambda: float(getenv("STORAGE_PROFILE_TTL", "604800")))
+    # Requests blocked in headless runs: CDP resource types ("image,font,media") and
+    # domains ("trackers" expands to common ad and analytics domains); requests to
+    # NETWORK_ALLOW_DOMAINS are never blocked
+    network_block_types: list[str] = field(default_factory=lambda: [
+        t.strip().lower() for t in getenv("NETWORK_BLOCK_TYPES", "").split(",") if t.strip()
+    ])
+    network_deny_domains: list[str] = field(default_factory=lambda: [
+        d.strip() for d in getenv("NETWORK_DENY_DOMAINS", "").split(",") if d.strip()
+    ])
+    network_allow_domains: list[str] = field(default_factory=lambda: [
+        d.strip() for d in getenv("NETWORK_ALLOW_DOMAINS", "").split(",") if d.strip()
+    ])
+    # Batches: concurrent browsers, and tasks of one domain a browser runs in a row
+    # before other domains get a turn (0 = no limit)
+    batch_max_parallel: int = field(default_factory=lambda: int(getenv("BATCH_MAX_PARALLEL", "2")))
+    batch_max_consecutive: int = field(default_factory=lambda: int(getenv("BATCH_MAX_CONSECUTIVE", "5")))
+    # Maximum concurrent browsers when replaying independent workflow segments
+    max_parallel_segments: int = field(default_factory=lambda: int(getenv("MAX_PARALLEL_SEGMENTS", "3")))
     
     # Human-in-the-loop settings
-    enable_human_in_loop: bool = field(default_factory=lambda: os.getenv("ENABLE_HUMAN_IN_LOOP", "false").lower() == "true")
+    enable_human_in_loop: bool = field(default_factory=lambda: getenv("ENABLE_HUMAN_IN_LOOP", "false").lower() == "true")
+    
+    # Speculative work after /api/describe: "off", "task" (pre-generate the task
+    # description) or "full" (also launch a browser)
+    speculation: str = field(default_factory=lambda: getenv("SPECULATION", "off").lower())
+    speculation_ttl: float = field(default_factory=lambda: float(getenv("SPECULATION_TTL", "120")))
+    
+    # Server worker processes, and where they share settings and human-in-the-loop
+    # state: "local" (single process) or "sqlite" (a database under data_dir)
+    workers: int = field(default_factory=lambda: int(getenv("WORKERS", "1")))
+    shared_state: str = field(default_factory=lambda: getenv("SHARED_STATE", "local").lower())
+    # Seconds between checks for messages from other workers
+    shared_state_poll: float = field(default_factory=lambda: float(getenv("SHARED_STATE_POLL", "0.2")))
+    
+    # Request profiling: "off", "header" (requests sent with X-Profile: 1) or "all"
+    profiling: str = field(default_factory=lambda: getenv("PROFILING", "off").lower())
+    # Token for /api/admin/* (Authorization: Bearer ...); without one, only loopback clients
+    admin_token: str = field(default_factory=lambda: getenv("ADMIN_TOKEN", ""))
+    # Event-loop stalls longer than this many seconds are recorded (0 disables)
+    loop_stall_threshold: float = field(default_factory=lambda: float(getenv("LOOP_STALL_THRESHOLD", "0.25")))
+    # Trace memory allocations from startup (can also be started via the admin API)
+    tracemalloc: bool = field(default_factory=lambda: getenv("TRACEMALLOC", "false").lower() == "true")
+    
+    # Minimum seconds between progress updates streamed to each job's clients
+    progress_min_interval: float = field(default_factory=lambda: float(getenv("PROGRESS_MIN_INTERVAL", "0.5")))
+    
+    # Cross-run cache of page-extraction answers, keyed by URL, page content and
+    # query: EXTRACTION_CACHE_SIZE entries in memory per process, in front of
+    # EXTRACTION_CACHE_DISK_SIZE entries in SQLite shared by all runs and workers
+    extraction_cache: bool = field(default_factory=lambda: getenv("EXTRACTION_CACHE", "true").lower() == "true")
+    extraction_cache_size: int = field(default_factory=lambda: int(getenv("EXTRACTION_CACHE_SIZE", "256")))
+    extraction_cache_disk_size: int = field(default_factory=lambda: int(getenv("EXTRACTION_CACHE_DISK_SIZE", "5000")))
+    extraction_cache_ttl: float = field(default_factory=lambda: float(getenv("EXTRACTION_CACHE_TTL", "86400")))
+    
+    # Incremental describe settings
+    # Fraction of new (uncached) events above which a full re-analysis is done
+    describe_drift_threshold: float = field(default_factory=lambda: float(getenv("DESCRIBE_DRIFT_THRESHOLD", "0.5")))
+    describe_cache_size: int = field(default_factory=lambda: int(getenv("DESCRIBE_CACHE_SIZE", "256")))
+    
+    # Semantic cache: plans and task descriptions of similar recordings (cosine
+    # similarity of local n-gram embeddings >= SEMANTIC_CACHE_THRESHOLD) are
+    # reused. Up to SEMANTIC_CACHE_SIZE entries in SQLite; needs NumPy
+    semantic_cache: bool = field(default_factory=lambda: getenv("SEMANTIC_CACHE", "false").lower() == "true")
+    semantic_cache_threshold: float = field(default_factory=lambda: float(getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")))
+    semantic_cache_size: int = field(default_factory=lambda: int(getenv("SEMANTIC_CACHE_SIZE", "2000")))
     
     # Paths
     project_root: Path = field(default_factory=lambda: Path(__file__).parent.parent.parent)
+    # Local state (run history, caches, browser profiles)
+    data_dir: Path = field(default_factory=lambda: Path(getenv("DATA_DIR", str(Path(__file__).parent / ".data"))))
     
     def validate(self) -> None:
         """Validate required configuration."""
-        if not self.google_api_key:
+        if self.llm_provider == "gemini" and not self.google_api_key:
             raise ValueError(
                 "GOOGLE_API_KEY environment variable is required. "
                 "Get one at https://aistudio.google.com/app/apikey"
             )
 
 
-# Global config instance
-config = Config()
+_config: Optional[Config] = None
+
+
+def get_config() -> Config:
+    """Return the global config instance, creating it on first use."""
+    global _config
+    if _config is None:
+        _config = Config()
+    return _config
+
+
+class _LazyConfig:
+    """
+    The global config for `from .config import config`: the Config instance
+    (and the .env file) is created on first attribute access, not on import.
+    """
+    
+    __slots__ = ()
+    
+    def __getattr__(self, name: str):
+        return getattr(get_config(), name)
+    
+    def __setattr__(self, name: str, value) -> None:
+        setattr(get_config(), name, value)
+    
+    def __delattr__(self, name: str) -> None:
+        delattr(get_config(), name)
+    
+    def __repr__(self) -> str:
+        return repr(get_config())
 
 
+config = _LazyConfig()
@@ -0,0 +1,93 @@
+"""
+Describe Cache module.
+Keeps structured workflow descriptions keyed by a hash of the event prefix they
+were generated from, so a recording that grows by a few actions only needs the
+new events analyzed.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import config
+
+
+def _event_bytes(event: dict) -> bytes:
+    """Stable serialization of a single event for hashing."""
+    return json.dumps(event, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def prefix_digests(events: list[dict], start_url: str = "") -> list[str]:
+    """
+    Compute a rolling digest for every prefix of the event list.
+
+    digests[i] identifies events[:i + 1] (together with the start URL), so a
+    longer recording shares all of its leading digests with the shorter one.
+    """
+    hasher = hashlib.sha256(start_url.encode("utf-8"))
+    digests = []
+    for event in events:
+        hasher.update(_event_bytes(event))
+        digests.append(hasher.copy().hexdigest())
+    return digests
+
+
+@dataclass
+class CachedDescription:
+    """A structured description generated for the first `event_count` events.
+
+    `full_count` is the number of events covered by the last full analysis this
+    description was incrementally built on, so drift accumulates across updates.
+    """
+
+    event_count: int
+    result: dict
+    full_count: int
+
+
+class PrefixCache:
+    """Bounded LRU cache of structured descriptions keyed by prefix digest."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, CachedDescription] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_entries(self) -> int:
+        # Read on use so that creating the global cache does not load the config
+        return self._max_entries or config.describe_cache_size
+
+    def lookup(self, digests: list[str]) -> Optional[CachedDescription]:
+        """Return the cached description for the longest known prefix, if any."""
+        with self._lock:
+            for digest in reversed(digests):
+                entry = self._entries.get(digest)
+                if entry is not None:
+                    self._entries.move_to_end(digest)
+                    return CachedDescription(entry.event_count, copy.deepcopy(entry.result), entry.full_count)
+        return None
+
+    def store(self, digest: str, event_count: int, result: dict, full_count: Optional[int] = None) -> None:
+        """Remember the description generated for a prefix."""
+        entry = CachedDescription(event_count, copy.deepcopy(result), full_count or event_count)
+        with self._lock:
+            self._entries[digest] = entry
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global cache shared by all LLMClient instances
+describe_cache = PrefixCache()
@@ -0,0 +1,130 @@
+"""
+Event Formatters module.
+One formatter per event type. Together they turn recorded events into the
+lines used in workflow summaries and in every LLM prompt built from events.
+
+Recorded events keep their details in up to three payloads:
+- `data`: CSV exports and the synthetic benchmarks.
+- `raw` and `automation`: events sent by the extension.
+
+Each formatter takes the line number prefix and the event dict, reads only the
+fields and payloads its event type shows, and tries the payload keys of each
+field in order. The first non-empty value wins. The whole line, number
+included, is built with a single f-string, so a batch costs one lookup and one
+call per event. The "12. " number prefixes are shared by all calls rather than
+formatted for every line. WorkflowEvent objects only have a `data` payload.
+"""
+
+from typing import Callable, Iterable, Optional
+
+
+# number prefix ("12. " or ""), event dict -> line
+Formatter = Callable[[str, dict], str]
+
+_EMPTY: dict = {}
+
+# Click targets and typed values are cut to this many characters
+TEXT_LIMIT = 80
+
+# Line number prefixes kept for reuse; prompts rarely have more events
+NUMBER_CACHE_SIZE = 10_000
+_numbers_cache: list[str] = []
+
+
+def _navigation(number: str, event: dict) -> str:
+    return f"{number}Navigated to: {event.get('url') or ''} (Page: {event.get('title') or ''})"
+
+
+def _click(number: str, event: dict) -> str:
+    data = event.get("data") or _EMPTY
+    raw = event.get("raw")
+    automation = event.get("automation")
+    tag = (automation and automation.get("tag")) or data.get("element_type") or ""
+    target = (raw and raw.get("text")) or data.get("text") or data.get("target") or tag or "element"
+    if isinstance(target, str) and len(target) > TEXT_LIMIT:
+        target = target[:TEXT_LIMIT]
+    return f"{number}Clicked on: '{target}' ({tag} element) on page: {event.get('url') or ''}"
+
+
+def _input(number: str, event: dict) -> str:
+    data = event.get("data") or _EMPTY
+    raw = event.get("raw") or _EMPTY
+    field = (
+        data.get("field") or data.get("target") or data.get("field_name")
+        or raw.get("field") or raw.get("fieldName") or "field"
+    )
+    value = data.get("value") or raw.get("value") or "[text entered]"
+    if isinstance(value, str) and len(value) > TEXT_LIMIT:
+        value = value[:TEXT_LIMIT]
+    return f"{number}Entered '{value}' in field: {field} on page: {event.get('url') or ''}"
+
+
+def _scroll(number: str, event: dict) -> str:
+    data = event.get("data") or _EMPTY
+    raw = event.get("raw")
+    y = (raw and raw.get("y")) or data.get("y") or data.get("scroll_y") or 0
+    return f"{number}Scrolled to position {y}px on page: {event.get('url') or ''} ({event.get('title') or ''})"
+
+
+def _keypress(number: str, event: dict) -> str:
+    raw = event.get("raw")
+    key = (raw and raw.get("key")) or (event.get("data") or _EMPTY).get("key") or "key"
+    return f"{number}Pressed key: {key}"
+
+
+def _focus(number: str, event: dict) -> str:
+    automation = event.get("automation")
+    element = (automation and automation.get("tag")) or (event.get("data") or _EMPTY).get("element_type") or "element"
+    return f"{number}Focused on: {element} on page: {event.get('url') or ''}"
+
+
+def _unknown(number: str, event: dict) -> str:
+    """Events without a formatter include all their data and raw details."""
+    event_type = event.get("event_type") or event.get("event") or "unknown"
+    details = {**(event.get("data") or _EMPTY), **(event.get("raw") or _EMPTY)}
+    return f"{number}{event_type} on {event.get('url') or ''}: {details}"
+
+
+FORMATTERS: dict[str, Formatter] = {
+    "navigation": _navigation,
+    "page_visit": _navigation,
+    "click": _click,
+    "input": _input,
+    "scroll": _scroll,
+    "keypress": _keypress,
+    "focus": _focus,
+}
+
+
+def _numbers(start: int, count: int) -> list[str]:
+    """The prefixes "start. " to "start + count - 1. ", cached up to NUMBER_CACHE_SIZE."""
+    global _numbers_cache
+    end = start + count
+    cache = _numbers_cache
+    if len(cache) < min(end, NUMBER_CACHE_SIZE):
+        # Rebound rather than extended, so a concurrent reader never sees a partial list
+        cache = _numbers_cache = cache + [f"{i}. " for i in range(len(cache), min(end, NUMBER_CACHE_SIZE))]
+    cached = cache[start:end]
+    return cached + [f"{i}. " for i in range(start + len(cached), end)]
+
+
+def format_events(events: list[dict], start: Optional[int] = 1) -> list[str]:
+    """Format raw event dicts (as sent to /api/describe), numbered from `start` if given."""
+    formatter = FORMATTERS.get
+    if start is None:
+        return [
+            formatter(event.get("event_type") or event.get("event"), _unknown)("", event)
+            for event in events
+        ]
+    return [
+        formatter(event.get("event_type") or event.get("event"), _unknown)(number, event)
+        for number, event in zip(_numbers(start, len(events)), events)
+    ]
+
+
+def describe_events(events: Iterable, start: Optional[int] = None) -> list[str]:
+    """Format WorkflowEvent objects, numbered from `start` if given."""
+    return format_events(
+        [{"event_type": e.event_type, "url": e.url, "title": e.title, "data": e.data} for e in events],
+        start,
+    )
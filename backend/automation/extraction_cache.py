@@ -0,0 +1,242 @@
+"""
+Extraction Cache module.
+Caches the page-extraction LLM's answers across runs. Recurring workflows
+extract the same information from the same pages, and each repeat would
+otherwise be another call to the extraction model.
+
+An answer is keyed by the page URL, a digest of the page content sent to the
+model (whitespace-normalized markdown of the DOM), and a digest of the rest of
+the request: query, output schema, instructions and model. The same query on
+a page whose content changed is a miss.
+
+Two tiers: a per-process LRU with a TTL, in front of an SQLite table under
+DATA_DIR that all runs and server workers share. Each tier is bounded in size,
+and entries expire after EXTRACTION_CACHE_TTL seconds.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+from .config import config
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    completion TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_extractions_used ON extractions (used_at);
+"""
+
+CONTENT_PATTERN = re.compile(r"<webpage_content>\n(.*)\n</webpage_content>", re.DOTALL)
+# Derived from the page content, so not part of the request digest
+STATS_PATTERN = re.compile(r"<content_stats>\n.*?\n</content_stats>", re.DOTALL)
+
+# Disk entries are trimmed to the size limit after this many stores
+TRIM_EVERY = 50
+
+
+def extraction_key(model: str, url: str, messages: list, output_format=None) -> Optional[str]:
+    """Cache key of an extraction request, or None if the messages are not a page extraction."""
+    texts = [getattr(m, "text", None) or str(getattr(m, "content", "")) for m in messages]
+    prompt = texts[-1] if texts else ""
+    match = CONTENT_PATTERN.search(prompt)
+    if match is None:
+        return None
+    
+    page = hashlib.sha256(" ".join(match.group(1).split()).encode("utf-8")).hexdigest()
+    request = hashlib.sha256()
+    for text in [*texts[:-1], prompt[:match.start()], prompt[match.end():]]:
+        request.update(STATS_PATTERN.sub("", text).encode("utf-8"))
+        request.update(b"\0")
+    if output_format is not None:
+        request.update(json.dumps(output_format.model_json_schema(), sort_keys=True).encode("utf-8"))
+    return hashlib.sha256(f"{model}\0{url}\0{page}\0{request.hexdigest()}".encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """In-memory LRU over a shared SQLite table of extraction answers (JSON strings)."""
+    
+    def __init__(
+        self,
+        path: Optional[Path | str] = None,
+        max_entries: Optional[int] = None,
+        max_disk_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.path = Path(path) if path else config.data_dir / "extraction_cache.sqlite3"
+        self.max_entries = config.extraction_cache_size if max_entries is None else max_entries
+        self.max_disk_entries = config.extraction_cache_disk_size if max_disk_entries is None else max_disk_entries
+        self.ttl = config.extraction_cache_ttl if ttl is None else ttl
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="extraction-cache")
+        self._stores = 0
+    
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+    
+    def get(self, key: str) -> Optional[str]:
+        """The cached answer for `key`, from memory or disk."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry[1]
+            
+            row = None
+            if self.max_disk_entries:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT completion, created_at FROM extractions WHERE key = ? AND created_at >= ?",
+                    (key, now - self.ttl),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE extractions SET used_at = ? WHERE key = ?", (now, key))
+                    conn.commit()
+            if row is None:
+                self._entries.pop(key, None)
+                self.counters["misses"] += 1
+                return None
+            self._remember(key, row[1], row[0])
+            self.counters["disk_hits"] += 1
+            return row[0]
+    
+    def put(self, key: str, url: str, completion: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, completion)
+            self.counters["stores"] += 1
+            if not self.max_disk_entries:
+                return
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, url, completion, created_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, url, completion, now, now),
+            )
+            self._stores += 1
+            if self._stores % TRIM_EVERY == 0:
+                self._trim(conn, now)
+            conn.commit()
+    
+    def _remember(self, key: str, stored_at: float, completion: str) -> None:
+        self._entries[key] = (stored_at, completion)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _trim(self, conn: sqlite3.Connection, now: float) -> None:
+        """Delete expired entries, then the least recently used beyond the size limit."""
+        conn.execute("DELETE FROM extractions WHERE created_at < ?", (now - self.ttl,))
+        conn.execute(
+            "DELETE FROM extractions WHERE key IN (SELECT key FROM extractions ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self.max_disk_entries:
+                conn = self._connection()
+                conn.execute("DELETE FROM extractions")
+                conn.commit()
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.counters, "memory_entries": len(self._entries)}
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    async def aget(self, key: str) -> Optional[str]:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.get, key)
+    
+    async def aput(self, key: str, url: str, completion: str) -> None:
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.put, key, url, completion)
+
+
+class CachedExtractionModel:
+    """
+    Wraps the page-extraction chat model so repeated extractions are answered from the cache.
+    
+    The page URL is read from the browser when the model is called, as
+    browser-use's extract action does. Other attributes are delegated to the
+    wrapped model.
+    """
+    
+    def __init__(self, llm, browser, cache: "ExtractionCache"):
+        self._llm = llm
+        self._browser = browser
+        self._cache = cache
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._llm, name)
+    
+    async def ainvoke(self, messages: list, output_format=None, **kwargs):
+        from browser_use.llm.views import ChatInvokeCompletion
+        
+        key = url = None
+        try:
+            url = await self._browser.get_current_page_url()
+            key = extraction_key(self._llm.model, url, messages, output_format)
+            cached = await self._cache.aget(key) if key else None
+        except Exception as e:
+            print(f"⚠️  Extraction cache unavailable: {e}")
+            key = cached = None
+        if cached is not None:
+            completion = output_format.model_validate_json(cached) if output_format else json.loads(cached)
+            return ChatInvokeCompletion(completion=completion, usage=None)
+        
+        result = await self._llm.ainvoke(messages, output_format, **kwargs)
+        if key and result.completion:
+            completion = result.completion
+            encoded = completion.model_dump_json() if output_format else json.dumps(completion)
+            try:
+                await self._cache.aput(key, url, encoded)
+            except Exception as e:
+                print(f"⚠️  Failed to cache extraction: {e}")
+        return result
+
+
+_cache: Optional[ExtractionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """The process-wide extraction cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache()
+        return _cache
+
+
+def stats() -> Optional[dict]:
+    """Counters of the extraction cache, or None if it has not been used."""
+    return _cache.snapshot() if _cache is not None else None
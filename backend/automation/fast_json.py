@@ -0,0 +1,114 @@
+"""
+Fast JSON module.
+Decodes request bodies that carry large event lists in one pass.
+
+The body is parsed with orjson when it is installed
+(`pip install autopattern-backend[fast]`), and with the standard json module
+otherwise. In the same pass, each event is checked and turned into the internal
+event dict that the describe and automate code paths use. Its `data` payload is
+reused as decoded. This replaces building a Pydantic model for every event and
+then copying it again.
+
+Events that fail the fast type checks are validated by the Pydantic model
+instead, so the accepted input and the 422 error responses stay the same. One
+example is a timestamp sent as a string.
+"""
+
+import json
+from typing import Any, TypeVar
+
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def loads(body: bytes | str) -> Any:
+    """Parse JSON with orjson if available."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def decode_request(model: type[ModelT], body: bytes, event_model: type[BaseModel]) -> tuple[ModelT, list[dict]]:
+    """
+    Decode a request body with an `events` list.
+    
+    Returns the request model validated without its events, and the events as
+    internal dicts ({"event_type", "timestamp", "url", "title", "data"}).
+    Raises RequestValidationError like FastAPI's own body validation.
+    """
+    try:
+        payload = loads(body)
+    except ValueError as e:
+        raise RequestValidationError([{
+            "type": "json_invalid",
+            "loc": ("body", 0),
+            "msg": "JSON decode error",
+            "input": {},
+            "ctx": {"error": str(e)},
+        }])
+    
+    items = payload.get("events") if type(payload) is dict else None
+    if type(items) is not list:
+        # Missing or malformed: let the model report it (or apply its default)
+        return _validate(model, payload, ("body",)), []
+    
+    request = _validate(model, {**payload, "events": []}, ("body",))
+    return request, decode_events(items, event_model)
+
+
+def decode_events(items: list, event_model: type[BaseModel]) -> list[dict]:
+    """Convert decoded JSON events to internal event dicts, falling back to `event_model` validation."""
+    events = []
+    errors = []
+    for i, item in enumerate(items):
+        if type(item) is dict:
+            event_type = item["event_type"] if "event_type" in item else item.get("event", "unknown")
+            timestamp = item.get("timestamp", 0)
+            url = item.get("url", "")
+            title = item.get("title", "")
+            data = item["data"] if "data" in item else {}
+            if (
+                type(event_type) is str
+                and type(timestamp) is int
+                and type(url) is str
+                and type(title) is str
+                and type(data) is dict
+            ):
+                events.append({"event_type": event_type, "timestamp": timestamp, "url": url, "title": title, "data": data})
+                continue
+        
+        try:
+            event = event_model.model_validate(item)
+        except ValidationError as e:
+            errors.extend(_errors(e, ("body", "events", i)))
+            continue
+        events.append({
+            "event_type": event.event,
+            "timestamp": event.timestamp,
+            "url": event.url,
+            "title": event.title,
+            "data": event.data,
+        })
+    
+    if errors:
+        raise RequestValidationError(errors)
+    return events
+
+
+def _validate(model: type[ModelT], payload: Any, loc: tuple) -> ModelT:
+    try:
+        return model.model_validate(payload)
+    except ValidationError as e:
+        raise RequestValidationError(_errors(e, loc))
+
+
+def _errors(error: ValidationError, loc: tuple) -> list[dict]:
+    return [{**err, "loc": (*loc, *err["loc"])} for err in error.errors(include_url=False)]
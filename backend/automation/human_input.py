@@ -0,0 +1,255 @@
+"""
+Human Input module.
+Routes human-in-the-loop questions from running automations to the WebSocket
+clients subscribed to the same job, and answers back to the waiting agent.
+
+Every connection gets its own bounded send queue drained by a sender task, so a
+slow client never delays delivery to the others. With a shared state backend,
+messages, open questions and answers also reach clients connected to other
+server workers.
+"""
+
+import asyncio
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from fastapi import WebSocket
+
+from .shared_state import SharedState
+
+
+@dataclass
+class PendingQuestion:
+    """A question waiting for an answer."""
+    
+    question_id: str
+    job_id: Optional[str]
+    message: dict
+    future: asyncio.Future
+
+
+# Close code sent to a client that was disconnected for not keeping up, so it
+# knows to reconnect (1013: try again later)
+CLOSE_TRY_AGAIN_LATER = 1013
+
+
+class ClientConnection:
+    """A WebSocket client with a bounded send queue.
+    
+    A client without job subscriptions receives messages for every job.
+    """
+    
+    def __init__(
+        self,
+        websocket: WebSocket,
+        job_ids: Optional[set[str]] = None,
+        max_queue: int = 100,
+        send_timeout: float = 10.0,
+        on_close: Optional[Callable[["ClientConnection"], None]] = None,
+    ):
+        self.websocket = websocket
+        self.job_ids: set[str] = set(job_ids or ())
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=max_queue)
+        self.send_timeout = send_timeout
+        self.on_close = on_close
+        self.closed = False
+        self._sender: Optional[asyncio.Task] = None
+        self._closer: Optional[asyncio.Task] = None
+        # IDs of open questions already queued, since a question can be both
+        # published and replayed to the same client
+        self.question_ids: set[str] = set()
+    
+    def start(self) -> None:
+        self._sender = asyncio.create_task(self._send_loop())
+    
+    def subscribed_to(self, job_id: Optional[str]) -> bool:
+        return job_id is None or not self.job_ids or job_id in self.job_ids
+    
+    def offer(self, message: dict, droppable: bool = False) -> bool:
+        """Queue a message without waiting.
+        
+        When the queue is full a droppable message (e.g. progress) is skipped;
+        otherwise the client is disconnected, since it is not keeping up.
+        """
+        if self.closed:
+            return False
+        if message.get("type") == "question":
+            if message["id"] in self.question_ids:
+                return False
+            self.question_ids.add(message["id"])
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            if droppable:
+                return False
+            print("⚠️  WebSocket client is not keeping up, disconnecting it")
+            self.close(CLOSE_TRY_AGAIN_LATER)
+            return False
+    
+    async def _send_loop(self) -> None:
+        try:
+            while True:
+                message = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_json(message), timeout=self.send_timeout)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # Send failed or timed out: the client is gone or too slow
+            self.close(CLOSE_TRY_AGAIN_LATER)
+    
+    def close(self, code: Optional[int] = None) -> None:
+        """Stop sending; with a close code, the WebSocket is also closed so the client can reconnect."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._sender and self._sender is not asyncio.current_task():
+            self._sender.cancel()
+        if code is not None:
+            self._closer = asyncio.create_task(self._close_websocket(code))
+        if self.on_close:
+            self.on_close(self)
+    
+    async def _close_websocket(self, code: int) -> None:
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), timeout=self.send_timeout)
+        except Exception:
+            # Already closed by the client, or the connection is broken
+            pass
+
+
+class HumanInputManager:
+    """Manages WebSocket connections for human-in-the-loop interactions."""
+    
+    def __init__(self, max_queue: int = 100, send_timeout: float = 10.0, shared: Optional[SharedState] = None):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.connections: dict[WebSocket, ClientConnection] = {}
+        self.pending_questions: dict[str, PendingQuestion] = {}
+        self.shared = shared or SharedState()
+        self.shared.on("publish", self._on_remote_publish)
+        self.shared.on("answer", self._on_remote_answer)
+        self.shared.on("question_closed", lambda payload: self._forget_question(payload["id"]))
+    
+    async def connect(self, websocket: WebSocket, job_ids: Optional[set[str]] = None) -> ClientConnection:
+        """Accept a client, optionally subscribed to specific jobs."""
+        await websocket.accept()
+        connection = ClientConnection(
+            websocket,
+            job_ids=job_ids,
+            max_queue=self.max_queue,
+            send_timeout=self.send_timeout,
+            on_close=self._on_connection_closed,
+        )
+        self.connections[websocket] = connection
+        connection.start()
+        self._replay_pending(connection)
+        return connection
+    
+    def disconnect(self, websocket: WebSocket):
+        connection = self.connections.pop(websocket, None)
+        if connection:
+            connection.close()
+    
+    def _on_connection_closed(self, connection: ClientConnection) -> None:
+        self.connections.pop(connection.websocket, None)
+    
+    def subscribe(self, websocket: WebSocket, job_id: str) -> None:
+        """Subscribe a client to a job and deliver its open questions."""
+        connection = self.connections.get(websocket)
+        if connection and job_id not in connection.job_ids:
+            connection.job_ids.add(job_id)
+            self._replay_pending(connection, job_id)
+    
+    def unsubscribe(self, websocket: WebSocket, job_id: str) -> None:
+        connection = self.connections.get(websocket)
+        if connection:
+            connection.job_ids.discard(job_id)
+    
+    def _replay_pending(self, connection: ClientConnection, job_id: Optional[str] = None) -> None:
+        for pending in list(self.pending_questions.values()):
+            if job_id is not None and pending.job_id != job_id:
+                continue
+            if connection.subscribed_to(pending.job_id):
+                connection.offer(pending.message)
+        asyncio.create_task(self._replay_remote(connection, job_id))
+    
+    async def _replay_remote(self, connection: ClientConnection, job_id: Optional[str]) -> None:
+        """Deliver open questions asked on other workers."""
+        try:
+            questions = await self.shared.entries("question")
+        except Exception as e:
+            print(f"⚠️  Failed to load questions from other workers: {e}")
+            return
+        for message in questions:
+            if job_id is not None and message.get("job_id") != job_id:
+                continue
+            if connection.subscribed_to(message.get("job_id")):
+                connection.offer(message)
+    
+    def publish(self, job_id: Optional[str], message: dict, droppable: bool = False) -> int:
+        """Queue a message for every client subscribed to the job, on every worker.
+        
+        Returns the number of clients on this worker it was queued for.
+        """
+        self.shared.broadcast("publish", {"job_id": job_id, "message": message, "droppable": droppable})
+        return self._deliver(job_id, message, droppable)
+    
+    def _on_remote_publish(self, payload: dict) -> None:
+        self._deliver(payload["job_id"], payload["message"], payload["droppable"])
+    
+    def _deliver(self, job_id: Optional[str], message: dict, droppable: bool) -> int:
+        delivered = 0
+        for connection in list(self.connections.values()):
+            if connection.subscribed_to(job_id) and connection.offer(message, droppable):
+                delivered += 1
+        return delivered
+    
+    async def ask_human(self, question: str, job_id: Optional[str] = None, timeout: float = 300.0) -> str:
+        """Ask a question to the clients following a job and wait for the answer.
+        
+        If no client is subscribed yet, the question stays pending and is
+        delivered as soon as one subscribes, until the timeout expires.
+        """
+        question_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        message = {"type": "question", "id": question_id, "job_id": job_id, "question": question}
+        self.pending_questions[question_id] = PendingQuestion(question_id, job_id, message, future)
+        self.shared.register("question", question_id, message)
+        
+        if not self.publish(job_id, message):
+            print(f"\n🤔 Agent needs help (waiting for a client to connect): {question}")
+        
+        try:
+            # Wait for response with timeout
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            return "No response received (timeout)"
+        finally:
+            self.pending_questions.pop(question_id, None)
+            self.shared.unregister("question", question_id)
+            self.shared.broadcast("question_closed", {"id": question_id})
+            self._forget_question(question_id)
+    
+    def _forget_question(self, question_id: str) -> None:
+        """Drop an answered or expired question from the clients' delivered IDs."""
+        for connection in self.connections.values():
+            connection.question_ids.discard(question_id)
+    
+    def receive_answer(self, question_id: str, answer: str):
+        """Receive an answer from a human; answers to other workers' questions are forwarded."""
+        if question_id not in self.pending_questions:
+            self.shared.broadcast("answer", {"id": question_id, "answer": answer})
+            return
+        self._resolve(question_id, answer)
+    
+    def _on_remote_answer(self, payload: dict) -> None:
+        self._resolve(payload["id"], payload["answer"])
+    
+    def _resolve(self, question_id: str, answer: str) -> None:
+        pending = self.pending_questions.get(question_id)
+        if pending and not pending.future.done():
+            pending.future.set_result(answer)
+            # Let other clients following the job know the question is settled
+            self.publish(pending.job_id, {"type": "answered", "id": question_id, "job_id": pending.job_id})
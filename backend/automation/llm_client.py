@@ -1,15 +1,19 @@
 """
 LLM Client module.
-Uses Google Gemini to convert workflow events into natural language task descriptions.
+Uses the configured LLM provider (Gemini by default) to convert workflow events
+into natural language task descriptions.
 """
 
-import os
 import json
-from typing import Optional
-from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import Optional, Sequence
 
 from .config import config
+from .describe_cache import describe_cache, prefix_digests
+from .event_formatters import format_events
+from .llm_providers import create_chat_model
+from .rate_limiter import limited_call
+from .resilience import get_caller
+from .semantic_cache import exact_values, get_semantic_cache
 from .workflow_loader import Workflow
 
 
@@ -65,26 +69,34 @@ Guidelines for steps:
 Output ONLY the JSON object, no markdown code blocks, no explanations."""
 
 
+INCREMENTAL_STEPS_PROMPT = WORKFLOW_STEPS_PROMPT + """
+
+You will be given an existing plan together with events recorded after it was created, instead of the full event list.
+Return the complete updated plan (title, description and all steps) in the same JSON structure.
+Only change the title or description if the new events change what the workflow is about."""
+
+
+class TaskGenerationError(RuntimeError):
+    """Raised when the LLM could not generate a task description."""
+
+
 class LLMClient:
-    """Client for generating task descriptions using Gemini."""
+    """Client for generating task descriptions using the configured LLM provider."""
     
     def __init__(
         self,
         model: Optional[str] = None,
         analysis_model: Optional[str] = None,
+        provider: Optional[str] = None,
     ):
         self.model = model or config.llm_model
-        self.analysis_model = analysis_model or "gemini-pro-latest"
-        
-        # Initialize Gemini
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY is required. Get one at https://aistudio.google.com/app/apikey")
+        self.analysis_model = analysis_model or config.analysis_model
+        self.provider = provider or config.llm_provider
         
-        self.llm = ChatGoogleGenerativeAI(model=self.model, google_api_key=api_key)
+        self.llm = create_chat_model(self.model, self.provider)
         
         # Initialize a separate client for workflow step generation (uses the analysis model)
-        self.llm_pro = ChatGoogleGenerativeAI(model=self.analysis_model, google_api_key=api_key)
+        self.llm_pro = create_chat_model(self.analysis_model, self.provider)
     
     def generate_task_description(self, workflow: Workflow) -> str:
         """Generate a natural language task description from a workflow."""
@@ -98,7 +110,13 @@ Actions performed:
 
 Generate a task description for an AI browser agent to replicate this workflow."""
         
-        return self._generate(user_prompt)
+        # A similar recording with the same typed values and URLs may already have a description
+        semantic_text = f"{workflow.start_url}\n{workflow.summary}"
+        exact = exact_values(workflow.events, workflow.start_url)
+        cached = self._semantic_lookup("task", self.model, semantic_text, exact)
+        if cached is not None:
+            return cached
+        return self._generate(user_prompt, semantic_text, exact)
 
     def generate_from_summary(self, summary: str, start_url: str = "") -> str:
         """Generate a task description from a plain text summary."""
@@ -114,80 +132,93 @@ Generate a task description for an AI browser agent to replicate this workflow."
         
         return self._generate(user_prompt)
 
-    def _generate(self, prompt: str) -> str:
-        """Internal generation logic using Gemini."""
+    def _invoke(self, llm, model: str, system_prompt: str, user_prompt: str) -> str:
+        """
+        Call a chat model through its provider/model resilience wrapper.
+        
+        The deadline, retries, hedging, circuit breaker and rate limits are
+        shared by every client using the same provider and model. The call
+        waits once for the rate limiter at the caller's priority, before its
+        first attempt.
+        """
+        messages = _messages(system_prompt, user_prompt)
+        caller = get_caller(f"{self.provider}:{model}")
+        response = limited_call(model, messages, lambda: caller.call(lambda: llm.invoke(messages)))
+        content = response.content
+        if isinstance(content, list):
+            content = " ".join([str(c) for c in content])
+        return str(content)
+
+    def _generate(self, prompt: str, semantic_text: Optional[str] = None, exact: Sequence[str] = ()) -> str:
+        """Internal generation logic using the task description model."""
         
         try:
-            response = self.llm.invoke([
-                SystemMessage(content=SYSTEM_PROMPT),
-                HumanMessage(content=prompt)
-            ])
-            content = response.content
-            if isinstance(content, list):
-                content = " ".join([str(c) for c in content])
-            return str(content).strip()
+            description = self._invoke(self.llm, self.model, SYSTEM_PROMPT, prompt).strip()
+            if semantic_text is not None:
+                self._semantic_store("task", self.model, semantic_text, exact, description)
+            return description
         except Exception as e:
-            # If generation fails, return a safe fallback
-            print(f"Gemini generation failed: {e}")
-            print(f"Falling back to raw workflow summary")
-            # Extract a simple description from the prompt
-            return f"Perform the task based on: {prompt[:200]}..."
+            # A made-up task would send the agent off on the wrong work
+            print(f"LLM generation failed: {e}")
+            raise TaskGenerationError(f"Task description generation failed: {e}") from e
 
-    def generate_workflow_steps(self, events: list[dict], start_url: str = "") -> dict:
+    def generate_workflow_steps(self, events: list[dict], start_url: str = "", fallback: bool = True) -> dict:
         """
         Generate a structured workflow description with steps from raw events.
         
-        Uses gemini-pro for higher reasoning capability.
+        Uses the analysis model for higher reasoning capability. If a description was
+        already generated for a prefix of these events, only the new events are
+        sent together with the previous plan, unless the share of new events
+        exceeds config.describe_drift_threshold.
         
         Args:
             events: List of raw event dictionaries from the browser recording
             start_url: Optional starting URL
+            fallback: Return a plan built from the raw events if analysis fails;
+                if False, the error is raised so the caller can escalate
             
         Returns:
             dict with 'description' and 'steps' keys
         """
-        # Format events for the prompt
-        events_summary = []
-        for i, event in enumerate(events, 1):
-            event_type = event.get('event_type', event.get('event', 'unknown'))
-            url = event.get('url', '')
-            title = event.get('title', '')
-            data = event.get('data', {})
-            raw = event.get('raw', {})
-            automation = event.get('automation', {})
-            
-            # Build a readable event description with all available details
-            if event_type in ['navigation', 'page_visit']:
-                events_summary.append(f"{i}. Navigated to: {url} (Page: {title})")
-            elif event_type == 'click':
-                # Try multiple places where click target text might be stored
-                target_text = (
-                    raw.get('text') or 
-                    data.get('text') or 
-                    data.get('target') or 
-                    automation.get('tag', 'element')
-                )
-                xpath = automation.get('xpath', '')
-                tag = automation.get('tag', '')
-                events_summary.append(f"{i}. Clicked on: '{target_text}' ({tag} element) on page: {url}")
-            elif event_type == 'input':
-                field = data.get('field', data.get('target', raw.get('field', 'field')))
-                value = data.get('value', raw.get('value', '[text entered]'))
-                events_summary.append(f"{i}. Entered '{value}' in field: {field} on page: {url}")
-            elif event_type == 'scroll':
-                scroll_y = raw.get('y', data.get('y', 0))
-                events_summary.append(f"{i}. Scrolled to position {scroll_y}px on page: {url} ({title})")
-            elif event_type == 'keypress':
-                key = raw.get('key', data.get('key', 'key'))
-                events_summary.append(f"{i}. Pressed key: {key}")
-            else:
-                # Include all available data for unknown events
-                all_data = {**data, **raw}
-                events_summary.append(f"{i}. {event_type} on {url}: {all_data}")
-        
-        events_text = "\n".join(events_summary) if events_summary else "No events recorded"
+        digests = prefix_digests(events, start_url)
+        cached = describe_cache.lookup(digests) if digests else None
         
-        user_prompt = f"""Here is a recorded browser workflow:
+        if cached and cached.event_count == len(events):
+            return cached.result
+        
+        # A similar recording (same routine, other scrolls, timestamps or text) may
+        # already have a plan. It is not added to the describe cache, whose
+        # entries are exact analyses that later recordings are built on.
+        events_summary = semantic_text = None
+        exact: list[str] = []
+        if get_semantic_cache() is not None:
+            events_summary = format_events(events)
+            semantic_text = f"{start_url}\n" + "\n".join(events_summary)
+            exact = exact_values(events, start_url)
+            similar = self._semantic_lookup("describe", self.analysis_model, semantic_text, exact)
+            if similar is not None:
+                return similar
+        
+        # Drift is measured against the last full analysis, not the last update
+        full_count = cached.full_count if cached else 0
+        incremental = cached is not None and (len(events) - full_count) / len(events) <= config.describe_drift_threshold
+        
+        if incremental:
+            new_lines = format_events(events[cached.event_count:], start=cached.event_count + 1)
+            user_prompt = f"""Here is the current plan for a recorded browser workflow:
+
+{json.dumps(cached.result, indent=2)}
+
+The user recorded these additional events after the ones the plan was based on:
+{chr(10).join(new_lines) if new_lines else "No events recorded"}
+
+Update the plan so it also covers the new events. Keep existing steps unless the new events change their meaning."""
+            system_prompt = INCREMENTAL_STEPS_PROMPT
+        else:
+            if events_summary is None:
+                events_summary = format_events(events)
+            events_text = "\n".join(events_summary) if events_summary else "No events recorded"
+            user_prompt = f"""Here is a recorded browser workflow:
 
 Starting URL: {start_url}
 
@@ -195,58 +226,99 @@ Detailed events:
 {events_text}
 
 Analyze these events carefully. Note the specific text of buttons/links clicked, the URLs visited, and page titles. Generate a structured workflow plan with specific details."""
-
+            system_prompt = WORKFLOW_STEPS_PROMPT
+        
+        content = ""
         try:
-            response = self.llm_pro.invoke([
-                SystemMessage(content=WORKFLOW_STEPS_PROMPT),
-                HumanMessage(content=user_prompt)
-            ])
-            content = response.content
-            if isinstance(content, list):
-                content = " ".join([str(c) for c in content])
-            
-            # Parse the JSON response
-            content = str(content).strip()
-            # Remove markdown code blocks if present
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-            
-            result = json.loads(content)
-            
-            # Validate structure
-            if "title" not in result:
-                result["title"] = "Workflow"
-            if "description" not in result:
-                result["description"] = "Recorded workflow"
-            if "steps" not in result:
-                result["steps"] = []
-            
-            # Ensure step IDs are sequential
-            for i, step in enumerate(result["steps"], 1):
-                step["id"] = i
-                if "label" not in step:
-                    step["label"] = f"Step {i}"
-            
-            return result
+            content = self._invoke(self.llm_pro, self.analysis_model, system_prompt, user_prompt)
+            result = _parse_steps_json(content)
             
         except json.JSONDecodeError as e:
             print(f"Failed to parse workflow steps JSON: {e}")
             print(f"Raw response: {content}")
-            # Return a fallback structure
-            return {
-                "title": "Workflow",
-                "description": "Recorded workflow (AI analysis failed)",
-                "steps": [{"id": i+1, "label": line} for i, line in enumerate(events_summary[:10])]
-            }
+            if not fallback:
+                raise
+            return fallback_steps(events)
         except Exception as e:
             print(f"Workflow steps generation failed: {e}")
-            return {
-                "title": "Workflow",
-                "description": "Recorded workflow (AI analysis failed)",
-                "steps": [{"id": i+1, "label": line} for i, line in enumerate(events_summary[:10])]
-            }
+            if not fallback:
+                raise
+            return fallback_steps(events)
+        
+        if digests:
+            describe_cache.store(digests[-1], len(events), result, full_count if incremental else len(events))
+        if semantic_text is not None:
+            self._semantic_store("describe", self.analysis_model, semantic_text, exact, result)
+        return result
+    
+    def _semantic_lookup(self, kind: str, model: str, text: str, exact: Sequence[str]):
+        """
+        Result generated by `model` for a text similar to `text`, with the same
+        `exact` values, if the semantic cache is on and has one.
+        """
+        cache = get_semantic_cache()
+        if cache is None:
+            return None
+        try:
+            return cache.lookup(kind, f"{self.provider}:{model}", text, exact)
+        except Exception as e:
+            print(f"⚠️  Semantic cache unavailable: {e}")
+            return None
+    
+    def _semantic_store(self, kind: str, model: str, text: str, exact: Sequence[str], result) -> None:
+        cache = get_semantic_cache()
+        if cache is None:
+            return
+        try:
+            cache.store(kind, f"{self.provider}:{model}", text, result, exact)
+        except Exception as e:
+            print(f"⚠️  Failed to update semantic cache: {e}")
+
+
+def _messages(system_prompt: str, user_prompt: str) -> list:
+    """Build the chat messages for a prompt (LangChain is imported on first use)."""
+    from langchain_core.messages import SystemMessage, HumanMessage
+    return [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=user_prompt)
+    ]
+
+
+def _parse_steps_json(content: str) -> dict:
+    """Parse and normalize the JSON plan returned by the analysis model."""
+    content = content.strip()
+    # Remove markdown code blocks if present
+    if content.startswith("```json"):
+        content = content[7:]
+    if content.startswith("```"):
+        content = content[3:]
+    if content.endswith("```"):
+        content = content[:-3]
+    content = content.strip()
+    
+    result = json.loads(content)
+    
+    # Validate structure
+    if "title" not in result:
+        result["title"] = "Workflow"
+    if "description" not in result:
+        result["description"] = "Recorded workflow"
+    if "steps" not in result:
+        result["steps"] = []
+    
+    # Ensure step IDs are sequential
+    for i, step in enumerate(result["steps"], 1):
+        step["id"] = i
+        if "label" not in step:
+            step["label"] = f"Step {i}"
+    
+    return result
+
+
+def fallback_steps(events: list[dict]) -> dict:
+    """Structure returned when the analysis model fails."""
+    return {
+        "title": "Workflow",
+        "description": "Recorded workflow (AI analysis failed)",
+        "steps": [{"id": i+1, "label": line} for i, line in enumerate(format_events(events[:10]))]
+    }
@@ -0,0 +1,180 @@
+"""
+LLM Providers module.
+Creates the chat models used for workflow description (LangChain) and by the
+browser agent (browser-use) for the configured provider.
+
+Supported providers:
+    gemini  - Google Gemini (default, requires GOOGLE_API_KEY)
+    openai  - Any OpenAI-compatible HTTP server, e.g. Ollama or llama.cpp server
+    fake    - Deterministic offline model for tests and load testing
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import config
+
+
+PROVIDERS = ("gemini", "openai", "fake")
+
+
+def _resolve_provider(provider: Optional[str]) -> str:
+    provider = (provider or config.llm_provider).lower()
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{provider}'. Expected one of: {', '.join(PROVIDERS)}")
+    return provider
+
+
+def _require_google_api_key() -> str:
+    if not config.google_api_key:
+        raise ValueError("GOOGLE_API_KEY is required. Get one at https://aistudio.google.com/app/apikey")
+    return config.google_api_key
+
+
+def create_chat_model(model: str, provider: Optional[str] = None):
+    """
+    Create a LangChain chat model used by LLMClient.
+    
+    Client-side retries are disabled; LLMClient retries through resilience.py.
+    """
+    provider = _resolve_provider(provider)
+    
+    if provider == "gemini":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(model=model, google_api_key=_require_google_api_key(), max_retries=0)
+    
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=model, base_url=config.openai_base_url, api_key=config.openai_api_key, max_retries=0)
+    
+    return FakeChatModel(model=model)
+
+
+def create_agent_llm(model: str, provider: Optional[str] = None):
+    """Create a browser-use chat model used by AutomationRunner."""
+    provider = _resolve_provider(provider)
+    
+    if provider == "gemini":
+        from browser_use import ChatGoogle
+        return ChatGoogle(model=model, api_key=_require_google_api_key())
+    
+    if provider == "openai":
+        from browser_use import ChatOpenAI
+        return ChatOpenAI(model=model, base_url=config.openai_base_url, api_key=config.openai_api_key)
+    
+    return FakeAgentLLM(model=model)
+
+
+# ============================================================================
+# Fake provider
+# ============================================================================
+
+_NUMBERED_LINE = re.compile(r"^\s*\d+\.\s+(.*)$")
+_URL = re.compile(r"https?://[^\s)'\"]+")
+
+
+class FakeProviderError(Exception):
+    """Error injected by the fake provider (FAKE_LLM_ERROR_RATE); retried like a 503."""
+    
+    status_code = 503
+
+
+def _fake_delay() -> float:
+    """
+    Seconds the next fake call takes: lognormal around FAKE_LLM_LATENCY with
+    FAKE_LLM_LATENCY_SIGMA.
+    """
+    if config.fake_llm_latency <= 0:
+        return 0.0
+    return config.fake_llm_latency * random.lognormvariate(0, config.fake_llm_latency_sigma)
+
+
+def _fake_failure() -> None:
+    if config.fake_llm_error_rate and random.random() < config.fake_llm_error_rate:
+        raise FakeProviderError("503 Service Unavailable (injected by the fake provider)")
+
+
+@dataclass
+class FakeResponse:
+    """Minimal stand-in for a LangChain AIMessage."""
+    content: str
+
+
+class FakeChatModel:
+    """
+    Deterministic chat model that derives its answer from the prompt.
+    
+    Prompts asking for JSON get a plan with one step per numbered event line;
+    other prompts get a one-sentence task description. The same prompt always
+    yields the same answer. Calls take FAKE_LLM_LATENCY and fail at
+    FAKE_LLM_ERROR_RATE, so load tests see realistic provider behaviour.
+    """
+    
+    def __init__(self, model: str = "fake"):
+        self.model = model
+    
+    def invoke(self, messages) -> FakeResponse:
+        time.sleep(_fake_delay())
+        _fake_failure()
+        system = messages[0].content if len(messages) > 1 else ""
+        prompt = messages[-1].content
+        lines = [m.group(1) for m in map(_NUMBERED_LINE.match, prompt.splitlines()) if m]
+        urls = _URL.findall(prompt)
+        
+        if "JSON" in system:
+            plan = {
+                "title": "Recorded Workflow",
+                "description": f"Replay {len(lines)} recorded actions starting at {urls[0] if urls else 'the current page'}",
+                "steps": [{"id": i, "label": line} for i, line in enumerate(lines[:10], 1)],
+            }
+            return FakeResponse(content=json.dumps(plan))
+        
+        actions = "; ".join(lines[:5]) or "the recorded actions"
+        return FakeResponse(content=f"Go to {urls[0] if urls else 'the start page'} and perform: {actions}")
+
+
+class FakeAgentLLM:
+    """
+    Deterministic browser-use chat model that finishes the task in one step.
+    
+    Implements the attributes and `ainvoke` signature browser-use expects from
+    its chat models, answering every call with a `done` action.
+    """
+    
+    provider = "fake"
+    
+    def __init__(self, model: str = "fake"):
+        self.model = model
+    
+    @property
+    def name(self) -> str:
+        return self.model
+    
+    @property
+    def model_name(self) -> str:
+        return self.model
+    
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        from browser_use.llm.views import ChatInvokeCompletion
+        
+        await asyncio.sleep(_fake_delay())
+        _fake_failure()
+        if output_format is None:
+            return ChatInvokeCompletion(completion="done", usage=None)
+        
+        fields = {
+            "thinking": "Fake provider: finishing immediately.",
+            "evaluation_previous_goal": "Success",
+            "memory": "Task handled by fake provider.",
+            "next_goal": "Finish the task.",
+            "action": [{"done": {"text": "Completed by fake provider", "success": True}}],
+        }
+        completion = output_format.model_validate(
+            {k: v for k, v in fields.items() if k in output_format.model_fields}
+        )
+        return ChatInvokeCompletion(completion=completion, usage=None)
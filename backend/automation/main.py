@@ -4,6 +4,7 @@ Main entry point for the workflow-to-automation pipeline.
 Usage:
     python main.py --workflow <path-to-csv>
     python main.py --workflow <path-to-csv> --workflow-id <id>
+    python main.py --workflow <path-to-csv> --batch
     python main.py --task "Navigate to google.com and search for Python"
 """
 
@@ -20,10 +21,8 @@ if sys.platform == "win32":
     except AttributeError:
         pass
 
-from .config import config
-from .workflow_loader import WorkflowLoader
-from .llm_client import LLMClient
-from .automation_runner import AutomationRunner
+# Pipeline modules are imported inside the code paths that need them so that
+# --help, --task and --server start without loading LangChain or browser-use.
 
 
 def parse_args():
@@ -54,12 +53,23 @@ def parse_args():
         default=5001,
         help="Port for API server (default: 5001)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Server worker processes (default: WORKERS, 1)",
+    )
     parser.add_argument(
         "--workflow-id",
         type=str,
         default=None,
         help="Specific workflow ID to process (optional, uses first if not specified)",
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Run every workflow in the CSV, grouped by site so consecutive runs reuse a warm browser",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -71,6 +81,29 @@ def parse_args():
         help="Run browser in headless mode",
     )
 
+    parser.add_argument(
+        "--parallel-segments",
+        action="store_true",
+        help="Replay parts of the workflow on unrelated sites concurrently",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=None,
+        help="Stop the agent after this many steps (default: MAX_STEPS)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Stop the agent after this many seconds (default: RUN_TIMEOUT)",
+    )
+    parser.add_argument(
+        "--storage-profile",
+        type=str,
+        default=None,
+        help="Start from the cookies saved under this name and update them on success (default: STORAGE_PROFILE)",
+    )
     parser.add_argument(
         "--human-in-loop",
         action="store_true",
@@ -86,11 +119,17 @@ def parse_args():
 
 
 async def main_async(args):
+    from .config import config
+    
     # Validate config for workflow mode
     if not args.task:
         config.validate()
     
     task_description = None
+    segment_tasks = []
+    
+    if args.batch:
+        return await run_batch(args)
     
     if args.task:
         # Direct task mode - skip workflow loading and LLM
@@ -99,6 +138,9 @@ async def main_async(args):
     
     else:
         # Workflow mode - load CSV and generate description
+        from .workflow_loader import WorkflowLoader
+        from .llm_client import LLMClient
+        
         print(f"\n📂 Loading workflow from: {args.workflow}")
         
         loader = WorkflowLoader(args.workflow)
@@ -115,7 +157,18 @@ async def main_async(args):
         # Generate task description using LLM
         print("\n🤖 Generating task description with LLM...")
         llm_client = LLMClient()
-        task_description = llm_client.generate_task_description(workflow)
+        
+        segments = [workflow]
+        if args.parallel_segments:
+            from .workflow_segments import split_independent_segments
+            segments = split_independent_segments(workflow)
+            print(f"   - Independent segments: {len(segments)}")
+        
+        if len(segments) > 1:
+            segment_tasks = [llm_client.generate_task_description(segment) for segment in segments]
+            task_description = "\n".join(f"[{i}] {task}" for i, task in enumerate(segment_tasks, 1))
+        else:
+            task_description = llm_client.generate_task_description(workflow)
         
         print(f"\n✨ Generated task description:")
         print(f"   {task_description}")
@@ -125,6 +178,8 @@ async def main_async(args):
         return 0
     
     # Execute automation
+    from .automation_runner import AutomationRunner
+    
     print(f"\n🚀 Starting browser automation...")
     print(f"   Headless: {args.headless}")
     print(f"   Human-in-Loop: {args.human_in_loop}")
@@ -132,8 +187,14 @@ async def main_async(args):
     runner = AutomationRunner(
         headless=args.headless,
         enable_human_in_loop=args.human_in_loop,
+        max_steps=args.max_steps,
+        timeout=args.timeout,
+        storage_profile=args.storage_profile,
     )
-    result = await runner.run_task(task_description)
+    if segment_tasks:
+        result = await runner.run_segments(segment_tasks)
+    else:
+        result = await runner.run_task(task_description)
     
     if result["success"]:
         print("\n✅ Automation completed successfully!")
@@ -148,6 +209,47 @@ async def main_async(args):
     return 0
 
 
+async def run_batch(args) -> int:
+    """Generate a task for every workflow in the CSV and run them through the domain scheduler."""
+    from .workflow_loader import WorkflowLoader
+    from .llm_client import LLMClient
+    from .automation_runner import AutomationRunner
+    from .batch_scheduler import DomainScheduler
+    
+    if not args.workflow:
+        print("❌ --batch needs --workflow")
+        return 2
+    
+    workflows = WorkflowLoader(args.workflow).load()
+    print(f"\n📂 Loaded {len(workflows)} workflows from: {args.workflow}")
+    
+    llm_client = LLMClient()
+    runner = AutomationRunner(
+        headless=args.headless,
+        enable_human_in_loop=args.human_in_loop,
+        max_steps=args.max_steps,
+        timeout=args.timeout,
+        storage_profile=args.storage_profile,
+    )
+    scheduler = DomainScheduler(runner)
+    for workflow in workflows:
+        task = llm_client.generate_task_description(workflow)
+        item = scheduler.add(task, workflow.start_url)
+        print(f"   - {workflow.workflow_id} ({item.domain or 'unknown domain'}): {task}")
+    
+    if args.dry_run:
+        print("\n⏸️  Dry run mode - skipping automation execution")
+        return 0
+    
+    results = await scheduler.run()
+    failed = [(w.workflow_id, r) for w, r in zip(workflows, results) if not r["success"]]
+    print(f"\n{'✅' if not failed else '❌'} {len(results) - len(failed)}/{len(results)} workflows succeeded"
+          f" ({sum(r['warm'] for r in results)} in a warm browser)")
+    for workflow_id, result in failed:
+        print(f"   - {workflow_id}: {result.get('error', 'Unknown error')}")
+    return 1 if failed else 0
+
+
 def main():
     """Entry point for CLI."""
     try:
@@ -156,7 +258,7 @@ def main():
         # Handle server mode outside of asyncio.run to avoid event loop conflicts
         if args.server:
             from .server import run_server
-            run_server(port=args.port)
+            run_server(port=args.port, workers=args.workers)
             sys.exit(0)
             
         exit_code = asyncio.run(main_async(args))
@@ -0,0 +1,95 @@
+"""
+Model Router module.
+Scores workflow complexity and picks the cheapest model tier expected to
+handle it, with an escalation ladder of larger models for retries.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+from .config import config
+from .workflow_loader import Workflow
+
+
+_URL = re.compile(r"https?://[^\s)'\"]+")
+
+
+@dataclass
+class WorkflowComplexity:
+    """Features used to route a workflow to a model tier."""
+    
+    events: int = 0
+    domains: int = 0
+    inputs: int = 0
+    pages: int = 0
+    
+    @property
+    def score(self) -> float:
+        # Many events, site hops and typed data are what trip small models up
+        return self.events / 10 + 3 * max(self.domains - 1, 0) + 2 * self.inputs + self.pages / 2
+    
+    @classmethod
+    def from_events(cls, events: list[dict]) -> "WorkflowComplexity":
+        """Complexity of raw event dicts (as sent to /api/describe)."""
+        domains = set()
+        inputs = pages = 0
+        last_url = None
+        for event in events:
+            if event.get("event_type", event.get("event")) == "input":
+                inputs += 1
+            url = event.get("url", "")
+            if url and url != last_url:
+                pages += 1
+                last_url = url
+                host = urlparse(url).hostname
+                if host:
+                    domains.add(host)
+        return cls(events=len(events), domains=len(domains), inputs=inputs, pages=pages)
+    
+    @classmethod
+    def from_workflow(cls, workflow: Workflow) -> "WorkflowComplexity":
+        return cls(
+            events=len(workflow.events),
+            domains=len(workflow.domains),
+            inputs=len(workflow.index.positions_by_type.get("input", [])),
+            pages=len(workflow.page_segments),
+        )
+    
+    @classmethod
+    def from_task(cls, task: str) -> "WorkflowComplexity":
+        """Rough complexity of a plain task description."""
+        urls = _URL.findall(task)
+        domains = {urlparse(url).hostname for url in urls} - {None}
+        sentences = max(len(re.findall(r"[.;\n]", task)), 1)
+        return cls(events=sentences * 3, domains=len(domains), pages=max(len(urls), 1))
+
+
+class ModelRouter:
+    """Maps complexity scores to model tiers, cheapest first."""
+    
+    def __init__(
+        self,
+        tiers: Optional[list[str]] = None,
+        thresholds: Optional[list[float]] = None,
+        max_escalations: Optional[int] = None,
+    ):
+        self.tiers = tiers or config.model_tiers
+        self.thresholds = thresholds or config.model_tier_thresholds
+        self.max_escalations = config.max_escalations if max_escalations is None else max_escalations
+        if len(self.thresholds) != len(self.tiers) - 1:
+            raise ValueError("MODEL_TIER_THRESHOLDS needs exactly one value less than MODEL_TIERS")
+    
+    def tier_for(self, complexity: WorkflowComplexity) -> int:
+        """Index of the cheapest tier whose threshold the score does not exceed."""
+        score = complexity.score
+        for i, threshold in enumerate(self.thresholds):
+            if score <= threshold:
+                return i
+        return len(self.tiers) - 1
+    
+    def ladder(self, complexity: WorkflowComplexity) -> list[str]:
+        """Models to try in order: the routed tier, then up to max_escalations larger ones."""
+        start = self.tier_for(complexity)
+        return self.tiers[start:start + 1 + self.max_escalations]
@@ -0,0 +1,328 @@
+"""
+Network Policy module.
+Request-blocking policies for automation browsers. Resource types the agent
+does not need (images, fonts, media) and requests to denied domains (ads,
+analytics) are failed before they leave the browser.
+
+Only matching requests are intercepted. The policy becomes CDP Fetch patterns
+enabled in every tab, one per blocked resource type and two per denied domain,
+so every other request loads without a round trip through this process.
+Each intercepted request is failed with BlockedByClient unless its domain is on
+the allow list, and counted in NetworkStats.
+
+Blocked requests never reach the server, so their size is unknown. Bytes saved
+are estimated from typical transfer sizes per resource type.
+"""
+
+import inspect
+import weakref
+from collections import Counter, deque
+from dataclasses import dataclass, replace
+from typing import Callable, Iterable, Optional
+from urllib.parse import urlsplit
+
+from .config import config
+
+
+# Policy names of the CDP resource types that can be blocked
+RESOURCE_TYPES = {
+    "image": "Image",
+    "font": "Font",
+    "media": "Media",
+    "stylesheet": "Stylesheet",
+    "script": "Script",
+    "texttrack": "TextTrack",
+    "manifest": "Manifest",
+    "ping": "Ping",
+    "other": "Other",
+}
+
+# Median transfer sizes per resource type (HTTP Archive), used to estimate bytes saved
+TYPICAL_BYTES = {
+    "Image": 12_000,
+    "Font": 25_000,
+    "Media": 250_000,
+    "Stylesheet": 8_000,
+    "Script": 12_000,
+    "XHR": 2_000,
+    "Fetch": 2_000,
+    "Ping": 200,
+}
+DEFAULT_TYPICAL_BYTES = 2_000
+
+# Expanded from "trackers" in a deny list
+TRACKER_DOMAINS = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "segment.io",
+    "mixpanel.com",
+    "amplitude.com",
+    "fullstory.com",
+    "scorecardresearch.com",
+    "adnxs.com",
+    "criteo.com",
+    "taboola.com",
+    "outbrain.com",
+)
+
+# CDP event of intercepted requests; the CDP client keeps one handler per event
+REQUEST_PAUSED = "Fetch.requestPaused"
+
+
+@dataclass(frozen=True)
+class NetworkPolicy:
+    """Resource types and domains to block; allowed domains are never blocked."""
+    
+    block_types: tuple[str, ...] = ()
+    deny_domains: tuple[str, ...] = ()
+    allow_domains: tuple[str, ...] = ()
+    
+    def __post_init__(self):
+        unknown = [t for t in self.block_types if t not in RESOURCE_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown resource types {unknown}: use {', '.join(RESOURCE_TYPES)}")
+        object.__setattr__(self, "deny_domains", _domains(self.deny_domains))
+        object.__setattr__(self, "allow_domains", _domains(self.allow_domains))
+    
+    @classmethod
+    def from_config(cls) -> "NetworkPolicy":
+        return cls(
+            block_types=tuple(config.network_block_types),
+            deny_domains=tuple(config.network_deny_domains),
+            allow_domains=tuple(config.network_allow_domains),
+        )
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.block_types or self.deny_domains)
+    
+    def override(self, **changes: Optional[Iterable[str]]) -> "NetworkPolicy":
+        """This policy with the given fields replaced; fields passed as None are kept."""
+        return replace(self, **{name: tuple(value) for name, value in changes.items() if value is not None})
+    
+    def patterns(self) -> list[dict]:
+        """Fetch.enable request patterns matching every request the policy may block."""
+        patterns = [{"resourceType": RESOURCE_TYPES[t], "requestStage": "Request"} for t in self.block_types]
+        for domain in self.deny_domains:
+            patterns.append({"urlPattern": f"*://{domain}/*", "requestStage": "Request"})
+            patterns.append({"urlPattern": f"*://*.{domain}/*", "requestStage": "Request"})
+        return patterns
+    
+    def blocks(self, url: str, resource_type: str) -> bool:
+        host = urlsplit(url).hostname or ""
+        if _matches(host, self.allow_domains):
+            return False
+        if _matches(host, self.deny_domains):
+            return True
+        return resource_type in {RESOURCE_TYPES[t] for t in self.block_types}
+
+
+def _domains(domains: Iterable[str]) -> tuple[str, ...]:
+    expanded = []
+    for domain in domains:
+        domain = domain.strip().lower().lstrip(".")
+        if domain == "trackers":
+            expanded.extend(TRACKER_DOMAINS)
+        elif domain:
+            expanded.append(domain)
+    return tuple(dict.fromkeys(expanded))
+
+
+def _matches(host: str, domains: tuple[str, ...]) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class NetworkStats:
+    """Requests intercepted during one run, and what blocking them saved."""
+    
+    def __init__(self):
+        self.blocked = 0
+        self.allowed = 0
+        self.estimated_bytes_saved = 0
+        self.by_type: Counter[str] = Counter()
+        self.by_domain: Counter[str] = Counter()
+    
+    def record(self, url: str, resource_type: str, blocked: bool) -> None:
+        if not blocked:
+            self.allowed += 1
+            return
+        self.blocked += 1
+        self.estimated_bytes_saved += TYPICAL_BYTES.get(resource_type, DEFAULT_TYPICAL_BYTES)
+        self.by_type[resource_type] += 1
+        self.by_domain[urlsplit(url).hostname or ""] += 1
+    
+    def to_dict(self, top_domains: int = 10) -> dict:
+        return {
+            "blocked_requests": self.blocked,
+            "allowed_requests": self.allowed,
+            "estimated_bytes_saved": self.estimated_bytes_saved,
+            "by_type": dict(self.by_type.most_common()),
+            "top_domains": dict(self.by_domain.most_common(top_domains)),
+        }
+
+
+class NetworkReport:
+    """Blocking stats of recent runs and totals since the server started."""
+    
+    def __init__(self, max_runs: int = 100):
+        self._runs: deque[dict] = deque(maxlen=max_runs)
+        self.totals = {"runs": 0, "blocked_requests": 0, "estimated_bytes_saved": 0}
+    
+    def add(self, run_id: str, stats: dict) -> None:
+        self._runs.append({"run_id": run_id, **stats})
+        self.totals["runs"] += 1
+        self.totals["blocked_requests"] += stats["blocked_requests"]
+        self.totals["estimated_bytes_saved"] += stats["estimated_bytes_saved"]
+    
+    def snapshot(self) -> dict:
+        return {**self.totals, "recent": list(reversed(self._runs))}
+
+
+class RequestBlocker:
+    """Applies a NetworkPolicy to a started browser-use browser."""
+    
+    def __init__(self, policy: NetworkPolicy):
+        self.policy = policy
+        self.stats = NetworkStats()
+        self.attached = False
+        # browser-use's own requestPaused handler (proxy auth), which allowed requests are passed to
+        self._previous: Optional[Callable] = None
+    
+    async def attach(self, browser) -> None:
+        """
+        Intercept matching requests in every tab of a started browser.
+        
+        Fetch is enabled per page target, for open tabs now and for new tabs
+        when browser-use reports them. Paused requests of all targets arrive
+        at one handler on the root CDP client. Requests that are not blocked
+        go on to the handler registered before (browser-use's, with proxy
+        auth), which this one replaces.
+        """
+        from browser_use.browser.events import TabCreatedEvent
+        
+        client = browser._cdp_client_root
+        
+        async def on_request_paused(event: dict, session_id: Optional[str] = None) -> None:
+            url = event.get("request", {}).get("url", "")
+            resource_type = event.get("resourceType", "Other")
+            blocked = self.policy.blocks(url, resource_type)
+            self.stats.record(url, resource_type, blocked)
+            if not blocked and self._previous is not None:
+                result = self._previous(event, session_id)
+                if inspect.isawaitable(result):
+                    await result
+                return
+            params = {"requestId": event["requestId"]}
+            try:
+                if blocked:
+                    await client.send.Fetch.failRequest(params={**params, "errorReason": "BlockedByClient"}, session_id=session_id)
+                else:
+                    await client.send.Fetch.continueRequest(params=params, session_id=session_id)
+            except Exception:
+                # The tab navigated away or closed while the request was paused
+                pass
+        
+        async def on_tab_created(event: TabCreatedEvent) -> None:
+            if self.attached:
+                await self._enable(browser, event.target_id)
+        
+        self._previous = _registered_handler(client, REQUEST_PAUSED)
+        client.register.Fetch.requestPaused(on_request_paused)
+        self.attached = True
+        browser.event_bus.on(TabCreatedEvent, on_tab_created)
+        await self.enable_all(browser)
+    
+    async def detach(self, browser) -> None:
+        """
+        Stop intercepting: restore the previous requestPaused handler and
+        Fetch settings in every open tab.
+        """
+        self.attached = False
+        client = browser._cdp_client_root
+        if self._previous is not None:
+            client.register.Fetch.requestPaused(self._previous)
+        else:
+            _unregister_handler(client, REQUEST_PAUSED)
+        auth = _has_proxy_auth(browser)
+        for target in browser.session_manager.get_all_page_targets():
+            try:
+                session = await browser.get_or_create_cdp_session(target.target_id, focus=False)
+                if auth:
+                    # As set up by browser-use for proxy authentication
+                    await session.cdp_client.send.Fetch.enable(
+                        params={"handleAuthRequests": True}, session_id=session.session_id,
+                    )
+                else:
+                    await session.cdp_client.send.Fetch.disable(session_id=session.session_id)
+            except Exception as e:
+                print(f"⚠️  Failed to remove network policy from tab {target.target_id[-4:]}: {e}")
+    
+    async def enable_all(self, browser) -> None:
+        """(Re)apply the policy's patterns to every open tab."""
+        for target in browser.session_manager.get_all_page_targets():
+            await self._enable(browser, target.target_id)
+    
+    async def _enable(self, browser, target_id: str) -> None:
+        params: dict = {"patterns": self.policy.patterns()}
+        if _has_proxy_auth(browser):
+            # Fetch.enable replaces the tab's settings; keep proxy auth challenges coming
+            params["handleAuthRequests"] = True
+        try:
+            session = await browser.get_or_create_cdp_session(target_id, focus=False)
+            await session.cdp_client.send.Fetch.enable(params=params, session_id=session.session_id)
+        except Exception as e:
+            print(f"⚠️  Failed to apply network policy to tab {target_id[-4:]}: {e}")
+
+
+
+def _registered_handler(client, method: str) -> Optional[Callable]:
+    registry = getattr(client, "_event_registry", None)
+    return getattr(registry, "_handlers", {}).get(method)
+
+
+def _unregister_handler(client, method: str) -> None:
+    registry = getattr(client, "_event_registry", None)
+    if registry is not None:
+        registry.unregister(method)
+
+
+def _has_proxy_auth(browser) -> bool:
+    """Whether browser-use handles proxy authentication through Fetch for this browser."""
+    proxy = getattr(getattr(browser, "browser_profile", None), "proxy", None)
+    return bool(proxy and proxy.username and proxy.password)
+
+
+# Blockers of browsers kept alive between runs
+_blockers: "weakref.WeakKeyDictionary[object, RequestBlocker]" = weakref.WeakKeyDictionary()
+
+
+async def blocker_for(browser, policy: NetworkPolicy) -> RequestBlocker:
+    """
+    The request blocker of a started browser, attached on first use.
+    
+    A warm browser reused for another run keeps its blocker, with fresh stats
+    and the new run's policy.
+    """
+    blocker = _blockers.get(browser)
+    if blocker is None:
+        blocker = _blockers[browser] = RequestBlocker(policy)
+        await blocker.attach(browser)
+        return blocker
+    blocker.stats = NetworkStats()
+    if policy != blocker.policy:
+        blocker.policy = policy
+        await blocker.enable_all(browser)
+    return blocker
+
+
+async def release_blocker(browser) -> None:
+    """Detach the request blocker of a warm browser reused by a run without a policy."""
+    blocker = _blockers.pop(browser, None)
+    if blocker is not None:
+        await blocker.detach(browser)
@@ -0,0 +1,325 @@
+"""
+Profiling module.
+Opt-in cProfile capture of individual API requests, an event-loop lag monitor
+that records stalls together with the stack of the blocking code, and
+tracemalloc memory snapshots.
+
+Profiles and stalls are kept in memory by each server worker and served by the
+/api/admin endpoints.
+"""
+
+import asyncio
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .config import config
+
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_MODES = ("off", "header", "all")
+SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls", "time")
+GROUP_KEYS = ("lineno", "filename", "traceback")
+
+
+@dataclass
+class RequestProfile:
+    """cProfile statistics of one request."""
+    
+    id: str
+    method: str
+    path: str
+    started_at: float
+    duration_ms: int
+    status: int
+    stats: pstats.Stats = field(repr=False)
+    
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "calls": self.stats.total_calls,
+        }
+    
+    def render(self, sort: str = "cumulative", limit: int = 40) -> str:
+        """pstats report of the top `limit` functions."""
+        out = io.StringIO()
+        stats = pstats.Stats(stream=out)
+        stats.add(self.stats)
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+    
+    def dump(self) -> bytes:
+        """Raw statistics, in the format of cProfile's .prof files."""
+        return marshal.dumps(self.stats.stats)
+
+
+class ProfileStore:
+    """The most recent request profiles."""
+    
+    def __init__(self, max_entries: int = 50):
+        self._profiles: deque[RequestProfile] = deque(maxlen=max_entries)
+    
+    def add(self, profile: RequestProfile) -> None:
+        self._profiles.append(profile)
+    
+    def list(self) -> list[RequestProfile]:
+        return list(reversed(self._profiles))
+    
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return next((p for p in self._profiles if p.id == profile_id), None)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles requests with cProfile.
+    
+    In "header" mode, only requests sent with an `X-Profile: 1` header are
+    profiled; in "all" mode every request is. The profile ID is returned in the
+    `X-Profile-Id` response header. cProfile follows the event loop thread, so
+    the profile also includes other requests served at the same time; only one
+    request is profiled at a time (others get `X-Profile-Id: busy`).
+    """
+    
+    def __init__(self, app, store: ProfileStore, mode: Optional[str] = None):
+        self.app = app
+        self.store = store
+        self.mode = mode or config.profiling
+        self._active = False
+    
+    def _wanted(self, scope) -> bool:
+        if self.mode == "all":
+            return True
+        if self.mode != "header":
+            return False
+        return any(name == PROFILE_HEADER and value not in (b"", b"0") for name, value in scope["headers"])
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        
+        if self._active:
+            await self.app(scope, receive, _with_header(send, b"busy"))
+            return
+        
+        profile_id = uuid.uuid4().hex[:12]
+        status = 0
+        
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await _with_header(send, profile_id.encode())(message)
+        
+        profiler = cProfile.Profile()
+        started_at, started = time.time(), time.perf_counter()
+        self._active = True
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            self._active = False
+            self.store.add(RequestProfile(
+                id=profile_id,
+                method=scope["method"],
+                path=scope["path"],
+                started_at=started_at,
+                duration_ms=int((time.perf_counter() - started) * 1000),
+                status=status,
+                stats=pstats.Stats(profiler),
+            ))
+
+
+def _with_header(send, profile_id: bytes):
+    async def wrapped(message):
+        if message["type"] == "http.response.start":
+            message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id)]}
+        await send(message)
+    return wrapped
+
+
+@dataclass
+class Stall:
+    """A period during which the event loop did not run its callbacks."""
+    
+    id: int
+    started_at: float
+    duration_ms: int
+    stack: list[str]
+    ongoing: bool = False
+    
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "stack": self.stack,
+            "ongoing": self.ongoing,
+        }
+
+
+class LoopMonitor:
+    """
+    Detects event-loop stalls longer than `threshold` seconds.
+    
+    A heartbeat coroutine on the loop updates a timestamp every `interval`
+    seconds. A watchdog thread checks it. When the heartbeat is late by more
+    than the threshold, the watchdog captures the loop thread's current stack
+    with sys._current_frames(). That stack is the blocking code, e.g. a
+    synchronous LLM call inside an async endpoint.
+    """
+    
+    def __init__(self, threshold: Optional[float] = None, interval: float = 0.05, max_stalls: int = 100):
+        self.threshold = config.loop_stall_threshold if threshold is None else threshold
+        self.interval = interval
+        self.stalls: deque[Stall] = deque(maxlen=max_stalls)
+        self.counters = {"stalls": 0, "max_lag_ms": 0, "total_stall_ms": 0}
+        self._ids = itertools.count(1)
+        self._beat = time.monotonic()
+        self._current: Optional[Stall] = None
+        self._lock = threading.Lock()
+        self._loop_thread: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+    
+    def start(self) -> None:
+        """Start monitoring the running event loop (no-op if the threshold is 0)."""
+        if self.threshold <= 0 or self._heartbeat:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+    
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+    
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = now - self._beat - self.interval
+            with self._lock:
+                self._beat = now
+                self.counters["max_lag_ms"] = max(self.counters["max_lag_ms"], int(lag * 1000))
+                if self._current:
+                    # The loop is running again: close the stall with its full length
+                    self._current.duration_ms = int(lag * 1000)
+                    self._current.ongoing = False
+                    self.counters["total_stall_ms"] += self._current.duration_ms
+                    self._current = None
+    
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                late = time.monotonic() - self._beat - self.interval
+                if late < self.threshold or self._current:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread)
+                stall = Stall(
+                    id=next(self._ids),
+                    started_at=time.time() - late,
+                    duration_ms=int(late * 1000),
+                    stack=traceback.format_stack(frame) if frame else [],
+                    ongoing=True,
+                )
+                self._current = stall
+                self.stalls.append(stall)
+                self.counters["stalls"] += 1
+            print(f"🐢 Event loop stalled for {late:.2f}s+ in: {stall.stack[-1].strip() if stall.stack else 'unknown'}")
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **self.counters,
+                "threshold_ms": int(self.threshold * 1000),
+                "recent": [stall.to_dict() for stall in reversed(self.stalls)],
+            }
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class MemoryTracker:
+    """
+    tracemalloc snapshots of the largest allocation sites.
+    
+    Each snapshot is also compared with the previous one, so two calls some
+    time apart show where memory grew in between.
+    """
+    
+    def __init__(self, frames: int = 10):
+        self.frames = frames
+        self._previous: Optional[tracemalloc.Snapshot] = None
+    
+    def start(self, frames: Optional[int] = None) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or self.frames)
+    
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self._previous = None
+    
+    def snapshot(self, top: int = 20, group_by: str = "lineno") -> dict:
+        """RSS, traced totals, the top allocation sites and growth since the last snapshot."""
+        report = {
+            "rss_bytes": rss_bytes(),
+            "tracing": tracemalloc.is_tracing(),
+            "traced_bytes": 0,
+            "peak_bytes": 0,
+            "top": [],
+            "growth": [],
+        }
+        if not report["tracing"]:
+            return report
+        
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        report["traced_bytes"], report["peak_bytes"] = tracemalloc.get_traced_memory()
+        report["top"] = [
+            {"location": _location(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics(group_by)[:top]
+        ]
+        if self._previous is not None:
+            report["growth"] = [
+                {"location": _location(diff.traceback), "size_diff_bytes": diff.size_diff, "count_diff": diff.count_diff}
+                for diff in snapshot.compare_to(self._previous, group_by)[:top]
+            ]
+        self._previous = snapshot
+        return report
+
+
+def _location(tb: tracemalloc.Traceback) -> str:
+    return " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in reversed(tb))
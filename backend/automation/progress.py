@@ -0,0 +1,57 @@
+"""
+Progress module.
+Rate-limits agent progress updates before they are sent to clients.
+"""
+
+import asyncio
+import time
+from typing import Callable, Optional
+
+
+class ProgressThrottler:
+    """
+    Coalesces progress updates so at most one is sent per `min_interval`.
+    
+    An update arriving too soon replaces any pending one and is sent when the
+    interval has elapsed, with a `coalesced` count of the updates it replaced.
+    Must be used from within a running event loop.
+    """
+    
+    def __init__(self, send: Callable[[dict], object], min_interval: float = 0.5):
+        self.send = send
+        self.min_interval = min_interval
+        self._last_sent = 0.0
+        self._pending: Optional[dict] = None
+        self._coalesced = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+    
+    def update(self, message: dict) -> None:
+        """Send the update now or hold it until the interval has passed."""
+        if self._pending is not None:
+            self._coalesced += 1
+        self._pending = message
+        
+        wait = self._last_sent + self.min_interval - time.monotonic()
+        if wait <= 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(wait, self.flush)
+    
+    def flush(self) -> None:
+        """Send the pending update, if any."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending is None:
+            return
+        message = self._pending
+        if self._coalesced:
+            message = {**message, "coalesced": self._coalesced}
+        self._pending = None
+        self._coalesced = 0
+        self._last_sent = time.monotonic()
+        self.send(message)
+    
+    def close(self) -> None:
+        """Send any pending update immediately."""
+        self.flush()
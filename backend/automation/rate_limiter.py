@@ -0,0 +1,249 @@
+"""
+Rate limiter module.
+Process-wide token buckets for requests/minute and tokens/minute per model,
+shared by LLMClient and the agent models built by AutomationRunner.
+
+Waiting calls are served in priority order, then first come first served.
+Interactive calls (describe) go before batch calls (agent steps, speculation).
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from .config import config
+
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITIES = {"interactive": INTERACTIVE, "batch": BATCH}
+
+# Seconds between checks by waiters that are not at the head of the queue
+POLL_INTERVAL = 0.05
+# Tokens reserved for the reply until the provider reports actual usage
+EXPECTED_OUTPUT_TOKENS = 1000
+
+current_priority: ContextVar[int] = ContextVar("llm_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(level: str):
+    """Run LLM calls in this context at the given priority ("interactive" or "batch")."""
+    token = current_priority.set(PRIORITIES[level])
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+def with_priority(level: str, fn: Callable) -> Callable:
+    """Wrap `fn` so its LLM calls run at the given priority, e.g. in asyncio.to_thread."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with priority(level):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def estimate_tokens(messages: list) -> int:
+    """Rough prompt size (~4 characters per token) plus the expected reply."""
+    chars = sum(len(str(getattr(m, "content", m))) for m in messages)
+    return chars // 4 + EXPECTED_OUTPUT_TOKENS
+
+
+class TokenBucket:
+    """Bucket refilled continuously at `per_minute` units per minute."""
+    
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+    
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (requests larger than the bucket wait for a full one)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+    
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+    
+    def adjust(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) a correction; the level may go into debt."""
+        self.level = min(self.capacity, self.level - delta)
+
+
+class ModelLimiter:
+    """Requests/minute and tokens/minute limits for one model."""
+    
+    def __init__(self, name: str, rpm: int = 0, tpm: int = 0):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self._cond = threading.Condition()
+        self._queue: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self.counters = {"granted": 0, "waited": 0, "wait_s": 0.0, "max_wait_s": 0.0, "queued": 0}
+    
+    def _enqueue(self, level: Optional[int]) -> tuple[int, int]:
+        ticket = (current_priority.get() if level is None else level, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+        return ticket
+    
+    def _dequeue(self, ticket: tuple[int, int], waited: float) -> None:
+        with self._cond:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+            self._cond.notify_all()
+            self.counters["granted"] += 1
+            if waited > 0.001:
+                self.counters["waited"] += 1
+                self.counters["wait_s"] += waited
+                self.counters["max_wait_s"] = max(self.counters["max_wait_s"], waited)
+    
+    def _try_take(self, ticket: tuple[int, int], tokens: int) -> float:
+        """Take capacity for `ticket` if it is first in line; otherwise return seconds to wait."""
+        if self._queue[0] != ticket:
+            return POLL_INTERVAL
+        now = time.monotonic()
+        delay = max(
+            self.requests.wait_time(1, now) if self.requests else 0.0,
+            self.tokens.wait_time(tokens, now) if self.tokens else 0.0,
+        )
+        if delay > 0:
+            return delay
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(tokens)
+        self._queue.remove(ticket)
+        heapq.heapify(self._queue)
+        return 0.0
+    
+    def acquire(self, tokens: int, level: Optional[int] = None) -> None:
+        """Block until a request of `tokens` tokens fits within the limits."""
+        started = time.monotonic()
+        ticket = self._enqueue(level)
+        try:
+            with self._cond:
+                while (delay := self._try_take(ticket, tokens)) > 0:
+                    self._cond.wait(delay)
+        finally:
+            self._dequeue(ticket, time.monotonic() - started)
+    
+    async def aacquire(self, tokens: int, level: Optional[int] = None) -> None:
+        """Async variant of acquire; waits without blocking the event loop."""
+        started = time.monotonic()
+        ticket = self._enqueue(level)
+        try:
+            while True:
+                with self._cond:
+                    delay = self._try_take(ticket, tokens)
+                if delay <= 0:
+                    break
+                await asyncio.sleep(min(delay, POLL_INTERVAL))
+        finally:
+            self._dequeue(ticket, time.monotonic() - started)
+    
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """Correct the token bucket once the provider reports the real usage."""
+        if self.tokens and actual:
+            with self._cond:
+                self.tokens.adjust(actual - estimated)
+    
+    def snapshot(self) -> dict:
+        with self._cond:
+            counters = dict(self.counters, queued=len(self._queue))
+            return {
+                **counters,
+                "wait_s": round(counters["wait_s"], 3),
+                "max_wait_s": round(counters["max_wait_s"], 3),
+                "rpm": int(self.requests.capacity) if self.requests else 0,
+                "tpm": int(self.tokens.capacity) if self.tokens else 0,
+                "requests_available": round(self.requests.level, 1) if self.requests else None,
+                "tokens_available": round(self.tokens.level) if self.tokens else None,
+            }
+
+
+_limiters: dict[str, Optional[ModelLimiter]] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(model: str) -> Optional[ModelLimiter]:
+    """Shared limiter for a model, or None if it has no configured limits."""
+    with _limiters_lock:
+        if model not in _limiters:
+            rpm, tpm = config.llm_rate_limits.get(model, (config.llm_default_rpm, config.llm_default_tpm))
+            _limiters[model] = ModelLimiter(model, rpm, tpm) if rpm or tpm else None
+        return _limiters[model]
+
+
+def reset() -> None:
+    """Drop all limiters so changed limits take effect."""
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def stats() -> dict[str, dict]:
+    """Snapshot of every active limiter."""
+    with _limiters_lock:
+        limiters = [limiter for limiter in _limiters.values() if limiter]
+    return {limiter.name: limiter.snapshot() for limiter in limiters}
+
+
+def limited_call(model: str, messages: list, fn: Callable[[], Any], level: Optional[int] = None):
+    """
+    Run one logical LLM call with `messages` within the model's limits.
+    
+    `fn` may retry or hedge; the limiter is acquired once for the whole call,
+    so extra attempts do not take quota from other callers.
+    """
+    limiter = get_limiter(model)
+    if limiter is None:
+        return fn()
+    estimated = estimate_tokens(messages)
+    limiter.acquire(estimated, level)
+    response = fn()
+    usage = getattr(response, "usage_metadata", None) or {}
+    limiter.settle(estimated, usage.get("total_tokens"))
+    return response
+
+
+class RateLimitedChatModel:
+    """
+    Wraps a browser-use chat model so every ainvoke() waits for the model's limits.
+    
+    Other attributes are delegated, so the agent sees the wrapped model's
+    provider and model name.
+    """
+    
+    def __init__(self, llm, level: int = BATCH):
+        self._llm = llm
+        self._level = level
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._llm, name)
+    
+    async def ainvoke(self, messages: list, output_format=None, **kwargs):
+        limiter = get_limiter(self._llm.model)
+        if limiter is None:
+            return await self._llm.ainvoke(messages, output_format, **kwargs)
+        estimated = estimate_tokens(messages)
+        await limiter.aacquire(estimated, self._level)
+        result = await self._llm.ainvoke(messages, output_format, **kwargs)
+        usage = getattr(result, "usage", None)
+        limiter.settle(estimated, getattr(usage, "total_tokens", None))
+        return result
@@ -0,0 +1,259 @@
+"""
+Resilience module.
+Wraps blocking LLM calls with a deadline, jittered exponential retries,
+optional hedged requests and a circuit breaker, and keeps counters for each.
+
+Attempts run on a shared thread pool so they can be timed out and hedged; an
+abandoned attempt keeps running in its thread until the provider returns, but
+its result is ignored.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Optional, TypeVar
+
+from .config import config
+
+
+T = TypeVar("T")
+
+# Provider SDK error classes that are worth retrying, matched by name anywhere in
+# the error's class hierarchy so the SDKs need not be installed: network and
+# timeout errors of httpx/OpenAI, and gRPC/HTTP overload errors of Google APIs
+RETRYABLE_ERROR_TYPES = frozenset({
+    "TransportError", "TimeoutException",
+    "APIConnectionError", "APITimeoutError",
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError",
+})
+
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-call")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call does not finish within its deadline."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is transient: a timeout, a network error, or HTTP 429/5xx."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if any(cls.__name__ in RETRYABLE_ERROR_TYPES for cls in type(error).__mro__):
+        return True
+    response = getattr(error, "response", None)
+    for status in (
+        getattr(error, "status_code", None), getattr(error, "code", None), getattr(response, "status_code", None),
+    ):
+        if isinstance(status, int) and not isinstance(status, bool) and (status == 429 or 500 <= status < 600):
+            return True
+    return False
+
+
+@dataclass
+class ResiliencePolicy:
+    """Knobs for one resilient call site."""
+    
+    deadline_s: float = field(default_factory=lambda: config.llm_deadline)
+    max_retries: int = field(default_factory=lambda: config.llm_max_retries)
+    base_delay_s: float = field(default_factory=lambda: config.llm_retry_base_delay)
+    max_delay_s: float = 8.0
+    hedge: bool = field(default_factory=lambda: config.llm_hedge)
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 20
+    breaker_threshold: int = field(default_factory=lambda: config.breaker_failure_threshold)
+    breaker_reset_s: float = field(default_factory=lambda: config.breaker_reset_seconds)
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies."""
+    
+    def __init__(self, size: int = 200):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+    
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and fails fast for `reset_s`.
+    
+    After that one trial call is let through (half-open); its outcome closes
+    or re-opens the circuit.
+    """
+    
+    def __init__(self, threshold: int, reset_s: float):
+        self.threshold = threshold
+        self.reset_s = reset_s
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_s:
+                self.state = "half_open"
+                return True
+            return False
+    
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self.state = "closed"
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """Runs calls to one provider/model under a ResiliencePolicy."""
+    
+    def __init__(self, name: str, policy: Optional[ResiliencePolicy] = None):
+        self.name = name
+        self.policy = policy or ResiliencePolicy()
+        self.breaker = CircuitBreaker(self.policy.breaker_threshold, self.policy.breaker_reset_s)
+        self.latency = LatencyTracker()
+        self.counters = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "short_circuited": 0,
+        }
+        self._lock = threading.Lock()
+    
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+    
+    def call(self, fn: Callable[[], T]) -> T:
+        """
+        Call `fn` with retries, hedging and the circuit breaker.
+        
+        Raises:
+            CircuitOpenError: if the breaker is open.
+            DeadlineExceeded: if the deadline passes before a reply.
+            Exception: the last error once retries are exhausted or it is not retryable.
+        """
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpenError(f"Circuit open for {self.name}; failing fast")
+        
+        policy = self.policy
+        deadline = time.monotonic() + policy.deadline_s
+        attempt = 0
+        while True:
+            try:
+                result = self._attempt(fn, deadline)
+            except Exception as e:
+                timed_out = isinstance(e, DeadlineExceeded)
+                if timed_out:
+                    self._count("timeouts")
+                retryable = not timed_out and is_retryable(e)
+                delay = min(policy.max_delay_s, policy.base_delay_s * 2 ** attempt) * random.uniform(0.5, 1.5)
+                if retryable and attempt < policy.max_retries and time.monotonic() + delay < deadline:
+                    attempt += 1
+                    self._count("retries")
+                    time.sleep(delay)
+                    continue
+                self._count("failures")
+                self.breaker.record_failure()
+                raise
+            self._count("successes")
+            self.breaker.record_success()
+            return result
+    
+    def _attempt(self, fn: Callable[[], T], deadline: float) -> T:
+        started = time.monotonic()
+        futures: list[Future] = [_executor.submit(fn)]
+        
+        hedge_delay = None
+        if self.policy.hedge and len(self.latency) >= self.policy.hedge_min_samples:
+            hedge_delay = self.latency.quantile(self.policy.hedge_quantile)
+        
+        if hedge_delay is not None and hedge_delay < deadline - started:
+            done, _ = wait(futures, timeout=hedge_delay)
+            if not done:
+                self._count("hedges")
+                futures.append(_executor.submit(fn))
+        
+        error: Optional[BaseException] = None
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        self._count("hedge_wins")
+                    self.latency.add(time.monotonic() - started)
+                    return future.result()
+                error = future.exception()
+        
+        if error is not None and not pending:
+            raise error
+        raise DeadlineExceeded(f"{self.name} did not reply within {self.policy.deadline_s:g}s")
+    
+    def snapshot(self) -> dict:
+        """Counters, breaker state and latency quantiles."""
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "breaker": self.breaker.state,
+            "p50_s": self.latency.quantile(0.5),
+            "p95_s": self.latency.quantile(0.95),
+            "p99_s": self.latency.quantile(0.99),
+        }
+
+
+_callers: dict[str, ResilientCaller] = {}
+_callers_lock = threading.Lock()
+
+
+def get_caller(name: str) -> ResilientCaller:
+    """Shared ResilientCaller for a provider/model, so breaker state is process-wide."""
+    with _callers_lock:
+        caller = _callers.get(name)
+        if caller is None:
+            caller = _callers[name] = ResilientCaller(name)
+        return caller
+
+
+def stats() -> dict[str, dict]:
+    """Snapshot of every caller's counters."""
+    with _callers_lock:
+        callers = list(_callers.values())
+    return {caller.name: caller.snapshot() for caller in callers}
@@ -0,0 +1,318 @@
+"""
+Run Store module.
+Persists automation run records in an embedded SQLite database, with the
+agent history stored in a compact, compressed encoding.
+
+All blocking database work runs on a dedicated thread; the `a*` coroutine
+methods are safe to await from the server's event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional
+
+from .config import config
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    task TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    duration_ms INTEGER,
+    steps INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    history BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs (started_at, id);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (status, started_at, id);
+CREATE INDEX IF NOT EXISTS idx_runs_fingerprint ON runs (fingerprint, started_at, id);
+CREATE TABLE IF NOT EXISTS run_steps (
+    run_id TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_run_steps_run ON run_steps (run_id);
+"""
+
+# Columns returned in listings (the history blob is only loaded for details)
+SUMMARY_COLUMNS = "id, task, fingerprint, status, started_at, finished_at, duration_ms, steps, error"
+
+# Longest extracted content kept per step in the encoded history
+MAX_RESULT_CHARS = 500
+
+
+@dataclass
+class RunRecord:
+    """Summary of a single automation run."""
+    
+    id: str
+    task: str
+    fingerprint: str
+    status: str  # "running", "success" or "failed"
+    started_at: float
+    finished_at: Optional[float] = None
+    duration_ms: Optional[int] = None
+    steps: int = 0
+    error: Optional[str] = None
+    
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class DuplicateRunError(ValueError):
+    """A run with this ID was already recorded."""
+
+
+def task_fingerprint(task: str) -> str:
+    """Fingerprint for runs started from a plain task description."""
+    return hashlib.sha256(" ".join(task.split()).lower().encode("utf-8")).hexdigest()[:16]
+
+
+def encode_step(step) -> list:
+    """
+    Encode one browser-use AgentHistory step as
+    [url, [[action, params], ...], error, result, seconds].
+    """
+    actions = []
+    if step.model_output is not None:
+        for action in step.model_output.action:
+            for name, params in action.model_dump(exclude_unset=True, mode="json").items():
+                actions.append([name, params])
+    errors = [r.error for r in step.result if r.error]
+    results = [r.extracted_content for r in step.result if r.extracted_content]
+    duration = None
+    if step.metadata is not None:
+        duration = round(step.metadata.step_end_time - step.metadata.step_start_time, 3)
+    return [
+        step.state.url,
+        actions,
+        "; ".join(errors) or None,
+        ("\n".join(results)[:MAX_RESULT_CHARS]) or None,
+        duration,
+    ]
+
+
+def encode_steps(steps: list[list]) -> bytes:
+    """Serialize encoded steps as compact JSON and zlib-compress them."""
+    payload = json.dumps(steps, separators=(",", ":"), default=str).encode("utf-8")
+    return zlib.compress(payload, 6)
+
+
+def encode_history(history) -> tuple[bytes, int]:
+    """
+    Encode a browser-use AgentHistoryList (or a list of them) compactly.
+    
+    Each step is encoded with encode_step and the list is serialized as
+    compact JSON and zlib-compressed.
+    
+    Returns:
+        (compressed bytes, number of steps)
+    """
+    histories = history if isinstance(history, list) else [history]
+    steps = [encode_step(step) for item in histories for step in getattr(item, "history", None) or []]
+    return encode_steps(steps), len(steps)
+
+
+def decode_history(blob: Optional[bytes]) -> list[dict]:
+    """Decode a history produced by encode_history into readable steps."""
+    if not blob:
+        return []
+    return readable_steps(json.loads(zlib.decompress(blob)))
+
+
+def readable_steps(steps: list[list]) -> list[dict]:
+    """Turn encoded steps into dicts."""
+    return [
+        {
+            "step": i,
+            "url": url,
+            "actions": [{"name": name, "params": params} for name, params in actions],
+            "error": error,
+            "result": result,
+            "duration_s": duration,
+        }
+        for i, (url, actions, error, result, duration) in enumerate(steps, 1)
+    ]
+
+
+class RunStore:
+    """SQLite-backed store of automation runs."""
+    
+    def __init__(self, path: Optional[Path | str] = None):
+        self.path = Path(path) if path else config.data_dir / "runs.sqlite3"
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="run-store")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+    
+    # ------------------------------------------------------------------
+    # Synchronous API
+    # ------------------------------------------------------------------
+    
+    def start(self, run_id: str, task: str, fingerprint: str, started_at: Optional[float] = None) -> None:
+        """Record that a run has started; raises DuplicateRunError if the ID is taken."""
+        with self._lock:
+            conn = self._connection()
+            try:
+                conn.execute(
+                    "INSERT INTO runs (id, task, fingerprint, status, started_at) VALUES (?, ?, ?, 'running', ?)",
+                    (run_id, task, fingerprint, started_at or time.time()),
+                )
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                raise DuplicateRunError(f"Run '{run_id}' already exists")
+            conn.commit()
+    
+    def exists(self, run_id: str) -> bool:
+        with self._lock:
+            return self._connection().execute("SELECT 1 FROM runs WHERE id = ?", (run_id,)).fetchone() is not None
+    
+    def append_step(self, run_id: str, step: list) -> None:
+        """Store one encoded step (see encode_step) of a run that is still going."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO run_steps (run_id, data) VALUES (?, ?)",
+                (run_id, json.dumps(step, separators=(",", ":"), default=str)),
+            )
+            conn.commit()
+    
+    def finish(self, run_id: str, success: bool, error: Optional[str] = None, history=None) -> None:
+        """
+        Record the outcome of a run, with its encoded agent history.
+        
+        Without `history`, the steps streamed with append_step are compacted
+        into the run's history instead.
+        """
+        blob, steps = encode_history(history) if history is not None else (None, 0)
+        finished_at = time.time()
+        with self._lock:
+            conn = self._connection()
+            if history is None:
+                rows = conn.execute(
+                    "SELECT data FROM run_steps WHERE run_id = ? ORDER BY rowid", (run_id,)
+                ).fetchall()
+                if rows:
+                    blob, steps = encode_steps([json.loads(data) for (data,) in rows]), len(rows)
+                conn.execute("DELETE FROM run_steps WHERE run_id = ?", (run_id,))
+            conn.execute(
+                """UPDATE runs SET status = ?, finished_at = ?,
+                       duration_ms = CAST((? - started_at) * 1000 AS INTEGER),
+                       steps = ?, error = ?, history = ?
+                   WHERE id = ?""",
+                ("success" if success else "failed", finished_at, finished_at, steps, error, blob, run_id),
+            )
+            conn.commit()
+    
+    def list_runs(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+    ) -> tuple[list[RunRecord], Optional[str]]:
+        """
+        List runs, newest first, using keyset pagination.
+        
+        Returns:
+            (runs, next_cursor) where next_cursor is None on the last page.
+        """
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if fingerprint:
+            clauses.append("fingerprint = ?")
+            params.append(fingerprint)
+        if cursor:
+            started_at, run_id = _parse_cursor(cursor)
+            clauses.append("(started_at < ? OR (started_at = ? AND id < ?))")
+            params.extend([started_at, started_at, run_id])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT {SUMMARY_COLUMNS} FROM runs {where} ORDER BY started_at DESC, id DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+        
+        runs = [RunRecord(*row) for row in rows[:limit]]
+        next_cursor = f"{runs[-1].started_at!r}:{runs[-1].id}" if len(rows) > limit else None
+        return runs, next_cursor
+    
+    def get(self, run_id: str) -> Optional[tuple[RunRecord, list[dict]]]:
+        """Return a run and its decoded history, or None if unknown."""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                f"SELECT {SUMMARY_COLUMNS}, history FROM runs WHERE id = ?", (run_id,)
+            ).fetchone()
+            # Steps streamed so far, for a run that has not finished
+            streamed = conn.execute(
+                "SELECT data FROM run_steps WHERE run_id = ? ORDER BY rowid", (run_id,)
+            ).fetchall() if row is not None and row[-1] is None else []
+        if row is None:
+            return None
+        if streamed:
+            return RunRecord(*row[:-1]), readable_steps([json.loads(data) for (data,) in streamed])
+        return RunRecord(*row[:-1]), decode_history(row[-1])
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    # ------------------------------------------------------------------
+    # Async API (runs on the store's thread)
+    # ------------------------------------------------------------------
+    
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
+    
+    async def astart(self, *args, **kwargs) -> None:
+        await self._run(self.start, *args, **kwargs)
+    
+    async def aexists(self, run_id: str) -> bool:
+        return await self._run(self.exists, run_id)
+    
+    async def aappend_step(self, *args, **kwargs) -> None:
+        await self._run(self.append_step, *args, **kwargs)
+    
+    async def afinish(self, *args, **kwargs) -> None:
+        await self._run(self.finish, *args, **kwargs)
+    
+    async def alist_runs(self, *args, **kwargs) -> tuple[list[RunRecord], Optional[str]]:
+        return await self._run(self.list_runs, *args, **kwargs)
+    
+    async def aget(self, run_id: str) -> Optional[tuple[RunRecord, list[dict]]]:
+        return await self._run(self.get, run_id)
+
+
+def _parse_cursor(cursor: str) -> tuple[float, str]:
+    started_at, _, run_id = cursor.partition(":")
+    try:
+        return float(started_at), run_id
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
@@ -0,0 +1,283 @@
+"""
+Semantic Cache module.
+Reuses workflow plans and task descriptions generated for similar recordings.
+Re-recording the same routine changes scroll positions, timestamps and some
+text, so its events never hash the same. Their normalized summaries are still
+nearly identical.
+
+Summaries are embedded locally, without any network call, as hashed feature
+vectors (sublinear term frequency, L2-normalized): the words and word bigrams
+of every event line, the line itself and each pair of consecutive lines, so
+order matters. A lookup is one matrix-vector product over the cached vectors
+with NumPy. It returns the cached result of the most similar entry if the
+cosine similarity reaches SEMANTIC_CACHE_THRESHOLD.
+
+Similar text is not enough: the same routine with another search term or
+another target page needs another plan. Typed values and navigated URLs
+(exact_values) must therefore match exactly. They are stored as a signature
+next to each vector, and only entries with the caller's signature are
+compared.
+
+Entries are stored in SQLite under DATA_DIR, so they survive restarts and are
+shared by server workers: a worker reloads its index when another one has
+written. The least recently used entries are evicted beyond
+SEMANTIC_CACHE_SIZE. NumPy is optional (`pip install autopattern-backend[semantic]`),
+and without it the cache is disabled.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from .config import config
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    result TEXT NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_used ON entries (used_at);
+"""
+
+# Hashed feature space of the embeddings
+DIMENSIONS = 4096
+
+_NUMBERING = re.compile(r"^\s*\d+\.\s+", re.MULTILINE)
+# Timestamps, pixel positions and generated IDs; short numbers (page 2) are kept
+_LONG_NUMBERS = re.compile(r"\d{4,}")
+_WORDS = re.compile(r"[a-z0-9]+")
+# Events whose details differ on every recording of the same routine
+_NOISE_LINES = ("scrolled to", "scroll ")
+NAVIGATION_EVENT_TYPES = ("navigation", "page_visit")
+
+
+def normalize(text: str) -> list[str]:
+    """Lowercased event lines, without numbering, scroll events or long numbers."""
+    lines = []
+    for line in _NUMBERING.sub("", text.lower()).splitlines():
+        line = " ".join(line.split())
+        if line and not line.startswith(_NOISE_LINES):
+            lines.append(_LONG_NUMBERS.sub("0", line))
+    return lines
+
+
+def features(lines: list[str]) -> list[str]:
+    """Words and word bigrams of each line, each whole line and each pair of consecutive lines."""
+    grams = []
+    for line in lines:
+        words = _WORDS.findall(line)
+        grams.extend(words)
+        grams.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+        grams.append(f"line:{line}")
+    grams.extend(f"pair:{a}\n{b}" for a, b in zip(lines, lines[1:]))
+    return grams
+
+
+def exact_values(events: Iterable, start_url: str = "") -> list[str]:
+    """
+    Typed values and navigated URLs of raw event dicts or WorkflowEvent
+    objects, in order. A cached result is only reused for the same values.
+    """
+    values = [f"url:{start_url}"] if start_url else []
+    for event in events:
+        if isinstance(event, dict):
+            event_type = event.get("event_type") or event.get("event")
+            url = event.get("url") or ""
+            data, raw = event.get("data") or {}, event.get("raw") or {}
+        else:
+            event_type, url, data, raw = event.event_type, event.url, event.data, {}
+        if event_type in NAVIGATION_EVENT_TYPES:
+            values.append(f"url:{url}")
+        elif event_type == "input":
+            values.append(f"typed:{data.get('value') or raw.get('value') or ''}")
+    return values
+
+
+def signature(values: Iterable[str]) -> str:
+    return hashlib.sha256("\0".join(values).encode("utf-8")).hexdigest()
+
+
+def embed(lines: list[str], np) -> Any:
+    """Hashed feature vector of normalized lines (float32, unit length)."""
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    indices = np.fromiter(
+        (zlib.crc32(gram.encode("utf-8")) % DIMENSIONS for gram in features(lines)), dtype=np.int64,
+    )
+    if indices.size:
+        np.add.at(vector, indices, 1.0)
+        np.log1p(vector, out=vector)
+        vector /= np.linalg.norm(vector)
+    return vector
+
+
+class SemanticCache:
+    """Nearest-neighbour cache of LLM results keyed by text similarity."""
+    
+    def __init__(
+        self,
+        path: Optional[Path | str] = None,
+        max_entries: Optional[int] = None,
+        threshold: Optional[float] = None,
+    ):
+        self.path = Path(path) if path else config.data_dir / "semantic_cache.sqlite3"
+        self.max_entries = config.semantic_cache_size if max_entries is None else max_entries
+        self.threshold = config.semantic_cache_threshold if threshold is None else threshold
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._np = None
+        self._data_version: Optional[int] = None
+        # Index: one row per entry in _vectors, with its key, and kind, scope and signature
+        self._keys: list[str] = []
+        self._groups: list[tuple[str, str, str]] = []
+        self._vectors = None
+    
+    def _numpy(self):
+        if self._np is None:
+            import numpy
+            self._np = numpy
+        return self._np
+    
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(entries)")]
+            if columns and "signature" not in columns:
+                # Written before signatures were stored; its entries cannot be checked
+                conn.execute("DROP TABLE entries")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+    
+    def _sync(self) -> sqlite3.Connection:
+        """Load the index, again whenever another connection has written to the database."""
+        conn = self._connection()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version or self._vectors is None:
+            np = self._numpy()
+            rows = conn.execute("SELECT key, kind, scope, signature, vector FROM entries").fetchall()
+            self._keys = [row[0] for row in rows]
+            self._groups = [(row[1], row[2], row[3]) for row in rows]
+            self._vectors = (
+                np.stack([np.frombuffer(row[4], dtype=np.float32) for row in rows])
+                if rows else np.zeros((0, DIMENSIONS), dtype=np.float32)
+            )
+            self._data_version = version
+        return conn
+    
+    def lookup(self, kind: str, scope: str, text: str, exact: Iterable[str] = ()) -> Optional[Any]:
+        """
+        The cached result most similar to `text` among entries of the same
+        kind and scope, stored with the same `exact` values, if similar enough.
+        """
+        np = self._numpy()
+        normalized = normalize(text)
+        vector = embed(normalized, np)
+        group = (kind, scope, signature(exact))
+        with self._lock:
+            conn = self._sync()
+            best, similarity = None, -1.0
+            if self._keys:
+                scores = self._vectors @ vector
+                for i in np.argsort(scores)[::-1]:
+                    if self._groups[i] == group:
+                        best, similarity = int(i), float(scores[i])
+                        break
+            if best is None or similarity < self.threshold:
+                self.counters["misses"] += 1
+                return None
+            row = conn.execute(
+                "SELECT result FROM entries WHERE key = ?", (self._keys[best],)
+            ).fetchone()
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            conn.execute("UPDATE entries SET used_at = ? WHERE key = ?", (time.time(), self._keys[best]))
+            conn.commit()
+            self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            self.counters["hits"] += 1
+        print(f"🧠 Semantic cache hit ({kind}, similarity {similarity:.3f})")
+        return json.loads(row[0])
+    
+    def store(self, kind: str, scope: str, text: str, result: Any, exact: Iterable[str] = ()) -> None:
+        """Remember the result generated for `text`, evicting the least recently used entries."""
+        np = self._numpy()
+        normalized = normalize(text)
+        vector = embed(normalized, np)
+        sig = signature(exact)
+        key = hashlib.sha256("\n".join([kind, scope, sig, *normalized]).encode("utf-8")).hexdigest()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, kind, scope, signature, vector, result, used_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, scope, sig, vector.tobytes(), json.dumps(result), time.time()),
+            )
+            evicted = conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            conn.commit()
+            self.counters["stores"] += 1
+            self.counters["evictions"] += max(evicted, 0)
+            # Reloaded on the next lookup
+            self._vectors = None
+    
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+            self._vectors = None
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            entries = self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {**self.counters, "entries": entries, "threshold": self.threshold}
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache: Optional[SemanticCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """The process-wide semantic cache, or None if it is disabled or NumPy is not installed."""
+    global _cache
+    if not config.semantic_cache:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                import numpy  # noqa: F401
+            except ImportError:
+                print("⚠️  SEMANTIC_CACHE needs NumPy: pip install autopattern-backend[semantic]")
+                config.semantic_cache = False
+                return None
+            _cache = SemanticCache()
+        return _cache
+
+
+def stats() -> Optional[dict]:
+    """Counters of the semantic cache, or None if it has not been used."""
+    return _cache.snapshot() if _cache is not None else None
@@ -5,17 +5,36 @@ Provides REST API and WebSocket endpoints for browser automation.
 """
 
 import asyncio
+import hmac
+import os
+import time
+import uuid
+from functools import partial
 from typing import Optional
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks
+from fastapi import Depends, FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response
 from pydantic import BaseModel, Field
 
 from .config import config
 from .workflow_loader import WorkflowLoader, Workflow, WorkflowEvent
-from .llm_client import LLMClient
-from .automation_runner import AutomationRunner
+from .workflow_segments import split_independent_segments
+from .llm_client import LLMClient, TaskGenerationError, fallback_steps
+from .llm_providers import PROVIDERS
+from .automation_runner import AutomationRunner, close_browser
+from .model_router import ModelRouter, WorkflowComplexity
+from .human_input import HumanInputManager
+from .progress import ProgressThrottler
+from . import extraction_cache, rate_limiter, resilience, semantic_cache
+from .run_store import DuplicateRunError, RunStore, task_fingerprint
+from .speculation import SpeculationManager, speculation_key
+from .storage_profiles import NAME_PATTERN, StorageProfileStore
+from .network_policy import NetworkPolicy, NetworkReport
+from .shared_state import create_shared_state
+from .fast_json import decode_request
+from .profiling import GROUP_KEYS, SORT_KEYS, LoopMonitor, MemoryTracker, ProfileStore, ProfilingMiddleware
 
 
 # ============================================================================
@@ -34,8 +53,22 @@ class WorkflowEventModel(BaseModel):
         populate_by_name = True
 
 
+class NetworkPolicyModel(BaseModel):
+    """Request-blocking overrides for one run; omitted fields keep the NETWORK_* settings."""
+    # Resource types to block ("image", "font", "media", ...); [] blocks none
+    block_types: Optional[list[str]] = None
+    # Domains whose requests are blocked ("trackers" for common ad and analytics domains)
+    deny_domains: Optional[list[str]] = None
+    # Domains never blocked
+    allow_domains: Optional[list[str]] = None
+
+
 class AutomateRequest(BaseModel):
     """Request to automate a workflow."""
+    # Client-chosen job ID; human-in-the-loop questions are routed to WebSocket
+    # clients subscribed to it (generated if omitted). An ID that is running or
+    # already has a recorded run is rejected with 409
+    job_id: Optional[str] = None
     workflow_id: str = "1"
     events: list[WorkflowEventModel] = Field(default_factory=list)
     start_url: str = ""
@@ -43,13 +76,30 @@ class AutomateRequest(BaseModel):
     enable_human_in_loop: bool = False
     # Optional: pre-generated task description (bypasses LLM generation if provided)
     task_description: Optional[str] = None
+    # Replay segments on unrelated sites concurrently (only used when events are described here)
+    parallel_segments: bool = False
+    # speculation_id returned by /api/describe; adopts the work started for it
+    # (default: the work started for the same events and start URL)
+    speculation_id: Optional[str] = None
+    # Per-run budgets (default: MAX_STEPS / RUN_TIMEOUT)
+    max_steps: Optional[int] = Field(default=None, gt=0)
+    timeout: Optional[float] = Field(default=None, gt=0)
+    # Storage profile to start logged in from and update (default: STORAGE_PROFILE)
+    storage_profile: Optional[str] = Field(default=None, pattern=NAME_PATTERN.pattern)
+    # Requests blocked in headless runs of this workflow (default: NETWORK_* settings)
+    network_policy: Optional[NetworkPolicyModel] = None
 
 
 class TaskRequest(BaseModel):
     """Request to run automation from a task description."""
+    job_id: Optional[str] = None
     task: str
     headless: bool = False
     enable_human_in_loop: bool = False
+    max_steps: Optional[int] = Field(default=None, gt=0)
+    timeout: Optional[float] = Field(default=None, gt=0)
+    storage_profile: Optional[str] = Field(default=None, pattern=NAME_PATTERN.pattern)
+    network_policy: Optional[NetworkPolicyModel] = None
 
 
 class DescribeRequest(BaseModel):
@@ -63,14 +113,177 @@ class DescribeResponse(BaseModel):
     title: str
     description: str
     steps: list[dict]
+    # Pass to /api/automate to adopt the work speculation started for this workflow
+    speculation_id: Optional[str] = None
 
 
 class AutomateResponse(BaseModel):
     """Response from automation endpoint."""
     success: bool
+    job_id: str = ""
     task_description: str = ""
     message: str = ""
     error: Optional[str] = None
+    # Requests blocked by the network policy, and estimated bytes saved
+    network: Optional[dict] = None
+
+
+class CancelResponse(BaseModel):
+    """Response to a cancellation request."""
+    job_id: str
+    cancelled: bool = True
+
+
+class StorageProfileModel(BaseModel):
+    """A saved browser storage-state profile."""
+    name: str
+    updated_at: float
+    cookies: int
+    origins: int
+    expired: bool
+
+
+class StorageProfileListResponse(BaseModel):
+    profiles: list[StorageProfileModel]
+
+
+class StorageProfileDeleteResponse(BaseModel):
+    name: str
+    deleted: bool = True
+
+
+class NetworkStatsResponse(BaseModel):
+    """Request-blocking totals since the server started, and recent runs, newest first."""
+    runs: int
+    blocked_requests: int
+    estimated_bytes_saved: int
+    recent: list[dict]
+
+
+class RunSummaryModel(BaseModel):
+    """Summary of a recorded automation run."""
+    id: str
+    task: str
+    fingerprint: str
+    status: str
+    started_at: float
+    finished_at: Optional[float] = None
+    duration_ms: Optional[int] = None
+    steps: int = 0
+    error: Optional[str] = None
+
+
+class RunListResponse(BaseModel):
+    """Page of recorded runs, newest first."""
+    runs: list[RunSummaryModel]
+    next_cursor: Optional[str] = None
+
+
+class RunDetailResponse(BaseModel):
+    """A recorded run with its agent history."""
+    run: RunSummaryModel
+    history: list[dict]
+
+
+class LLMCallStats(BaseModel):
+    """Resilience counters for one provider/model."""
+    calls: int = 0
+    successes: int = 0
+    failures: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    short_circuited: int = 0
+    breaker: str = "closed"
+    p50_s: Optional[float] = None
+    p95_s: Optional[float] = None
+    p99_s: Optional[float] = None
+
+
+class RateLimitStats(BaseModel):
+    """Shared rate limiter state for one model."""
+    granted: int = 0
+    waited: int = 0
+    wait_s: float = 0.0
+    max_wait_s: float = 0.0
+    queued: int = 0
+    rpm: int = 0
+    tpm: int = 0
+    requests_available: Optional[float] = None
+    tokens_available: Optional[int] = None
+
+
+class ExtractionCacheStats(BaseModel):
+    """Page-extraction cache counters of this worker."""
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    memory_entries: int = 0
+
+
+class SemanticCacheStats(BaseModel):
+    """Semantic describe cache counters of this worker."""
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    entries: int = 0
+    threshold: float = 0.0
+
+
+class LLMStatsResponse(BaseModel):
+    """Resilience counters keyed by "provider:model", rate limiters keyed by model."""
+    models: dict[str, LLMCallStats]
+    rate_limits: dict[str, RateLimitStats] = {}
+    extraction_cache: Optional[ExtractionCacheStats] = None
+    semantic_cache: Optional[SemanticCacheStats] = None
+
+
+class ProfileSummaryModel(BaseModel):
+    """A profiled request."""
+    id: str
+    method: str
+    path: str
+    started_at: float
+    duration_ms: int
+    status: int
+    calls: int
+
+
+class ProfileListResponse(BaseModel):
+    """Recent request profiles, newest first."""
+    profiles: list[ProfileSummaryModel]
+
+
+class StallModel(BaseModel):
+    """An event-loop stall and the stack that was running during it."""
+    id: int
+    started_at: float
+    duration_ms: int
+    stack: list[str]
+    ongoing: bool = False
+
+
+class StallListResponse(BaseModel):
+    """Event-loop stall counters and recent stalls, newest first."""
+    stalls: int
+    max_lag_ms: int
+    total_stall_ms: int
+    threshold_ms: int
+    recent: list[StallModel]
+
+
+class MemoryResponse(BaseModel):
+    """Process memory and tracemalloc allocation sites."""
+    rss_bytes: Optional[int] = None
+    tracing: bool
+    traced_bytes: int = 0
+    peak_bytes: int = 0
+    top: list[dict] = []
+    # Change per allocation site since the previous snapshot
+    growth: list[dict] = []
 
 
 class HealthResponse(BaseModel):
@@ -81,10 +294,13 @@ class HealthResponse(BaseModel):
 
 class SettingsModel(BaseModel):
     """Application settings."""
+    llm_provider: str = "gemini"
     llm_model: str = "gemini-flash-latest"
     analysis_model: str = "gemini-pro-latest"
     headless: bool = False
     enable_human_in_loop: bool = False
+    # Route each workflow to the cheapest model tier for its complexity
+    adaptive_routing: bool = False
 
 
 class SettingsResponse(BaseModel):
@@ -97,58 +313,170 @@ class SettingsResponse(BaseModel):
 # WebSocket Manager for Human-in-the-Loop
 # ============================================================================
 
-class HumanInputManager:
-    """Manages WebSocket connections for human-in-the-loop interactions."""
+# Settings, questions and job messages shared with the other server workers
+shared_state = create_shared_state()
+
+# Global manager instance
+human_input_manager = HumanInputManager(shared=shared_state)
+
+# Run history store
+run_store = RunStore()
+
+# Work started after /api/describe for the automate call that usually follows
+speculation_manager = SpeculationManager()
+
+# Diagnostics: request profiles and event-loop stalls
+profile_store = ProfileStore()
+loop_monitor = LoopMonitor()
+memory_tracker = MemoryTracker()
+
+# Request-blocking stats of recent runs
+network_report = NetworkReport()
+
+# Cancellation events of running jobs, by job ID
+active_jobs: dict[str, asyncio.Event] = {}
+
+# Seconds between checks whether an automate request's client has gone away
+DISCONNECT_POLL_SECONDS = 1.0
+
+
+async def _run_job(
+    job_id: str,
+    runner: AutomationRunner,
+    task_description: str,
+    segment_tasks: Optional[list[str]] = None,
+    fingerprint: Optional[str] = None,
+    models: Optional[list[str]] = None,
+    browser=None,
+    http_request: Optional[Request] = None,
+) -> dict:
+    """Run an automation job, streaming throttled step progress to its subscribers.
     
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
-        self.pending_questions: dict[str, asyncio.Future] = {}
+    With `models` (an adaptive routing ladder) the agent starts on the first
+    model and is re-run on the next one after a failure, within what is left of
+    the runner's time budget. The run is recorded
+    in the run store under the job ID. The job is cancelled through
+    /api/jobs/{job_id}/cancel, a WebSocket "cancel" message, or when the
+    client of `http_request` disconnects. The job ID must have been claimed
+    with _claim_job.
+    """
+    def send(message: dict, droppable: bool = True) -> None:
+        # Step updates may be dropped for a backlogged client, start/finish may not
+        human_input_manager.publish(job_id, {**message, "job_id": job_id}, droppable=droppable)
     
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+    try:
+        await run_store.astart(job_id, task_description, fingerprint or task_fingerprint(task_description))
+    except DuplicateRunError as e:
+        # Claimed by another worker at the same time
+        if browser is not None:
+            await close_browser(browser)
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        print(f"⚠️  Failed to record run: {e}")
     
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+    cancel = runner.cancel_event = active_jobs.setdefault(job_id, asyncio.Event())
+    shared_state.register("job", job_id)
+    watcher = asyncio.create_task(_cancel_on_disconnect(http_request, cancel)) if http_request else None
+    progress = ProgressThrottler(send, min_interval=config.progress_min_interval)
+    runner.step_callback = progress.update
+    if runner.bounded_history:
+        # Steps go to the run store as they finish; afinish compacts them
+        runner.history_sink = partial(run_store.aappend_step, job_id)
     
-    async def ask_human(self, question: str, timeout: float = 300.0) -> str:
-        """Ask a question to connected humans and wait for response."""
-        if not self.active_connections:
-            # Fallback to console input if no WebSocket connections
-            loop = asyncio.get_running_loop()
-            print(f"\n🤔 Agent needs help: {question}")
-            return await loop.run_in_executor(None, input, "> ")
-        
-        question_id = str(id(question))
-        future = asyncio.get_event_loop().create_future()
-        self.pending_questions[question_id] = future
+    result = {"success": False, "error": "Run was interrupted"}
+    try:
+        send({"type": "started", "task": task_description}, droppable=False)
         
-        # Broadcast question to all connected clients
-        message = {"type": "question", "id": question_id, "question": question}
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception:
-                pass
+        # Escalations share the job's time budget instead of starting a new one
+        deadline = time.monotonic() + runner.timeout if runner.timeout else None
+        for attempt, model in enumerate(models or [runner.llm_model]):
+            if cancel.is_set():
+                result = {**result, "success": False, "error": "Run cancelled"}
+                break
+            if attempt:
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    runner.timeout = remaining
+                print(f"↗️  Automation failed with {runner.llm_model}, escalating to {model}")
+            runner.llm_model = model
+            if segment_tasks:
+                result = await runner.run_segments(segment_tasks)
+            else:
+                # A pre-launched browser is only handed to the first attempt,
+                # which closes it
+                result = await runner.run_task(task_description, browser=browser)
+                browser = None
+            if result["success"]:
+                break
+        return result
+    finally:
+        if browser is not None:
+            await close_browser(browser)
+        active_jobs.pop(job_id, None)
+        shared_state.unregister("job", job_id)
+        if watcher:
+            watcher.cancel()
+        progress.close()
+        send({"type": "finished", "success": result["success"], "error": result.get("error")}, droppable=False)
         
-        try:
-            # Wait for response with timeout
-            answer = await asyncio.wait_for(future, timeout=timeout)
-            return answer
-        except asyncio.TimeoutError:
-            return "No response received (timeout)"
-        finally:
-            self.pending_questions.pop(question_id, None)
+        if "segments" in result:
+            history = [r["history"] for r in result["segments"] if r.get("history") is not None] or None
+        else:
+            history = result.get("history")
+        for stats in (r.get("network") for r in result.get("segments", [result])):
+            if stats:
+                network_report.add(job_id, stats)
+        await _record_run(run_store.afinish, job_id, result["success"], result.get("error"), history)
+
+
+def _network_policy(model: Optional[NetworkPolicyModel]) -> Optional[NetworkPolicy]:
+    """The configured network policy with a request's overrides (None without overrides)."""
+    if model is None:
+        return None
+    try:
+        return NetworkPolicy.from_config().override(**model.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _cancel_on_disconnect(http_request: Request, cancel: asyncio.Event) -> None:
+    """Set `cancel` once the HTTP client waiting for the job disconnects."""
+    while not cancel.is_set():
+        if await http_request.is_disconnected():
+            print("🔌 Client disconnected, cancelling job")
+            cancel.set()
+            return
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
+async def _claim_job(job_id: Optional[str]) -> str:
+    """
+    Reserve a job ID for a request, generating one if the client did not.
     
-    def receive_answer(self, question_id: str, answer: str):
-        """Receive an answer from a human."""
-        if question_id in self.pending_questions:
-            self.pending_questions[question_id].set_result(answer)
+    A client-chosen ID that is running on any worker or already has a recorded
+    run is rejected with 409, so it can neither overwrite that run's history
+    nor take over its cancellation. Callers release the ID from active_jobs
+    when the request ends.
+    """
+    if not job_id:
+        job_id = uuid.uuid4().hex
+    else:
+        taken = await shared_state.lookup("job", job_id) is not None or await run_store.aexists(job_id)
+        # Checked after the lookups, so a concurrent claim on this worker is seen
+        if taken or job_id in active_jobs:
+            raise HTTPException(status_code=409, detail=f"Job ID '{job_id}' is already in use")
+    active_jobs[job_id] = asyncio.Event()
+    return job_id
 
 
-# Global manager instance
-human_input_manager = HumanInputManager()
+async def _record_run(method, *args) -> None:
+    """Write to the run store without letting storage errors fail the job."""
+    try:
+        await method(*args)
+    except Exception as e:
+        print(f"⚠️  Failed to record run: {e}")
 
 
 # ============================================================================
@@ -159,7 +487,16 @@ human_input_manager = HumanInputManager()
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     print("🚀 AutoPattern API server starting...")
+    loop_monitor.start()
+    if config.tracemalloc:
+        memory_tracker.start()
+    await shared_state.start()
+    stored = await shared_state.load_settings()
+    _apply_settings(SettingsModel(**stored) if stored else _settings_from_config())
     yield
+    await speculation_manager.close()
+    await shared_state.close()
+    await loop_monitor.stop()
     print("👋 AutoPattern API server shutting down...")
 
 
@@ -177,8 +514,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id"],
 )
 
+# Profile requests on demand (see PROFILING)
+app.add_middleware(ProfilingMiddleware, store=profile_store)
+
+
+def _openapi() -> dict:
+    """OpenAPI schema, including the request models of endpoints that decode their own JSON."""
+    if app.openapi_schema is None:
+        schemas = FastAPI.openapi(app).setdefault("components", {}).setdefault("schemas", {})
+        for model in (AutomateRequest, DescribeRequest):
+            schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+            schemas.update(schema.pop("$defs", {}))
+            schemas[model.__name__] = schema
+    return app.openapi_schema
+
+
+app.openapi = _openapi
+
 
 # ============================================================================
 # Endpoints
@@ -199,12 +554,19 @@ AVAILABLE_MODELS = [
     "gemini-2.0-flash",
 ]
 
-# Runtime settings (can be modified via API)
-runtime_settings = SettingsModel(
-    llm_model=config.llm_model,
-    headless=config.headless,
-    enable_human_in_loop=config.enable_human_in_loop,
-)
+# Runtime settings (can be modified via API), set from the config on startup
+runtime_settings: Optional[SettingsModel] = None
+
+
+def _settings_from_config() -> SettingsModel:
+    return SettingsModel(
+        llm_provider=config.llm_provider,
+        llm_model=config.llm_model,
+        analysis_model=config.analysis_model,
+        headless=config.headless,
+        enable_human_in_loop=config.enable_human_in_loop,
+        adaptive_routing=config.adaptive_routing,
+    )
 
 
 @app.get("/api/settings", response_model=SettingsResponse)
@@ -218,61 +580,186 @@ async def get_settings():
 
 @app.put("/api/settings", response_model=SettingsResponse)
 async def update_settings(new_settings: SettingsModel):
-    """Update settings."""
+    """Update settings on every server worker."""
+    if new_settings.llm_provider not in PROVIDERS:
+        raise HTTPException(status_code=400, detail=f"Unknown LLM provider: {new_settings.llm_provider}")
+    _apply_settings(new_settings)
+    await shared_state.save_settings(new_settings.model_dump())
+    
+    return SettingsResponse(
+        settings=runtime_settings,
+        available_models=AVAILABLE_MODELS,
+    )
+
+
+def _apply_settings(new_settings: SettingsModel) -> None:
+    """Make settings current in this worker."""
     global runtime_settings
     runtime_settings = new_settings
     
     # Update config object for components that use it
+    config.llm_provider = new_settings.llm_provider
     config.llm_model = new_settings.llm_model
+    config.analysis_model = new_settings.analysis_model
     config.headless = new_settings.headless
     config.enable_human_in_loop = new_settings.enable_human_in_loop
+    config.adaptive_routing = new_settings.adaptive_routing
+
+
+def _cancel_local_job(job_id: str) -> bool:
+    """Cancel a job running in this worker; returns False if it is not running here."""
+    cancel = active_jobs.get(job_id)
+    if cancel is None:
+        return False
+    cancel.set()
+    return True
+
+
+# Settings changes and cancellations made through other workers
+shared_state.on("settings", lambda payload: _apply_settings(SettingsModel(**payload)))
+shared_state.on("cancel", lambda payload: _cancel_local_job(payload["job_id"]))
+
+
+async def _decode_body(http_request: Request, model: type[BaseModel]) -> tuple[BaseModel, list[dict]]:
+    """Decode a request with an event list in one pass (see fast_json)."""
+    return decode_request(model, await http_request.body(), WorkflowEventModel)
+
+
+def _json_body(model: type[BaseModel]) -> dict:
+    """OpenAPI request body of an endpoint that decodes its own JSON; the schema is added by _openapi."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": {"$ref": f"#/components/schemas/{model.__name__}"}}},
+        },
+    }
+
+
+def _build_workflow(workflow_id: str, request_events: list[dict], start_url: str) -> tuple[Workflow, str]:
+    """Convert decoded request events to a Workflow.
     
-    return SettingsResponse(
-        settings=runtime_settings,
-        available_models=AVAILABLE_MODELS,
+    Returns:
+        (workflow, fingerprint of the recorded events without the start URL)
+    """
+    events = [
+        WorkflowEvent(e["event_type"], e["timestamp"], e["url"], e["title"], e["data"])
+        for e in request_events
+    ]
+    
+    workflow = Workflow(workflow_id=workflow_id, events=events)
+    fingerprint = workflow.fingerprint
+    
+    # Override start_url if provided
+    if start_url:
+        # Insert a navigation event at the start
+        workflow.events = [WorkflowEvent(
+            event_type="navigation",
+            timestamp=0,
+            url=start_url,
+            title="",
+            data={},
+        ), *workflow.events]
+    
+    return workflow, fingerprint
+
+
+def _task_llm_client(workflow: Workflow) -> tuple[LLMClient, Optional[list[str]]]:
+    """LLM client for task descriptions, plus the routed model ladder if enabled."""
+    models = None
+    if runtime_settings.adaptive_routing:
+        models = ModelRouter().ladder(WorkflowComplexity.from_workflow(workflow))
+    
+    # Generate task description using LLM with current settings
+    llm_client = LLMClient(
+        model=models[0] if models else runtime_settings.llm_model,
+        analysis_model=runtime_settings.analysis_model,
+        provider=runtime_settings.llm_provider,
+    )
+    return llm_client, models
+
+
+def _speculation_key(speculation_id: str, headless: bool) -> str:
+    return speculation_key(
+        speculation_id, headless,
+        runtime_settings.llm_provider, runtime_settings.llm_model, runtime_settings.adaptive_routing,
+    )
+
+
+def _start_speculation(events: list[dict], start_url: str) -> str:
+    """Begin task generation (and optionally a browser launch) for a described workflow.
+    
+    Returns:
+        The speculation_id an automate request adopts the work with
+    """
+    workflow, fingerprint = _build_workflow("speculative", events, start_url)
+    speculation_id = speculation_key(fingerprint, start_url)
+    llm_client, _ = _task_llm_client(workflow)
+    
+    launch_browser = None
+    if config.speculation == "full":
+        launch_browser = AutomationRunner(headless=runtime_settings.headless).launch_browser
+    
+    speculation_manager.start(
+        _speculation_key(speculation_id, runtime_settings.headless),
+        generate_task=lambda: asyncio.to_thread(
+            rate_limiter.with_priority("batch", llm_client.generate_task_description), workflow
+        ),
+        launch_browser=launch_browser,
     )
+    return speculation_id
+
+
+def _describe_with_routing(events: list[dict], start_url: str) -> dict:
+    """Describe with the cheapest suitable model, escalating on failure."""
+    models = ModelRouter().ladder(WorkflowComplexity.from_events(events))
+    for model in models:
+        llm_client = LLMClient(model=model, analysis_model=model, provider=runtime_settings.llm_provider)
+        try:
+            return llm_client.generate_workflow_steps(events, start_url, fallback=False)
+        except Exception:
+            print(f"↗️  Describe failed with {model}, escalating")
+    return fallback_steps(events)
 
 
-@app.post("/api/describe", response_model=DescribeResponse)
-async def describe_workflow(request: DescribeRequest):
+@app.post("/api/describe", response_model=DescribeResponse, openapi_extra=_json_body(DescribeRequest))
+async def describe_workflow(http_request: Request):
     """
     Analyze workflow events and generate a structured description.
     
-    Uses gemini-pro for high reasoning capability to convert raw events
+    Uses the analysis model for high reasoning capability to convert raw events
     into a human-readable step-by-step plan that can be edited before execution.
     """
+    request, events = await _decode_body(http_request, DescribeRequest)
     try:
-        # Convert events to dict format
-        events = [
-            {
-                "event_type": e.event,
-                "timestamp": e.timestamp,
-                "url": e.url,
-                "title": e.title,
-                "data": e.data,
-            }
-            for e in request.events
-        ]
+        # Generate structured workflow steps using current settings; LLM calls
+        # block (retries, deadline), so they run off the event loop
+        if runtime_settings.adaptive_routing:
+            result = await asyncio.to_thread(_describe_with_routing, events, request.start_url)
+        else:
+            llm_client = LLMClient(
+                model=runtime_settings.llm_model,
+                analysis_model=runtime_settings.analysis_model,
+                provider=runtime_settings.llm_provider,
+            )
+            result = await asyncio.to_thread(llm_client.generate_workflow_steps, events, request.start_url)
         
-        # Generate structured workflow steps using current settings
-        llm_client = LLMClient(
-            model=runtime_settings.llm_model,
-            analysis_model=runtime_settings.analysis_model
-        )
-        result = llm_client.generate_workflow_steps(events, request.start_url)
+        speculation_id = None
+        if config.speculation != "off" and events:
+            speculation_id = _start_speculation(events, request.start_url)
         
         return DescribeResponse(
             title=result.get("title", "Workflow"),
             description=result.get("description", ""),
-            steps=result.get("steps", [])
+            steps=result.get("steps", []),
+            speculation_id=speculation_id,
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/automate", response_model=AutomateResponse)
-async def automate_workflow(request: AutomateRequest, background_tasks: BackgroundTasks):
+@app.post("/api/automate", response_model=AutomateResponse, openapi_extra=_json_body(AutomateRequest))
+async def automate_workflow(http_request: Request):
     """
     Automate a workflow from recorded events.
     
@@ -280,70 +767,102 @@ async def automate_workflow(request: AutomateRequest, background_tasks: Backgrou
     Otherwise, converts workflow events to a task description using LLM,
     then executes the automation using browser-use.
     """
+    request, events = await _decode_body(http_request, AutomateRequest)
+    network_policy = _network_policy(request.network_policy)
+    job_id = await _claim_job(request.job_id)
+    use_headless = request.headless if request.headless else runtime_settings.headless
     try:
+        segment_tasks: list[str] = []
+        models = None
+        speculative_task = browser = None
+        
+        workflow, fingerprint = _build_workflow(request.workflow_id, events, request.start_url)
+        speculation_id = request.speculation_id
+        if not events:
+            fingerprint = None
+        elif speculation_id is None:
+            speculation_id = speculation_key(fingerprint, request.start_url)
+        if speculation_id and not request.parallel_segments:
+            # Adopt work started speculatively when this workflow was described;
+            # a given task description makes the speculative one unnecessary
+            speculative_task, browser = await speculation_manager.adopt(
+                _speculation_key(speculation_id, use_headless), task=not request.task_description,
+            )
+            # A speculative browser was started with the default storage profile
+            if browser is not None and request.storage_profile not in (None, config.storage_profile):
+                await close_browser(browser)
+                browser = None
+        
         # If task_description is provided, use it directly (Human-in-the-Middle flow)
         if request.task_description:
             task_description = request.task_description
+            if runtime_settings.adaptive_routing:
+                models = ModelRouter().ladder(WorkflowComplexity.from_task(task_description))
         else:
-            # Convert request events to Workflow object
-            events = [
-                WorkflowEvent(
-                    event_type=e.event,
-                    timestamp=e.timestamp,
-                    url=e.url,
-                    title=e.title,
-                    data=e.data,
-                )
-                for e in request.events
-            ]
-            
-            workflow = Workflow(workflow_id=request.workflow_id, events=events)
+            llm_client, models = _task_llm_client(workflow)
             
-            # Override start_url if provided
-            if request.start_url:
-                # Insert a navigation event at the start
-                events.insert(0, WorkflowEvent(
-                    event_type="navigation",
-                    timestamp=0,
-                    url=request.start_url,
-                    title="",
-                    data={},
-                ))
-            
-            # Generate task description using LLM with current settings
-            llm_client = LLMClient(
-                model=runtime_settings.llm_model,
-                analysis_model=runtime_settings.analysis_model
-            )
-            task_description = llm_client.generate_task_description(workflow)
+            segments = split_independent_segments(workflow) if request.parallel_segments else [workflow]
+            if len(segments) > 1:
+                segment_tasks = list(await asyncio.gather(*(
+                    asyncio.to_thread(llm_client.generate_task_description, segment)
+                    for segment in segments
+                )))
+                task_description = "\n".join(f"[{i}] {task}" for i, task in enumerate(segment_tasks, 1))
+            elif speculative_task:
+                task_description = speculative_task
+            else:
+                task_description = await asyncio.to_thread(llm_client.generate_task_description, workflow)
         
         # Run automation with current settings
+        use_human_loop = request.enable_human_in_loop or runtime_settings.enable_human_in_loop
         runner = AutomationRunner(
-            headless=request.headless if request.headless else runtime_settings.headless,
-            enable_human_in_loop=request.enable_human_in_loop if request.enable_human_in_loop else runtime_settings.enable_human_in_loop,
-            human_input_callback=human_input_manager.ask_human if (request.enable_human_in_loop or runtime_settings.enable_human_in_loop) else None,
+            headless=use_headless,
+            enable_human_in_loop=use_human_loop,
+            human_input_callback=partial(human_input_manager.ask_human, job_id=job_id) if use_human_loop else None,
+            max_steps=request.max_steps,
+            timeout=request.timeout,
+            storage_profile=request.storage_profile,
+            network_policy=network_policy,
         )
         
-        result = await runner.run_task(task_description)
+        # _run_job closes the adopted browser from here on
+        adopted_browser, browser = browser, None
+        result = await _run_job(
+            job_id, runner, task_description, segment_tasks, fingerprint, models, adopted_browser, http_request,
+        )
         
         return AutomateResponse(
             success=result["success"],
+            job_id=job_id,
             task_description=task_description,
             message="Automation completed" if result["success"] else "Automation failed",
             error=result.get("error"),
+            network=result.get("network"),
         )
         
     except Exception as e:
+        # A speculative browser adopted before the failure would otherwise leak
+        if browser is not None:
+            await close_browser(browser)
+        if isinstance(e, HTTPException):
+            raise
+        if isinstance(e, TaskGenerationError):
+            # The LLM provider is failing; the request can be retried later
+            raise HTTPException(status_code=503, detail=str(e))
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        active_jobs.pop(job_id, None)
 
 
 @app.post("/api/automate/task", response_model=AutomateResponse)
-async def automate_task(request: TaskRequest):
+async def automate_task(request: TaskRequest, http_request: Request):
     """
     Run automation directly from a task description.
     
     Skips the LLM task generation step and executes the provided task directly.
     """
+    network_policy = _network_policy(request.network_policy)
+    job_id = await _claim_job(request.job_id)
     try:
         # Use request settings with fallback to runtime settings
         use_headless = request.headless if request.headless else runtime_settings.headless
@@ -352,20 +871,202 @@ async def automate_task(request: TaskRequest):
         runner = AutomationRunner(
             headless=use_headless,
             enable_human_in_loop=use_human_loop,
-            human_input_callback=human_input_manager.ask_human if use_human_loop else None,
+            human_input_callback=partial(human_input_manager.ask_human, job_id=job_id) if use_human_loop else None,
+            max_steps=request.max_steps,
+            timeout=request.timeout,
+            storage_profile=request.storage_profile,
+            network_policy=network_policy,
         )
         
-        result = await runner.run_task(request.task)
+        models = None
+        if runtime_settings.adaptive_routing:
+            models = ModelRouter().ladder(WorkflowComplexity.from_task(request.task))
+        
+        result = await _run_job(job_id, runner, request.task, models=models, http_request=http_request)
         
         return AutomateResponse(
             success=result["success"],
+            job_id=job_id,
             task_description=request.task,
             message="Automation completed" if result["success"] else "Automation failed",
             error=result.get("error"),
+            network=result.get("network"),
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        active_jobs.pop(job_id, None)
+
+
+@app.post("/api/jobs/{job_id}/cancel", response_model=CancelResponse)
+async def cancel_job(job_id: str):
+    """
+    Cancel a running automation job.
+    
+    The agent stops after its current step and its browser is closed; the
+    automate request returns with success false.
+    """
+    if not _cancel_local_job(job_id):
+        if await shared_state.lookup("job", job_id) is None:
+            raise HTTPException(status_code=404, detail=f"No running job '{job_id}'")
+        shared_state.broadcast("cancel", {"job_id": job_id})
+    return CancelResponse(job_id=job_id)
+
+
+@app.get("/api/storage-profiles", response_model=StorageProfileListResponse)
+async def list_storage_profiles():
+    """Saved browser storage-state profiles."""
+    profiles = await asyncio.to_thread(StorageProfileStore().list)
+    return StorageProfileListResponse(profiles=[StorageProfileModel(**p) for p in profiles])
+
+
+@app.delete("/api/storage-profiles/{name}", response_model=StorageProfileDeleteResponse)
+async def delete_storage_profile(name: str):
+    """Delete a storage profile, so the next run using it logs in again."""
+    try:
+        deleted = StorageProfileStore().delete(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Storage profile '{name}' not found")
+    return StorageProfileDeleteResponse(name=name)
+
+
+@app.get("/api/network/stats", response_model=NetworkStatsResponse)
+async def network_stats():
+    """Requests blocked by network policies and estimated bytes saved, in total and per recent run."""
+    return NetworkStatsResponse(**network_report.snapshot())
+
+
+@app.get("/api/runs", response_model=RunListResponse)
+async def list_runs(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+):
+    """
+    List recorded automation runs, newest first.
+    
+    Filter by status ("running", "success", "failed") or workflow fingerprint,
+    and pass `next_cursor` from a previous page as `cursor` to continue.
+    """
+    try:
+        runs, next_cursor = await run_store.alist_runs(
+            limit=max(1, min(limit, 500)), cursor=cursor, status=status, fingerprint=fingerprint,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RunListResponse(
+        runs=[RunSummaryModel(**run.to_dict()) for run in runs],
+        next_cursor=next_cursor,
+    )
+
+
+@app.get("/api/runs/{run_id}", response_model=RunDetailResponse)
+async def get_run(run_id: str):
+    """Get a recorded run with its decoded agent history."""
+    found = await run_store.aget(run_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found")
+    run, history = found
+    return RunDetailResponse(run=RunSummaryModel(**run.to_dict()), history=history)
+
+
+@app.get("/api/llm/stats", response_model=LLMStatsResponse)
+async def llm_stats():
+    """Retry, hedging, timeout, circuit breaker, rate limiter and cache counters for LLM calls."""
+    cache = extraction_cache.stats()
+    semantic = semantic_cache.stats()
+    return LLMStatsResponse(
+        models={name: LLMCallStats(**snapshot) for name, snapshot in resilience.stats().items()},
+        rate_limits={name: RateLimitStats(**snapshot) for name, snapshot in rate_limiter.stats().items()},
+        extraction_cache=ExtractionCacheStats(**cache) if cache else None,
+        semantic_cache=SemanticCacheStats(**semantic) if semantic else None,
+    )
+
+
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+
+def _require_admin(request: Request) -> None:
+    """
+    Allow /api/admin/* only with the ADMIN_TOKEN bearer token, or from
+    localhost if no token is configured (CORS lets any page call the API).
+    """
+    if config.admin_token:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), config.admin_token.encode()):
+            return
+        raise HTTPException(status_code=401, detail="Admin token required")
+    if request.client is None or request.client.host not in LOOPBACK_HOSTS:
+        raise HTTPException(status_code=403, detail="Admin endpoints are only available from localhost")
+
+
+@app.get("/api/admin/profiles", dependencies=[Depends(_require_admin)], response_model=ProfileListResponse)
+async def list_profiles():
+    """List recent request profiles of this worker."""
+    return ProfileListResponse(profiles=[ProfileSummaryModel(**p.summary()) for p in profile_store.list()])
+
+
+@app.get("/api/admin/profiles/{profile_id}", dependencies=[Depends(_require_admin)], response_class=PlainTextResponse)
+async def get_profile(profile_id: str, sort: str = "cumulative", limit: int = 40):
+    """A request profile as a pstats report of the top `limit` functions."""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_KEYS)}")
+    return profile.render(sort, max(1, min(limit, 500)))
+
+
+@app.get("/api/admin/profiles/{profile_id}/raw", dependencies=[Depends(_require_admin)])
+async def download_profile(profile_id: str):
+    """A request profile as a .prof file, for snakeviz or pstats."""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return Response(
+        content=profile.dump(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'},
+    )
+
+
+@app.get("/api/admin/stalls", dependencies=[Depends(_require_admin)], response_model=StallListResponse)
+async def list_stalls():
+    """Event-loop stalls of this worker, with the stack of the blocking code."""
+    return StallListResponse(**loop_monitor.snapshot())
+
+
+@app.get("/api/admin/memory", dependencies=[Depends(_require_admin)], response_model=MemoryResponse)
+async def memory_snapshot(top: int = 20, group_by: str = "lineno"):
+    """
+    RSS and, while tracing, the largest allocation sites and their growth since
+    the previous call.
+    """
+    if group_by not in GROUP_KEYS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of: {', '.join(GROUP_KEYS)}")
+    # Taking a snapshot walks every traced allocation; keep it off the event loop
+    report = await asyncio.to_thread(memory_tracker.snapshot, max(1, min(top, 200)), group_by)
+    return MemoryResponse(**report)
+
+
+@app.post("/api/admin/memory/start", dependencies=[Depends(_require_admin)], response_model=MemoryResponse)
+async def start_memory_tracing(frames: int = 10):
+    """Start tracing allocations, keeping `frames` frames per allocation."""
+    memory_tracker.start(max(1, min(frames, 50)))
+    return MemoryResponse(**await asyncio.to_thread(memory_tracker.snapshot, 0))
+
+
+@app.post("/api/admin/memory/stop", dependencies=[Depends(_require_admin)], response_model=MemoryResponse)
+async def stop_memory_tracing():
+    """Stop tracing allocations."""
+    memory_tracker.stop()
+    return MemoryResponse(**await asyncio.to_thread(memory_tracker.snapshot))
 
 
 @app.websocket("/ws/automation")
@@ -374,19 +1075,33 @@ async def websocket_endpoint(websocket: WebSocket):
     WebSocket endpoint for human-in-the-loop interactions.
     
     Connects clients to receive questions from the automation agent
-    and send back human responses.
+    and send back human responses. Clients follow specific jobs with
+    `?job_id=<id>` (repeatable) or {"type": "subscribe", "job_id": <id>}
+    messages; clients without subscriptions receive questions for all jobs.
+    {"type": "cancel", "job_id": <id>} cancels a running job.
     """
-    await human_input_manager.connect(websocket)
+    job_ids = set(websocket.query_params.getlist("job_id"))
+    await human_input_manager.connect(websocket, job_ids)
     try:
         while True:
             data = await websocket.receive_json()
+            message_type = data.get("type")
             
-            if data.get("type") == "answer":
+            if message_type == "answer":
                 question_id = data.get("id")
                 answer = data.get("answer", "")
                 human_input_manager.receive_answer(question_id, answer)
+            elif message_type == "subscribe" and data.get("job_id"):
+                human_input_manager.subscribe(websocket, str(data["job_id"]))
+            elif message_type == "unsubscribe" and data.get("job_id"):
+                human_input_manager.unsubscribe(websocket, str(data["job_id"]))
+            elif message_type == "cancel" and data.get("job_id"):
+                if not _cancel_local_job(str(data["job_id"])):
+                    shared_state.broadcast("cancel", {"job_id": str(data["job_id"])})
                 
     except WebSocketDisconnect:
+        pass
+    finally:
         human_input_manager.disconnect(websocket)
 
 
@@ -394,7 +1109,22 @@ async def websocket_endpoint(websocket: WebSocket):
 # Server Runner
 # ============================================================================
 
-def run_server(host: str = "0.0.0.0", port: int = 5001):
-    """Run the FastAPI server."""
+def run_server(host: str = "0.0.0.0", port: int = 5001, workers: Optional[int] = None):
+    """
+    Run the FastAPI server.
+    
+    With more than one worker process, settings and human-in-the-loop state are
+    shared through the SQLite backend unless SHARED_STATE names another one.
+    """
     import uvicorn
-    uvicorn.run(app, host=host, port=port)
+    
+    workers = workers or config.workers
+    if workers <= 1:
+        uvicorn.run(app, host=host, port=port)
+        return
+    
+    if config.shared_state == "local":
+        # Worker processes import the app fresh and read this from the environment
+        os.environ["SHARED_STATE"] = "sqlite"
+    print(f"👥 Starting {workers} workers (shared state: {os.environ.get('SHARED_STATE', config.shared_state)})")
+    uvicorn.run("automation.server:app", host=host, port=port, workers=workers)
@@ -0,0 +1,313 @@
+"""
+Shared State module.
+State that must stay consistent across the server's worker processes: runtime
+settings, human-in-the-loop questions and answers, job messages and
+cancellation.
+
+The default backend keeps everything in-process (a single worker). The SQLite
+backend shares it through a database file under DATA_DIR: workers append to a
+message log and poll it for entries written by the others, and keep a registry
+of open questions and running jobs. Each worker's registry entries only count
+while it keeps its heartbeat up, so a crashed worker's jobs and questions are
+released within WORKER_TIMEOUT_SECONDS.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+from .config import config
+
+
+BACKENDS = ("local", "sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_created ON messages (created_at);
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    origin TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+# Messages older than this are deleted; every worker has read them by then
+MESSAGE_TTL_SECONDS = 60.0
+# A worker missing its heartbeat this long is dead; its registry entries are
+# ignored and then deleted
+HEARTBEAT_INTERVAL_SECONDS = 5.0
+WORKER_TIMEOUT_SECONDS = 30.0
+PRUNE_INTERVAL_SECONDS = 30.0
+
+
+class SharedState:
+    """
+    In-process backend, for a single worker.
+    
+    Handlers registered with `on` receive messages broadcast by other workers,
+    so with one worker they are never called. Registry lookups likewise only
+    see entries registered by other workers.
+    """
+    
+    def __init__(self):
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._handlers: dict[str, list[Callable[[dict], None]]] = {}
+        self._settings: Optional[dict] = None
+    
+    def on(self, channel: str, handler: Callable[[dict], None]) -> None:
+        """Call `handler(payload)` for each message other workers broadcast on `channel`."""
+        self._handlers.setdefault(channel, []).append(handler)
+    
+    def _dispatch(self, channel: str, payload: dict) -> None:
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(payload)
+            except Exception as e:
+                print(f"⚠️  Shared state handler for '{channel}' failed: {e}")
+    
+    async def start(self) -> None:
+        pass
+    
+    async def close(self) -> None:
+        pass
+    
+    def broadcast(self, channel: str, payload: dict) -> None:
+        """Send a message to the other workers (without waiting)."""
+    
+    async def load_settings(self) -> Optional[dict]:
+        """The last saved runtime settings, or None if none were saved."""
+        return self._settings
+    
+    async def save_settings(self, settings: dict) -> None:
+        """Save runtime settings and notify the other workers on the "settings" channel."""
+        self._settings = settings
+        self.broadcast("settings", settings)
+    
+    def register(self, kind: str, key: str, value: Optional[dict] = None) -> None:
+        """Make an entry (e.g. an open question or a running job) visible to other workers."""
+    
+    def unregister(self, kind: str, key: str) -> None:
+        """Remove an entry registered by this worker."""
+    
+    async def lookup(self, kind: str, key: str) -> Optional[dict]:
+        """An entry registered by another worker, or None."""
+        return None
+    
+    async def entries(self, kind: str) -> list[dict]:
+        """All entries of a kind registered by other workers."""
+        return []
+
+
+class SQLiteSharedState(SharedState):
+    """Backend shared by all workers on a host through a SQLite database."""
+    
+    def __init__(self, path: Optional[Path | str] = None, poll_interval: Optional[float] = None):
+        super().__init__()
+        self.path = Path(path) if path else config.data_dir / "shared.sqlite3"
+        self.poll_interval = poll_interval or config.shared_state_poll
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-state")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._last_seq = 0
+        self._poller: Optional[asyncio.Task] = None
+        self._closed = False
+    
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+    
+    def _execute(self, sql: str, params: tuple = ()) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(sql, params)
+            conn.commit()
+    
+    def _query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+    
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+    
+    def _submit(self, sql: str, params: tuple) -> None:
+        # Writes are queued on the store's thread in call order. After close
+        # (e.g. a job finishing during shutdown) they are dropped; close has
+        # already removed this worker's entries
+        if self._closed:
+            return
+        self._executor.submit(self._execute, sql, params).add_done_callback(_log_failure)
+    
+    # ------------------------------------------------------------------
+    # Polling
+    # ------------------------------------------------------------------
+    
+    async def start(self) -> None:
+        await self._run(self._heartbeat)
+        rows = await self._run(self._query, "SELECT COALESCE(MAX(seq), 0) FROM messages")
+        self._last_seq = rows[0][0]
+        self._poller = asyncio.create_task(self._poll_loop())
+    
+    async def close(self) -> None:
+        """Stop polling and remove this worker and its registry entries."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._poller:
+            self._poller.cancel()
+            self._poller = None
+        # Queued writes run first, so nothing this worker registered survives it
+        try:
+            await self._run(self._leave)
+        except Exception as e:
+            print(f"⚠️  Shared state cleanup failed: {e}")
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    async def _poll_loop(self) -> None:
+        last_prune = last_heartbeat = time.monotonic()
+        while True:
+            try:
+                for channel, payload in await self._run(self._fetch):
+                    self._dispatch(channel, payload)
+                if time.monotonic() - last_heartbeat > HEARTBEAT_INTERVAL_SECONDS:
+                    last_heartbeat = time.monotonic()
+                    await self._run(self._heartbeat)
+                if time.monotonic() - last_prune > PRUNE_INTERVAL_SECONDS:
+                    last_prune = time.monotonic()
+                    await self._run(self._prune)
+            except Exception as e:
+                print(f"⚠️  Shared state poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+    
+    def _heartbeat(self) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO workers (worker_id, pid, heartbeat_at) VALUES (?, ?, ?)",
+            (self.worker_id, os.getpid(), time.time()),
+        )
+    
+    def _leave(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM entries WHERE origin = ?", (self.worker_id,))
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+            conn.commit()
+    
+    def _fetch(self) -> list[tuple[str, dict]]:
+        rows = self._query(
+            "SELECT seq, origin, channel, payload FROM messages WHERE seq > ? ORDER BY seq",
+            (self._last_seq,),
+        )
+        if rows:
+            self._last_seq = rows[-1][0]
+        return [(channel, json.loads(payload)) for _, origin, channel, payload in rows if origin != self.worker_id]
+    
+    def _prune(self) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM messages WHERE created_at < ?", (now - MESSAGE_TTL_SECONDS,))
+            conn.execute("DELETE FROM workers WHERE heartbeat_at < ?", (now - WORKER_TIMEOUT_SECONDS,))
+            conn.execute("DELETE FROM entries WHERE origin NOT IN (SELECT worker_id FROM workers)")
+            conn.commit()
+    
+    # ------------------------------------------------------------------
+    # Messages, settings and registry
+    # ------------------------------------------------------------------
+    
+    def broadcast(self, channel: str, payload: dict) -> None:
+        self._submit(
+            "INSERT INTO messages (origin, channel, payload, created_at) VALUES (?, ?, ?, ?)",
+            (self.worker_id, channel, json.dumps(payload, separators=(",", ":")), time.time()),
+        )
+    
+    async def load_settings(self) -> Optional[dict]:
+        rows = await self._run(self._query, "SELECT value FROM settings WHERE key = 'runtime'")
+        return json.loads(rows[0][0]) if rows else None
+    
+    async def save_settings(self, settings: dict) -> None:
+        await self._run(
+            self._execute,
+            "INSERT OR REPLACE INTO settings (key, value, updated_at) VALUES ('runtime', ?, ?)",
+            (json.dumps(settings), time.time()),
+        )
+        self.broadcast("settings", settings)
+    
+    def register(self, kind: str, key: str, value: Optional[dict] = None) -> None:
+        self._submit(
+            "INSERT OR REPLACE INTO entries (kind, key, origin, value, created_at) VALUES (?, ?, ?, ?, ?)",
+            (kind, key, self.worker_id, json.dumps(value or {}), time.time()),
+        )
+    
+    def unregister(self, kind: str, key: str) -> None:
+        self._submit("DELETE FROM entries WHERE kind = ? AND key = ? AND origin = ?", (kind, key, self.worker_id))
+    
+    async def lookup(self, kind: str, key: str) -> Optional[dict]:
+        rows = await self._run(
+            self._query,
+            f"SELECT value FROM entries WHERE kind = ? AND key = ? AND origin != ? AND {_LIVE_ORIGIN}",
+            (kind, key, self.worker_id, time.time() - WORKER_TIMEOUT_SECONDS),
+        )
+        return json.loads(rows[0][0]) if rows else None
+    
+    async def entries(self, kind: str) -> list[dict]:
+        rows = await self._run(
+            self._query,
+            f"SELECT value FROM entries WHERE kind = ? AND origin != ? AND {_LIVE_ORIGIN} ORDER BY created_at",
+            (kind, self.worker_id, time.time() - WORKER_TIMEOUT_SECONDS),
+        )
+        return [json.loads(value) for (value,) in rows]
+
+
+# Condition on `entries` rows: the registering worker's heartbeat is newer than ?
+_LIVE_ORIGIN = "origin IN (SELECT worker_id FROM workers WHERE heartbeat_at > ?)"
+
+
+def _log_failure(future) -> None:
+    if future.exception() is not None:
+        print(f"⚠️  Shared state write failed: {future.exception()}")
+
+
+def create_shared_state(backend: Optional[str] = None) -> SharedState:
+    """Create the shared state backend named by `backend` (default: SHARED_STATE)."""
+    backend = (backend or config.shared_state).lower()
+    if backend == "local":
+        return SharedState()
+    if backend == "sqlite":
+        return SQLiteSharedState()
+    raise ValueError(f"Unknown shared state backend '{backend}'. Expected one of: {', '.join(BACKENDS)}")
@@ -0,0 +1,140 @@
+"""
+Speculation module.
+Starts work an automate call is likely to need (task description generation,
+browser launch) right after a describe, while the user reviews the plan.
+
+Results are keyed by the workflow and the settings they were produced with. An
+automate call for the same workflow (or with the speculation_id returned by the
+describe call) and settings adopts them; anything else expires after a TTL.
+"""
+
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from .config import config
+
+
+@dataclass
+class Speculation:
+    """Background work started for one workflow."""
+    
+    key: str
+    created_at: float = field(default_factory=time.monotonic)
+    task: Optional[asyncio.Task] = None  # Resolves to the task description
+    browser_task: Optional[asyncio.Task] = None  # Resolves to a started browser
+    expiry: Optional[asyncio.TimerHandle] = None
+
+
+def speculation_key(fingerprint: str, *settings) -> str:
+    """Key for a workflow fingerprint plus every setting that affects the result."""
+    return hashlib.sha256("|".join([fingerprint, *map(str, settings)]).encode("utf-8")).hexdigest()[:24]
+
+
+class SpeculationManager:
+    """Holds speculative results until they are adopted or expire."""
+    
+    def __init__(self, ttl: Optional[float] = None, max_entries: int = 8):
+        self.ttl = ttl or config.speculation_ttl
+        self.max_entries = max_entries
+        self.entries: dict[str, Speculation] = {}
+        self.stats = {"started": 0, "adopted": 0, "expired": 0, "evicted": 0}
+    
+    def start(
+        self,
+        key: str,
+        generate_task: Optional[Callable[[], Awaitable[str]]] = None,
+        launch_browser: Optional[Callable[[], Awaitable[object]]] = None,
+    ) -> None:
+        """Start speculative work for `key` unless it is already running."""
+        if key in self.entries:
+            return
+        while len(self.entries) >= self.max_entries:
+            oldest = min(self.entries.values(), key=lambda s: s.created_at)
+            self.stats["evicted"] += 1
+            self._discard(oldest.key)
+        
+        speculation = Speculation(key=key)
+        if generate_task:
+            speculation.task = asyncio.create_task(generate_task())
+        if launch_browser:
+            speculation.browser_task = asyncio.create_task(launch_browser())
+        speculation.expiry = asyncio.get_running_loop().call_later(self.ttl, self._expire, key)
+        self.entries[key] = speculation
+        self.stats["started"] += 1
+    
+    async def adopt(self, key: str, task: bool = True) -> tuple[Optional[str], Optional[object]]:
+        """
+        Take over the speculative results for `key`.
+        
+        Waits for work still in flight. Failed work is ignored so the caller
+        falls back to doing it itself. With `task=False` only the browser is
+        taken and task generation is cancelled.
+        
+        Returns:
+            (task description or None, started browser or None)
+        """
+        speculation = self.entries.pop(key, None)
+        if speculation is None:
+            return None, None
+        if speculation.expiry:
+            speculation.expiry.cancel()
+        self.stats["adopted"] += 1
+        
+        task_description = browser = None
+        if speculation.task and not task:
+            speculation.task.cancel()
+        elif speculation.task:
+            try:
+                task_description = await speculation.task
+            except Exception as e:
+                print(f"⚠️  Speculative task generation failed: {e}")
+        if speculation.browser_task:
+            try:
+                browser = await speculation.browser_task
+            except Exception as e:
+                print(f"⚠️  Speculative browser launch failed: {e}")
+        return task_description, browser
+    
+    def _expire(self, key: str) -> None:
+        if key in self.entries:
+            self.stats["expired"] += 1
+            self._discard(key)
+    
+    def _discard(self, key: str) -> None:
+        speculation = self.entries.pop(key, None)
+        if speculation is None:
+            return
+        if speculation.expiry:
+            speculation.expiry.cancel()
+        if speculation.task:
+            speculation.task.cancel()
+        if speculation.browser_task:
+            asyncio.create_task(_close_browser(speculation.browser_task))
+    
+    async def close(self) -> None:
+        """Discard all speculative work (e.g. on shutdown)."""
+        speculations = list(self.entries.values())
+        self.entries.clear()
+        for speculation in speculations:
+            if speculation.expiry:
+                speculation.expiry.cancel()
+            if speculation.task:
+                speculation.task.cancel()
+        await asyncio.gather(*(
+            _close_browser(s.browser_task) for s in speculations if s.browser_task
+        ))
+
+
+async def _close_browser(browser_task: asyncio.Task) -> None:
+    """Kill a speculatively launched browser once its launch has settled."""
+    try:
+        browser = await browser_task
+    except BaseException:
+        return
+    try:
+        await browser.kill()
+    except Exception as e:
+        print(f"⚠️  Failed to close speculative browser: {e}")
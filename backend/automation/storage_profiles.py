@@ -0,0 +1,201 @@
+"""
+Storage Profiles module.
+Named browser storage-state profiles (cookies and localStorage) kept under
+DATA_DIR/storage_profiles. A run can start from a saved session, so repeat runs
+against the same site skip their login steps.
+
+Profiles are JSON files in the storage_state format used by browser-use
+(Playwright's format), readable by the owner only. They are replaced
+atomically, so loading needs no lock.
+Saving merges the new state into the file under a lock file, so concurrent runs
+and server workers using the same profile do not lose each other's cookies.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+from .config import config
+
+
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+# Cookie fields kept in profiles (the storage_state format written by Playwright)
+COOKIE_FIELDS = ("name", "value", "domain", "path", "expires", "httpOnly", "secure", "sameSite")
+
+# Seconds to wait for another run to finish saving the same profile
+LOCK_WAIT_SECONDS = 10.0
+# Lock files older than this were left behind by a crashed process
+STALE_LOCK_SECONDS = 60.0
+
+
+class ProfileLockTimeout(Exception):
+    """Raised when a profile stays locked by another run for too long."""
+
+
+class StorageProfileStore:
+    """Load and save named storage-state profiles."""
+    
+    def __init__(self, root: Optional[Path | str] = None, ttl: Optional[float] = None):
+        self.root = Path(root) if root else config.data_dir / "storage_profiles"
+        # Profiles not saved for this many seconds are expired (0 = never)
+        self.ttl = config.storage_profile_ttl if ttl is None else ttl
+    
+    def path(self, name: str) -> Path:
+        if not NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid storage profile name '{name}': use letters, digits, '.', '_' and '-'")
+        return self.root / f"{name}.json"
+    
+    def load(self, name: str) -> Optional[dict]:
+        """
+        The saved state of a profile, or None if it does not exist or expired.
+        
+        Expired cookies are dropped. An expired profile is deleted, so the next
+        run logs in again and saves a fresh one.
+        """
+        path = self.path(name)
+        try:
+            age = time.time() - path.stat().st_mtime
+            state = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable storage profile '{name}': {e}")
+            return None
+        
+        if self.ttl and age > self.ttl:
+            print(f"⌛ Storage profile '{name}' expired ({age / 86400:.1f} days old)")
+            self.delete(name)
+            return None
+        
+        now = time.time()
+        state["cookies"] = [c for c in state.get("cookies", []) if not _cookie_expired(c, now)]
+        state.setdefault("origins", [])
+        return state
+    
+    async def save(self, name: str, state: dict) -> None:
+        """Merge `state` into the saved profile (new values win)."""
+        path = self.path(name)
+        async with self._locked(path):
+            await asyncio.to_thread(self._merge_and_write, path, state)
+    
+    def _merge_and_write(self, path: Path, state: dict) -> None:
+        try:
+            existing = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            existing = {}
+        merged = merge_states(existing, state)
+        now = time.time()
+        merged["cookies"] = [c for c in merged["cookies"] if not _cookie_expired(c, now)]
+        
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        # Session cookies: readable by the owner only, from the moment the file exists
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps(merged, ensure_ascii=False))
+        os.replace(tmp, path)
+    
+    def delete(self, name: str) -> bool:
+        try:
+            self.path(name).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def list(self) -> list[dict]:
+        """Name, age and size of every saved profile."""
+        profiles = []
+        for path in sorted(self.root.glob("*.json")):
+            try:
+                stat = path.stat()
+                state = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            age = time.time() - stat.st_mtime
+            profiles.append({
+                "name": path.stem,
+                "updated_at": stat.st_mtime,
+                "cookies": len(state.get("cookies", [])),
+                "origins": len(state.get("origins", [])),
+                "expired": bool(self.ttl and age > self.ttl),
+            })
+        return profiles
+    
+    def _locked(self, path: Path) -> "_ProfileLock":
+        return _ProfileLock(path.with_suffix(".lock"))
+
+
+class _ProfileLock:
+    """Cross-process lock held by creating a lock file exclusively."""
+    
+    def __init__(self, path: Path):
+        self.path = path
+    
+    async def __aenter__(self) -> None:
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return
+            except FileExistsError:
+                if self._stale():
+                    self.path.unlink(missing_ok=True)
+                    continue
+                if time.monotonic() > deadline:
+                    raise ProfileLockTimeout(f"Storage profile is locked: {self.path}")
+                await asyncio.sleep(0.05)
+    
+    async def __aexit__(self, *exc) -> None:
+        self.path.unlink(missing_ok=True)
+    
+    def _stale(self) -> bool:
+        try:
+            return time.time() - self.path.stat().st_mtime > STALE_LOCK_SECONDS
+        except FileNotFoundError:
+            return False
+
+
+def merge_states(existing: dict, new: dict) -> dict:
+    """Merge two storage states: cookies by (name, domain, path), localStorage by origin and key."""
+    cookies = {(c.get("name"), c.get("domain"), c.get("path")): c for c in existing.get("cookies", [])}
+    cookies.update({(c.get("name"), c.get("domain"), c.get("path")): c for c in new.get("cookies", [])})
+    
+    origins = {o.get("origin"): o for o in existing.get("origins", []) if o.get("origin")}
+    for origin in new.get("origins", []):
+        key = origin.get("origin")
+        if not key:
+            continue
+        merged = dict(origins.get(key, {}), **origin)
+        for storage in ("localStorage", "sessionStorage"):
+            items = {i["name"]: i for i in origins.get(key, {}).get(storage, [])}
+            items.update({i["name"]: i for i in origin.get(storage, [])})
+            if items:
+                merged[storage] = list(items.values())
+        origins[key] = merged
+    
+    return {"cookies": list(cookies.values()), "origins": list(origins.values())}
+
+
+def _cookie_expired(cookie: dict, now: float) -> bool:
+    # Session cookies have no expiry (-1 or 0) and are kept
+    expires = cookie.get("expires", -1)
+    return isinstance(expires, (int, float)) and 0 < expires < now
+
+
+async def export_state(browser) -> dict:
+    """Cookies and localStorage of a running browser-use browser, in storage_state format."""
+    # _cdp_get_storage_state also returns localStorage; export_storage_state
+    # is the public API but only exports cookies
+    get_state = getattr(browser, "_cdp_get_storage_state", None)
+    state = await get_state() if get_state is not None else await browser.export_storage_state()
+    return {
+        "cookies": [{k: c[k] for k in COOKIE_FIELDS if k in c} for c in state.get("cookies", [])],
+        "origins": state.get("origins", []),
+    }
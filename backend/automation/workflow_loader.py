@@ -4,10 +4,15 @@ Parses CSV exports from the Task Mining extension and extracts workflow data.
 """
 
 import csv
+import hashlib
+import heapq
 import json
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Sequence
+from urllib.parse import urlparse
+
+from .event_formatters import describe_events
 
 
 @dataclass
@@ -23,56 +28,164 @@ class WorkflowEvent:
     @property
     def description(self) -> str:
         """Generate a human-readable description of this event."""
-        if self.event_type == "click":
-            element = self.data.get("element_type", "element")
-            text = self.data.get("text", "")[:50] if self.data.get("text") else ""
-            if text:
-                return f"Clicked on {element} with text '{text}'"
-            return f"Clicked on {element}"
-        
-        elif self.event_type == "input":
-            field_name = self.data.get("field_name", "field")
-            return f"Typed in {field_name}"
-        
-        elif self.event_type == "navigation" or self.event_type == "page_visit":
-            return f"Navigated to {self.url}"
-        
-        elif self.event_type == "scroll":
-            return "Scrolled on page"
+        return describe_events((self,))[0]
+
+
+# Event types included in workflow summaries
+SIGNIFICANT_EVENT_TYPES = ("click", "input", "navigation", "page_visit")
+
+
+@dataclass
+class PageSegment:
+    """A run of consecutive events recorded on the same URL."""
+    
+    url: str
+    start: int  # Index of the first event in Workflow.events
+    end: int  # Index one past the last event
+    
+    @property
+    def length(self) -> int:
+        return self.end - self.start
+
+
+@dataclass
+class WorkflowIndex:
+    """Query indexes over a workflow's events, built in a single pass."""
+    
+    event_count: int
+    start_url: str
+    first_timestamp: int
+    last_timestamp: int
+    positions_by_type: dict[str, list[int]]
+    page_segments: list[PageSegment]
+    domains: list[str]  # Distinct hostnames in first-visit order
+    summary: Optional[str] = None
+    fingerprint: Optional[str] = None
+    
+    @classmethod
+    def build(cls, events: Sequence["WorkflowEvent"]) -> "WorkflowIndex":
+        start_url = ""
+        first_ts = last_ts = events[0].timestamp if events else 0
+        positions_by_type: dict[str, list[int]] = {}
+        segments: list[PageSegment] = []
+        domains: dict[str, None] = {}
         
-        elif self.event_type == "focus":
-            element = self.data.get("element_type", "element")
-            return f"Focused on {element}"
+        for i, event in enumerate(events):
+            positions_by_type.setdefault(event.event_type, []).append(i)
+            
+            if event.timestamp < first_ts:
+                first_ts = event.timestamp
+            elif event.timestamp > last_ts:
+                last_ts = event.timestamp
+            
+            if segments and segments[-1].url == event.url:
+                segments[-1].end = i + 1
+            else:
+                segments.append(PageSegment(url=event.url, start=i, end=i + 1))
+            
+            if event.url:
+                if not start_url:
+                    start_url = event.url
+                host = urlparse(event.url).hostname
+                if host:
+                    domains[host] = None
         
-        return f"Performed {self.event_type}"
+        return cls(
+            event_count=len(events),
+            start_url=start_url,
+            first_timestamp=first_ts,
+            last_timestamp=last_ts,
+            positions_by_type=positions_by_type,
+            page_segments=segments,
+            domains=list(domains),
+        )
 
 
 @dataclass
 class Workflow:
-    """Represents a complete workflow session."""
+    """Represents a complete workflow session.
+    
+    Events are stored as a tuple, so the sequence cannot change under the
+    lazily built WorkflowIndex that query helpers read from. Assigning new
+    events drops the index; call invalidate() after modifying an event itself.
+    """
     
     workflow_id: str
-    events: list[WorkflowEvent] = field(default_factory=list)
+    events: tuple[WorkflowEvent, ...] = ()
+    _index: Optional[WorkflowIndex] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name: str, value) -> None:
+        if name == "events":
+            value = tuple(value)
+            object.__setattr__(self, "_index", None)
+        object.__setattr__(self, name, value)
+    
+    @property
+    def index(self) -> WorkflowIndex:
+        """Query indexes over the events, built on first use."""
+        if self._index is None:
+            self._index = WorkflowIndex.build(self.events)
+        return self._index
+    
+    def invalidate(self) -> None:
+        """Drop cached indexes after an event was modified in place."""
+        self._index = None
+    
+    def events_of_type(self, *event_types: str) -> list[WorkflowEvent]:
+        """Events of the given types, in recorded order."""
+        positions_by_type = self.index.positions_by_type
+        lists = [positions_by_type.get(t, []) for t in event_types]
+        positions = lists[0] if len(lists) == 1 else heapq.merge(*lists)
+        return [self.events[i] for i in positions]
+    
+    @property
+    def page_segments(self) -> list[PageSegment]:
+        """Runs of consecutive events per URL."""
+        return self.index.page_segments
+    
+    @property
+    def domains(self) -> list[str]:
+        """Distinct hostnames visited, in first-visit order."""
+        return self.index.domains
+    
+    @property
+    def first_timestamp(self) -> int:
+        return self.index.first_timestamp
+    
+    @property
+    def last_timestamp(self) -> int:
+        return self.index.last_timestamp
     
     @property
     def start_url(self) -> str:
         """Get the starting URL of this workflow."""
-        for event in self.events:
-            if event.url:
-                return event.url
-        return ""
+        return self.index.start_url
+    
+    @property
+    def fingerprint(self) -> str:
+        """Stable identifier of the recorded actions, ignoring timestamps."""
+        index = self.index
+        if index.fingerprint is None:
+            hasher = hashlib.sha256()
+            for event in self.events:
+                hasher.update(json.dumps(
+                    [event.event_type, event.url, event.data],
+                    sort_keys=True, separators=(",", ":"), default=str,
+                ).encode("utf-8"))
+            index.fingerprint = hasher.hexdigest()[:16]
+        return index.fingerprint
     
     @property
     def summary(self) -> str:
         """Generate a summary of the workflow actions."""
-        # Filter out noise events
-        significant_events = [
-            e for e in self.events 
-            if e.event_type in ("click", "input", "navigation", "page_visit")
-        ]
-        
-        descriptions = [e.description for e in significant_events[:20]]  # Limit to 20 actions
-        return "\n".join(f"{i+1}. {desc}" for i, desc in enumerate(descriptions))
+        index = self.index
+        if index.summary is None:
+            # Filter out noise events
+            significant_events = self.events_of_type(*SIGNIFICANT_EVENT_TYPES)
+            
+            lines = describe_events(significant_events[:20], start=1)  # Limit to 20 actions
+            index.summary = "\n".join(lines)
+        return index.summary
 
 
 class WorkflowLoader:
@@ -0,0 +1,116 @@
+"""
+Workflow Segments module.
+Splits a workflow into segments that can be replayed independently, so that
+multi-site recordings can be automated concurrently.
+"""
+
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+from .workflow_loader import Workflow, WorkflowEvent
+
+
+# Event types that load a page by URL, so a segment starting with one can be
+# replayed without the pages before it
+NAVIGATION_EVENT_TYPES = ("navigation", "page_visit")
+
+# Ignore very short typed values when looking for carried-over input
+MIN_CARRIED_VALUE_LENGTH = 3
+
+
+@dataclass
+class _DomainGroup:
+    """Consecutive events that stay on one hostname."""
+    
+    domain: str
+    events: list[WorkflowEvent] = field(default_factory=list)
+    
+    def typed_values(self) -> set[str]:
+        values = set()
+        for event in self.events:
+            if event.event_type != "input":
+                continue
+            value = str(event.data.get("value") or event.data.get("text") or "").strip()
+            if len(value) >= MIN_CARRIED_VALUE_LENGTH:
+                values.add(value.lower())
+        return values
+    
+    def mentions(self, values: set[str]) -> bool:
+        if not values:
+            return False
+        for event in self.events:
+            haystack = " ".join([event.url, *(str(v) for v in event.data.values())]).lower()
+            if any(value in haystack for value in values):
+                return True
+        return False
+
+
+def _domain_groups(workflow: Workflow) -> list[_DomainGroup]:
+    groups: list[_DomainGroup] = []
+    for segment in workflow.page_segments:
+        domain = urlparse(segment.url).hostname or ""
+        events = workflow.events[segment.start:segment.end]
+        # Events without a URL stay with the page they were recorded on
+        if groups and (not domain or groups[-1].domain == domain):
+            groups[-1].events.extend(events)
+        else:
+            groups.append(_DomainGroup(domain=domain, events=list(events)))
+    return groups
+
+
+def split_independent_segments(workflow: Workflow) -> list[Workflow]:
+    """
+    Split a workflow at domain boundaries into independently replayable parts.
+    
+    Each segment runs in a fresh browser, so a domain group that reuses a value
+    typed in any earlier segment (e.g. a search term that shows up in a later
+    URL) is merged with that segment and everything after it, since replaying
+    it on its own would lose that data. A return to a domain seen before (log in on A, detour to B,
+    act on A) merges everything from that domain's first segment on, so the
+    session started there is kept. Every returned segment starts with a
+    navigation event to its first URL.
+    
+    Returns:
+        List of workflows; a single element if nothing can run independently.
+    """
+    groups = _domain_groups(workflow)
+    if len(groups) <= 1:
+        return [workflow]
+    
+    merged: list[list[_DomainGroup]] = []
+    # Values typed in each merged segment
+    carried: list[set[str]] = []
+    for group in groups:
+        # First segment on the same domain or with a typed value this group reuses
+        earlier = next(
+            (
+                i for i, parts in enumerate(merged)
+                if any(g.domain == group.domain for g in parts) or group.mentions(carried[i])
+            ),
+            None,
+        )
+        if earlier is not None:
+            merged[earlier:] = [[g for parts in merged[earlier:] for g in parts] + [group]]
+            carried[earlier:] = [set().union(*carried[earlier:])]
+        else:
+            merged.append([group])
+            carried.append(set())
+        carried[-1] |= group.typed_values()
+    
+    if len(merged) == 1:
+        return [workflow]
+    
+    segments = []
+    for n, parts in enumerate(merged, 1):
+        events = [event for group in parts for event in group.events]
+        if events[0].event_type not in NAVIGATION_EVENT_TYPES:
+            first_url = next((e.url for e in events if e.url), "")
+            events.insert(0, WorkflowEvent(
+                event_type="navigation",
+                timestamp=events[0].timestamp,
+                url=first_url,
+                title="",
+                data={},
+            ))
+        segments.append(Workflow(workflow_id=f"{workflow.workflow_id}.{n}", events=events))
+    return segments
@@ -0,0 +1,108 @@
+"""
+Import-time budget check for the automation package.
+
+Runs each entry point in a fresh interpreter with `-X importtime`, reports the
+cumulative import time and fails if a budget is exceeded or a heavy dependency
+is loaded where it should be deferred.
+
+Usage:
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --scale 2.0   # relax budgets on slow machines
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Dependencies that must only be imported on first use
+HEAVY_MODULES = ("langchain_core", "langchain_google_genai", "langchain_openai", "browser_use", "fastapi", "uvicorn")
+
+
+@dataclass
+class ImportBudget:
+    """Budget for importing `module` in a fresh interpreter."""
+    
+    module: str
+    budget_ms: float
+    # Heavy modules this entry point legitimately needs at import time
+    allowed: tuple[str, ...] = field(default_factory=tuple)
+
+
+# Budgets include stdlib modules (asyncio, dataclasses, csv, ...) loaded on first
+# import; eagerly importing LangChain put `automation` at ~330 ms.
+BUDGETS = [
+    ImportBudget("automation", 10),
+    ImportBudget("automation.config", 30),
+    ImportBudget("automation.workflow_loader", 40),
+    ImportBudget("automation.main", 100),
+    ImportBudget("automation.automation_runner", 100),
+    ImportBudget("automation.llm_client", 100),
+]
+
+
+def measure(module: str, repeats: int = 5) -> tuple[float, set[str]]:
+    """Return the median cumulative import time (ms) and the top-level modules imported."""
+    timings = []
+    imported: set[str] = set()
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, cwd=BACKEND_DIR, check=True,
+        )
+        cumulative = 0
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+            if not cumulative_us.isdigit():
+                continue
+            imported.add(name.split(".")[0])
+            if name == module:
+                cumulative = int(cumulative_us)
+        timings.append(cumulative / 1000)
+    return statistics.median(timings), imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import-time budgets of the automation package")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget by this factor (default: 1.0)")
+    parser.add_argument("--repeats", type=int, default=5, help="Interpreter launches per module (default: 5)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+    
+    failures = 0
+    results = []
+    for budget in BUDGETS:
+        elapsed_ms, imported = measure(budget.module, args.repeats)
+        limit_ms = budget.budget_ms * args.scale
+        heavy = sorted(m for m in HEAVY_MODULES if m in imported and m not in budget.allowed)
+        ok = elapsed_ms <= limit_ms and not heavy
+        failures += not ok
+        results.append({
+            "module": budget.module,
+            "import_ms": round(elapsed_ms, 2),
+            "budget_ms": limit_ms,
+            "heavy_imports": heavy,
+            "ok": ok,
+        })
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            status = "ok" if r["ok"] else "FAIL"
+            heavy = f"  eager: {', '.join(r['heavy_imports'])}" if r["heavy_imports"] else ""
+            print(f"{r['module']:<32} {r['import_ms']:8.2f} ms  (budget {r['budget_ms']:.0f} ms)  {status}{heavy}")
+    
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
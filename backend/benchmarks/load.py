@@ -0,0 +1,277 @@
+"""
+End-to-end load test of one server instance.
+
+Serves the FastAPI app with uvicorn in a background thread. LLM calls go to
+the fake provider, with configurable latency and error rate, and automation
+runs use a fake browser-use agent. Clients on the main thread sweep
+concurrency levels over each scenario and record throughput and latency
+percentiles:
+
+    describe   POST /api/describe with a fresh recording per request
+    automate   POST /api/automate/task
+    websocket  POST /api/automate/task with its job followed over
+               /ws/automation, until the "finished" message arrives
+
+Each level also records the server's event-loop stalls (/api/admin/stalls).
+Code that blocks the loop shows up there and as latency growing with
+concurrency.
+
+Usage:
+    python -m benchmarks.load
+    python -m benchmarks.load --levels 1,8,32,128 --duration 20
+    python -m benchmarks.load --scenarios automate --llm-latency 0.5 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+
+BENCH_DIR = Path(__file__).parent
+DATA_DIR = BENCH_DIR / ".data"
+
+SCENARIOS = ("describe", "automate", "websocket")
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank quantile of sorted samples."""
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def load_runner_class(steps: int):
+    """AutomationRunner with a fake agent that calls the fake agent LLM once per step."""
+    from automation.llm_providers import create_agent_llm
+    from .soak import FakeAgent, soak_runner_class
+    
+    class LoadAgent(FakeAgent):
+        def __init__(self, task: str, llm):
+            super().__init__(task, steps, result_chars=200)
+            self.llm = llm
+        
+        async def run(self, max_steps: int = 100, on_step_end=None):
+            async def step_end(agent) -> None:
+                await self.llm.ainvoke([])
+                if on_step_end is not None:
+                    await on_step_end(agent)
+            return await super().run(max_steps, step_end)
+    
+    class LoadRunner(soak_runner_class()):
+        def _create_agent(self, task_description: str, browser):
+            return LoadAgent(task_description, create_agent_llm(self.llm_model, self.llm_provider))
+    
+    return LoadRunner
+
+
+class ServerThread:
+    """The app served by uvicorn on a free local port, in a daemon thread."""
+    
+    def __init__(self, app):
+        import uvicorn
+        
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, log_level="warning",
+        ))
+        self.thread = threading.Thread(target=self.server.run, name="load-server", daemon=True)
+    
+    def __enter__(self) -> "ServerThread":
+        self.thread.start()
+        deadline = time.monotonic() + 15
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("Server did not start")
+            time.sleep(0.05)
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=15)
+
+
+class Scenarios:
+    """Request functions per scenario; each returns whether the request succeeded."""
+    
+    def __init__(self, base_url: str, events: int):
+        import httpx
+        
+        self.base_url = base_url
+        self.ws_url = base_url.replace("http://", "ws://") + "/ws/automation"
+        self.events = events
+        self.client = httpx.AsyncClient(base_url=base_url, timeout=300, limits=httpx.Limits(max_connections=None))
+        self._ids = itertools.count()
+    
+    async def describe(self) -> bool:
+        from .synthetic import generate_events
+        
+        # A different recording each time, so the describe cache does not answer
+        payload = {"events": generate_events(self.events, seed=next(self._ids)), "start_url": ""}
+        response = await self.client.post("/api/describe", json=payload)
+        return response.status_code == 200
+    
+    async def automate(self) -> bool:
+        n = next(self._ids)
+        response = await self.client.post("/api/automate/task", json={"task": f"load test task {n}", "headless": True})
+        return response.status_code == 200 and response.json()["success"]
+    
+    async def websocket(self) -> bool:
+        import websockets
+        
+        job_id = f"load-{next(self._ids)}"
+        async with websockets.connect(f"{self.ws_url}?job_id={job_id}") as ws:
+            post = asyncio.create_task(self.client.post(
+                "/api/automate/task", json={"job_id": job_id, "task": f"load test task {job_id}", "headless": True},
+            ))
+            try:
+                async for raw in ws:
+                    message = json.loads(raw)
+                    if message.get("type") == "finished":
+                        return bool(message.get("success"))
+                return False
+            finally:
+                await post
+    
+    async def stalls(self) -> dict:
+        return (await self.client.get("/api/admin/stalls")).json()
+    
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+async def run_level(request: Callable[[], Awaitable[bool]], concurrency: int, duration: float) -> dict:
+    """`concurrency` clients sending requests back to back for `duration` seconds."""
+    latencies: list[float] = []
+    failures = 0
+    errors = 0
+    deadline = time.perf_counter() + duration
+    
+    async def client() -> None:
+        nonlocal failures, errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                ok = await request()
+            except Exception:
+                errors += 1
+                continue
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                failures += 1
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    
+    ordered = sorted(latencies)
+    result = {
+        "concurrency": concurrency,
+        "requests": len(latencies) + failures + errors,
+        "succeeded": len(latencies),
+        "failed": failures,
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+    }
+    if ordered:
+        result.update({
+            f"{name}_ms": round(percentile(ordered, q) * 1000, 1)
+            for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+        })
+        result["max_ms"] = round(ordered[-1] * 1000, 1)
+    return result
+
+
+async def sweep(base_url: str, scenarios: list[str], levels: list[int], duration: float, events: int) -> dict:
+    client = Scenarios(base_url, events)
+    results: dict[str, list[dict]] = {}
+    try:
+        for scenario in scenarios:
+            results[scenario] = []
+            for concurrency in levels:
+                before = await client.stalls()
+                level = await run_level(getattr(client, scenario), concurrency, duration)
+                after = await client.stalls()
+                level["loop_stalls"] = after["stalls"] - before["stalls"]
+                level["loop_stall_ms"] = after["total_stall_ms"] - before["total_stall_ms"]
+                results[scenario].append(level)
+                print(
+                    f"{scenario:<10} c={concurrency:<4} {level['throughput_rps']:>8.1f} req/s"
+                    f"  p50 {level.get('p50_ms', 0):>8.1f}ms  p95 {level.get('p95_ms', 0):>8.1f}ms"
+                    f"  p99 {level.get('p99_ms', 0):>8.1f}ms  failed {level['failed'] + level['errors']:>4}"
+                    f"  stalls {level['loop_stalls']}",
+                    flush=True,
+                )
+    finally:
+        await client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API server with a fake LLM and fake browser")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated scenarios (default: {','.join(SCENARIOS)})")
+    parser.add_argument("--levels", default="1,4,16,64", help="Comma-separated concurrency levels (default: 1,4,16,64)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level (default: 10)")
+    parser.add_argument("--events", type=int, default=50, help="Events per describe request (default: 50)")
+    parser.add_argument("--steps", type=int, default=3, help="Agent steps per automation run (default: 3)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Median fake LLM latency in seconds (default: 0.2)")
+    parser.add_argument("--llm-sigma", type=float, default=0.5, help="Lognormal sigma of the latency (default: 0.5)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake LLM calls failing with 503 (default: 0)")
+    parser.add_argument("--output", type=Path, default=None, help="Write the result as JSON to this file")
+    args = parser.parse_args()
+    
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.levels.split(",")]
+    
+    # Keep the load test's run store out of the real data directory
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="load-", dir=DATA_DIR)
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY": str(args.llm_latency),
+        "FAKE_LLM_LATENCY_SIGMA": str(args.llm_sigma),
+        "FAKE_LLM_ERROR_RATE": str(args.error_rate),
+        "PROFILING": "off",
+        "SPECULATION": "off",
+    })
+    
+    from automation import server
+    server.AutomationRunner = load_runner_class(args.steps)
+    
+    print(f"Load testing {', '.join(scenarios)} at concurrency {args.levels}, {args.duration:g}s per level...")
+    with ServerThread(server.app) as thread:
+        results = asyncio.run(sweep(f"http://127.0.0.1:{thread.port}", scenarios, levels, args.duration, args.events))
+    
+    report = {
+        "python": sys.version.split()[0],
+        "settings": {
+            "duration_s": args.duration,
+            "events": args.events,
+            "steps": args.steps,
+            "llm_latency_s": args.llm_latency,
+            "llm_sigma": args.llm_sigma,
+            "error_rate": args.error_rate,
+        },
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Micro-benchmark runner for the automation pipeline.
+
+Measures CSV loading, row unflattening, workflow summaries, prompt
+formatting and API event decoding at several input sizes, and optionally
+compares the timings with a previous run. Runs are written to
+benchmarks/.data/latest.json; --save-baseline writes the committed baseline
+benchmarks/results/<version>.json instead.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --large            # also 1M and 10M rows
+    python -m benchmarks.run --compare benchmarks/results/0.2.0.json
+    python -m benchmarks.run --save-baseline
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tomllib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+from .synthetic import generate_events, generate_export
+
+
+BENCH_DIR = Path(__file__).parent
+RESULTS_DIR = BENCH_DIR / "results"
+DATA_DIR = BENCH_DIR / ".data"
+
+DEFAULT_SIZES = [10_000]
+# Opt-in with --large: minutes per benchmark and several GB of RAM
+LARGE_SIZES = [10_000, 1_000_000, 10_000_000]
+
+
+@dataclass
+class Context:
+    """Inputs shared by all benchmarks at one size."""
+    
+    size: int
+    csv_path: Path
+    
+    _events: Optional[list[dict]] = None
+    
+    @property
+    def events(self) -> list[dict]:
+        if self._events is None:
+            self._events = generate_events(self.size)
+        return self._events
+
+
+# name -> factory(ctx) returning the zero-argument callable to time
+BENCHMARKS: dict[str, Callable[[Context], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark factory under `name`."""
+    def decorator(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return decorator
+
+
+@benchmark("loader.load")
+def bench_load(ctx: Context):
+    from automation.workflow_loader import WorkflowLoader
+    loader = WorkflowLoader(ctx.csv_path)
+    return loader.load
+
+
+@benchmark("loader.load_single")
+def bench_load_single(ctx: Context):
+    from automation.workflow_loader import WorkflowLoader
+    loader = WorkflowLoader(ctx.csv_path)
+    return lambda: loader.load_single("1")
+
+
+@benchmark("loader.unflatten_row")
+def bench_unflatten_row(ctx: Context):
+    import csv
+    from automation.workflow_loader import WorkflowLoader
+    loader = WorkflowLoader(ctx.csv_path)
+    with open(ctx.csv_path, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        sample = [row for _, row in zip(range(1000), reader)]
+    rows = [sample[i % len(sample)] for i in range(ctx.size)]
+    
+    def run():
+        for row in rows:
+            loader._unflatten_row(row)
+    return run
+
+
+@benchmark("workflow.summary")
+def bench_summary(ctx: Context):
+    from automation.workflow_loader import Workflow, WorkflowEvent
+    workflow = Workflow(
+        workflow_id="1",
+        events=[
+            WorkflowEvent(
+                event_type=e["event_type"],
+                timestamp=e["timestamp"],
+                url=e["url"],
+                title=e["title"],
+                data=e["data"],
+            )
+            for e in ctx.events
+        ],
+    )
+    
+    def run():
+        # summary is cached on the workflow; drop it so each run rebuilds it
+        workflow.invalidate()
+        return workflow.summary
+    return run
+
+
+@benchmark("llm.format_events")
+def bench_format_events(ctx: Context):
+    from automation.event_formatters import format_events
+    events = ctx.events
+    return lambda: "\n".join(format_events(events))
+
+
+@benchmark("api.decode_events")
+def bench_decode_events(ctx: Context):
+    from automation.fast_json import decode_request
+    from automation.server import DescribeRequest, WorkflowEventModel
+    body = json.dumps({"events": ctx.events, "start_url": ""}).encode("utf-8")
+    return lambda: decode_request(DescribeRequest, body, WorkflowEventModel)
+
+
+def _repeats_for(size: int) -> int:
+    if size <= 10_000:
+        return 7
+    if size <= 1_000_000:
+        return 3
+    return 1
+
+
+def _time(fn: Callable[[], object], repeats: int) -> list[float]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _csv_for(size: int, columns: str) -> Path:
+    DATA_DIR.mkdir(exist_ok=True)
+    path = DATA_DIR / f"export-{columns}-{size}.csv"
+    if not path.exists():
+        print(f"Generating {path.name}...")
+        generate_export(path, rows=size, workflows=max(1, size // 1000), columns=columns)
+    return path
+
+
+def _version() -> str:
+    with open(BENCH_DIR.parent / "pyproject.toml", "rb") as f:
+        return tomllib.load(f)["project"]["version"]
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=BENCH_DIR, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_benchmarks(sizes: list[int], names: list[str], columns: str) -> dict:
+    """Run the selected benchmarks and return a results document."""
+    results: dict[str, dict[str, dict]] = {}
+    for size in sizes:
+        ctx = Context(size=size, csv_path=_csv_for(size, columns))
+        for name in names:
+            fn = BENCHMARKS[name](ctx)
+            timings = _time(fn, _repeats_for(size))
+            best = min(timings)
+            results.setdefault(name, {})[str(size)] = {
+                "best_s": best,
+                "median_s": statistics.median(timings),
+                "repeats": len(timings),
+                "items_per_s": size / best if best else None,
+            }
+            print(f"{name:<24} {size:>10,}  best {best * 1000:10.2f} ms  ({size / best:,.0f} items/s)")
+    
+    return {
+        "version": _version(),
+        "commit": _commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "columns": columns,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.1) -> int:
+    """Print timing ratios against a baseline; return the number of regressions."""
+    regressions = 0
+    print(f"\nComparison with {baseline.get('version')} ({baseline.get('commit') or 'unknown commit'}):")
+    for name, by_size in current["results"].items():
+        for size, stats in by_size.items():
+            base = baseline.get("results", {}).get(name, {}).get(size)
+            if not base:
+                continue
+            ratio = stats["best_s"] / base["best_s"]
+            marker = ""
+            if ratio > 1 + threshold:
+                marker = "  REGRESSION"
+                regressions += 1
+            elif ratio < 1 - threshold:
+                marker = "  improved"
+            print(f"{name:<24} {int(size):>10,}  x{ratio:5.2f}{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run automation pipeline micro-benchmarks")
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: [int(x) for x in s.split(",")],
+        default=None,
+        help="Comma-separated input sizes (default: 10000)",
+    )
+    parser.add_argument("--large", action="store_true", help="Run at 10K, 1M and 10M rows")
+    parser.add_argument(
+        "--bench",
+        action="append",
+        choices=sorted(BENCHMARKS),
+        help="Benchmark to run (repeatable, default: all)",
+    )
+    parser.add_argument("--columns", default="extension", help="Column layout of the synthetic export (default: extension)")
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/.data/latest.json)")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Write the results to benchmarks/results/<version>.json",
+    )
+    parser.add_argument("--compare", type=Path, default=None, help="Previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown reported as regression (default: 0.1)")
+    args = parser.parse_args()
+    
+    sizes = args.sizes or (LARGE_SIZES if args.large else DEFAULT_SIZES)
+    document = run_benchmarks(sizes, args.bench or sorted(BENCHMARKS), args.columns)
+    
+    # A plain run must not overwrite the baseline it is compared against
+    if args.output:
+        output = args.output
+    elif args.save_baseline:
+        output = RESULTS_DIR / f"{document['version']}.json"
+    else:
+        output = DATA_DIR / "latest.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+    print(f"\nResults written to {output}")
+    
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if compare(document, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
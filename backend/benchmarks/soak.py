@@ -0,0 +1,220 @@
+"""
+Memory soak test for long-running servers.
+
+Runs thousands of automation jobs through the server's job path (_run_job,
+run store, progress) against a fake browser-use agent, samples the process RSS
+as it goes and fails if RSS keeps growing after the warm-up.
+
+Finished runs are freed in both history modes, so RSS growth only catches
+leaks. What bounded history changes is the memory a run holds while it is
+alive: each sample also records the peak traced (tracemalloc) memory of its
+batch, and the most agent history steps any run kept in memory.
+
+Usage:
+    python -m benchmarks.soak
+    python -m benchmarks.soak --runs 5000 --steps 30 --concurrency 8
+    python -m benchmarks.soak --full-history     # compare with unbounded histories
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+
+BENCH_DIR = Path(__file__).parent
+DATA_DIR = BENCH_DIR / ".data"
+
+
+class FakeAgent:
+    """
+    Stand-in for browser_use.Agent that produces realistic history items.
+    
+    Each step carries page-extraction-sized results, and the agent keeps a
+    growing message list like the real one (capped at `max_history_items`),
+    so per-run memory is comparable.
+    """
+    
+    def __init__(self, task: str, steps: int, result_chars: int, max_history_items: int | None = None):
+        from browser_use.agent.views import AgentHistoryList
+        self.task = task
+        self.steps = steps
+        self.result_chars = result_chars
+        self.max_history_items = max_history_items
+        self.history = AgentHistoryList(history=[])
+        self.messages: list[str] = []
+        self.stopped = False
+    
+    def stop(self) -> None:
+        self.stopped = True
+    
+    async def run(self, max_steps: int = 100, on_step_end=None):
+        from browser_use.agent.views import ActionResult, AgentHistory, StepMetadata
+        from browser_use.browser.views import BrowserStateHistory
+        
+        for number in range(1, min(self.steps, max_steps) + 1):
+            if self.stopped:
+                break
+            started = time.time()
+            await asyncio.sleep(0)
+            done = number == self.steps
+            content = f"step {number} of {self.task}: " + "x" * self.result_chars
+            self.messages.append(content)
+            if self.max_history_items:
+                del self.messages[:-self.max_history_items]
+            self.history.add_item(AgentHistory(
+                model_output=None,
+                result=[ActionResult(extracted_content=content, is_done=done, success=done or None)],
+                state=BrowserStateHistory(
+                    url=f"https://example.com/page/{number}",
+                    title=f"Page {number}",
+                    tabs=[],
+                    interacted_element=[],
+                ),
+                metadata=StepMetadata(step_start_time=started, step_end_time=time.time(), step_number=number),
+            ))
+            if on_step_end is not None:
+                await on_step_end(self)
+        return self.history
+
+
+class FakeBrowser:
+    async def kill(self) -> None:
+        pass
+
+
+def soak_runner_class():
+    """AutomationRunner with the fake agent and browser."""
+    from automation.automation_runner import BOUNDED_MESSAGE_ITEMS, AutomationRunner
+    
+    class SoakRunner(AutomationRunner):
+        steps = 20
+        result_chars = 20_000
+        
+        def _create_browser(self, keep_alive: bool = False):
+            return FakeBrowser()
+        
+        # Most history steps the agent held after any of its steps
+        retained_steps = 0
+        
+        def _create_agent(self, task_description: str, browser):
+            return FakeAgent(
+                task_description, self.steps, self.result_chars,
+                max_history_items=BOUNDED_MESSAGE_ITEMS if self.bounded_history else None,
+            )
+        
+        def _create_step_end_hook(self, summary: dict, browser):
+            hook = super()._create_step_end_hook(summary, browser)
+            
+            async def on_step_end(agent) -> None:
+                await hook(agent)
+                self.retained_steps = max(self.retained_steps, len(agent.history.history))
+            
+            return on_step_end
+    
+    return SoakRunner
+
+
+async def soak(runs: int, steps: int, result_chars: int, concurrency: int, bounded: bool, samples: int) -> dict:
+    """Run `runs` fake jobs and sample RSS and peak memory; returns the samples and growth."""
+    from automation import server
+    from automation.profiling import rss_bytes
+    
+    runner_class = soak_runner_class()
+    runner_class.steps = steps
+    runner_class.result_chars = result_chars
+    semaphore = asyncio.Semaphore(concurrency)
+    retained_steps = 0
+    
+    async def one(n: int) -> None:
+        nonlocal retained_steps
+        async with semaphore:
+            runner = runner_class(headless=True, llm_provider="fake", bounded_history=bounded, timeout=60)
+            await server._run_job(f"soak-{n}", runner, f"soak task {n % 50}")
+            retained_steps = max(retained_steps, runner.retained_steps)
+    
+    # One frame per allocation keeps the tracing overhead low
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start(1)
+    every = max(1, runs // samples)
+    history = []
+    started = time.perf_counter()
+    try:
+        for batch_start in range(0, runs, every):
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await asyncio.gather(*(one(n) for n in range(batch_start, min(batch_start + every, runs))))
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+            gc.collect()
+            history.append({
+                "runs": min(batch_start + every, runs),
+                "rss_mb": round(rss_bytes() / 2**20, 1),
+                "peak_mb": round(peak / 2**20, 2),
+            })
+            print(f"   {history[-1]['runs']:>6} runs  RSS {history[-1]['rss_mb']:>8.1f} MB"
+                  f"  peak {history[-1]['peak_mb']:>7.2f} MB", flush=True)
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    
+    # Growth after the first quarter, once caches, pools and the store are warm
+    warm = history[len(history) // 4]
+    return {
+        "mode": "bounded" if bounded else "full",
+        "runs": runs,
+        "steps": steps,
+        "result_chars": result_chars,
+        "concurrency": concurrency,
+        "seconds": round(time.perf_counter() - started, 1),
+        "samples": history,
+        "growth_mb": round(history[-1]["rss_mb"] - warm["rss_mb"], 1),
+        # Memory held by `concurrency` live runs after the warm-up, and the
+        # history each run kept
+        "peak_mb": max(sample["peak_mb"] for sample in history[len(history) // 4:]),
+        "retained_steps": retained_steps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test server memory with a fake agent")
+    parser.add_argument("--runs", type=int, default=2000, help="Jobs to run (default: 2000)")
+    parser.add_argument("--steps", type=int, default=20, help="Agent steps per job (default: 20)")
+    parser.add_argument("--result-chars", type=int, default=20_000, help="Extracted content per step (default: 20000)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent jobs (default: 4)")
+    parser.add_argument("--samples", type=int, default=20, help="RSS samples (default: 20)")
+    parser.add_argument("--full-history", action="store_true", help="Keep full agent histories in memory")
+    parser.add_argument("--max-growth-mb", type=float, default=25.0, help="Allowed RSS growth after warm-up (default: 25)")
+    parser.add_argument("--output", type=Path, default=None, help="Write the result as JSON to this file")
+    args = parser.parse_args()
+    
+    # Keep the soak run store out of the real data directory
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="soak-", dir=DATA_DIR)
+    os.environ.setdefault("LLM_PROVIDER", "fake")
+    
+    print(f"Soaking {args.runs} runs ({'full' if args.full_history else 'bounded'} history)...")
+    result = asyncio.run(soak(
+        args.runs, args.steps, args.result_chars, args.concurrency, not args.full_history, args.samples,
+    ))
+    print(f"RSS growth after warm-up: {result['growth_mb']} MB in {result['seconds']}s")
+    print(f"Peak traced memory of {args.concurrency} concurrent runs: {result['peak_mb']} MB, "
+          f"at most {result['retained_steps']} history steps kept per run")
+    
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+    
+    if result["growth_mb"] > args.max_growth_mb:
+        print(f"❌ RSS grew by more than {args.max_growth_mb} MB")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Synthetic workflow export generator.
+Writes CSV files shaped like the Task Mining extension export, with a
+configurable number of rows, workflows, column layout and multi-line text.
+
+Usage:
+    python -m benchmarks.synthetic out.csv --rows 100000 --workflows 50
+"""
+
+import argparse
+import csv
+import json
+import random
+from pathlib import Path
+
+
+# Column layouts seen in real exports
+COLUMN_SETS = {
+    # Flattened layout written by the extension (see test_workflow.csv)
+    "extension": [
+        "workflow_id", "event", "timestamp", "url", "title",
+        "data.element_type", "data.text", "data.xpath", "data.selector",
+        "data.input_type", "data.scroll_y",
+    ],
+    # Older layout with sequence metadata (see automation/sample_workflow.csv)
+    "sequence": [
+        "event", "timestamp", "url", "title", "workflow_id", "event_sequence",
+        "workflow_total_events", "data.element_type", "data.text",
+        "data.field_name", "data.css_selector",
+    ],
+    # Nested data.dom_context columns and viewport metadata
+    "nested": [
+        "workflow_id", "event", "timestamp", "url", "title",
+        "data.element_type", "data.text", "data.dom_context.parent",
+        "data.dom_context.depth", "viewport.width", "viewport.height",
+    ],
+    # Un-flattened layout with the data payload as a JSON string
+    "json": ["workflow_id", "event", "timestamp", "url", "title", "data"],
+}
+
+EVENT_WEIGHTS = {
+    "click": 40,
+    "scroll": 25,
+    "input": 15,
+    "page_visit": 10,
+    "navigation": 5,
+    "focus": 5,
+}
+
+DOMAINS = ["hi.com", "github.com", "apps.apple.com", "example.org", "news.ycombinator.com"]
+WORDS = ["Sign", "in", "Open", "Banking", "About", "team", "Search", "Settings", "Crypto", "Save", "Spend", "Trade"]
+
+
+def _text(rng: random.Random, multiline_ratio: float) -> str:
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+    if rng.random() < multiline_ratio:
+        return f"{words}\n\n{' '.join(rng.choice(WORDS) for _ in range(3))}"
+    return words
+
+
+def _data(event: str, rng: random.Random, multiline_ratio: float) -> dict:
+    data = {"element_type": rng.choice(["DIV", "A", "BUTTON", "INPUT", "SPAN"])}
+    if event == "click":
+        data["text"] = _text(rng, multiline_ratio)
+        data["xpath"] = f"/html[1]/body[1]/div[{rng.randint(1, 9)}]/a[{rng.randint(1, 9)}]"
+        data["selector"] = f"div.c{rng.randint(1, 99)} > a"
+    elif event == "input":
+        data["input_type"] = rng.choice(["text", "email", "search"])
+        data["field_name"] = rng.choice(["q", "email", "name"])
+    elif event == "scroll":
+        data["scroll_y"] = rng.randint(0, 5000)
+    return data
+
+
+def _row(columns: list[str], values: dict, data: dict) -> list:
+    row = []
+    for column in columns:
+        if column == "data":
+            row.append(json.dumps(data))
+        elif column.startswith("data.dom_context."):
+            row.append(_dom_context(column, data))
+        elif column.startswith("data."):
+            row.append(data.get(column[5:], ""))
+        elif column.startswith("viewport."):
+            row.append(1920 if column.endswith("width") else 1080)
+        else:
+            row.append(values.get(column, ""))
+    return row
+
+
+def _dom_context(column: str, data: dict) -> str:
+    if column.endswith("parent"):
+        return data.get("element_type", "")
+    return "3"
+
+
+def generate_export(
+    path: Path | str,
+    rows: int,
+    workflows: int = 10,
+    columns: str = "extension",
+    multiline_ratio: float = 0.1,
+    seed: int = 0,
+) -> Path:
+    """
+    Write a synthetic export CSV and return its path.
+
+    Rows are distributed round-robin over `workflows` workflow IDs and written
+    in a streaming fashion, so arbitrarily large files can be generated.
+    """
+    path = Path(path)
+    column_names = COLUMN_SETS[columns]
+    rng = random.Random(seed)
+    event_types = list(EVENT_WEIGHTS)
+    weights = list(EVENT_WEIGHTS.values())
+    base_ts = 1768626815538
+    
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(column_names)
+        for i in range(rows):
+            event = rng.choices(event_types, weights)[0]
+            domain = DOMAINS[(i // 50) % len(DOMAINS)]
+            workflow_id = str(i % workflows + 1)
+            values = {
+                "workflow_id": workflow_id,
+                "event": event,
+                "timestamp": base_ts + i * 1000,
+                "url": f"https://{domain}/page/{rng.randint(1, 20)}",
+                "title": f"{domain} | {rng.choice(WORDS)}",
+                "event_sequence": i // workflows + 1,
+                "workflow_total_events": rows // workflows,
+            }
+            writer.writerow(_row(column_names, values, _data(event, rng, multiline_ratio)))
+    
+    return path
+
+
+def generate_events(count: int, seed: int = 0, multiline_ratio: float = 0.1) -> list[dict]:
+    """Generate raw event dicts shaped like the /api/describe payload."""
+    rng = random.Random(seed)
+    event_types = list(EVENT_WEIGHTS)
+    weights = list(EVENT_WEIGHTS.values())
+    events = []
+    for i in range(count):
+        event = rng.choices(event_types, weights)[0]
+        domain = DOMAINS[(i // 50) % len(DOMAINS)]
+        events.append({
+            "event_type": event,
+            "timestamp": 1768626815538 + i * 1000,
+            "url": f"https://{domain}/page/{rng.randint(1, 20)}",
+            "title": f"{domain} | {rng.choice(WORDS)}",
+            "data": _data(event, rng, multiline_ratio),
+        })
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic workflow export CSV")
+    parser.add_argument("output", type=Path, help="Path of the CSV file to write")
+    parser.add_argument("--rows", type=int, default=10_000, help="Number of event rows (default: 10000)")
+    parser.add_argument("--workflows", type=int, default=10, help="Number of workflow IDs (default: 10)")
+    parser.add_argument("--columns", choices=sorted(COLUMN_SETS), default="extension", help="Column layout (default: extension)")
+    parser.add_argument("--multiline-ratio", type=float, default=0.1, help="Share of text cells spanning lines (default: 0.1)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+    
+    generate_export(args.output, args.rows, args.workflows, args.columns, args.multiline_ratio, args.seed)
+    print(f"Wrote {args.rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Shared fixtures.
+Tests run offline against the fake LLM provider, with a throwaway DATA_DIR.
+The environment is set before `automation` is imported, since the global
+config reads it on first use.
+"""
+
+import os
+import tempfile
+
+os.environ.update({
+    "LLM_PROVIDER": "fake",
+    "DATA_DIR": tempfile.mkdtemp(prefix="autopattern-tests-"),
+    "PROFILING": "off",
+    "SPECULATION": "off",
+    "SEMANTIC_CACHE": "false",
+    "FAKE_LLM_LATENCY": "0",
+    "FAKE_LLM_ERROR_RATE": "0",
+})
+
+import pytest
+
+from automation.config import config
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """A fresh DATA_DIR for one test."""
+    monkeypatch.setattr(config, "data_dir", tmp_path)
+    return tmp_path
+
+
+def make_events(count: int, start: int = 0, domain: str = "example.com") -> list[dict]:
+    """Raw click events shaped like the /api/describe payload."""
+    return [
+        {
+            "event_type": "click",
+            "timestamp": 1768626815538 + i * 1000,
+            "url": f"https://{domain}/page/{i}",
+            "title": f"Page {i}",
+            "data": {"text": f"Button {i}", "element_type": "BUTTON"},
+        }
+        for i in range(start, start + count)
+    ]
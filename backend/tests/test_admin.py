@@ -0,0 +1,46 @@
+"""Access control of the /api/admin/* endpoints."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from automation import server
+from automation.config import Config, config
+
+
+@pytest.fixture
+def remote():
+    with TestClient(server.app, client=("203.0.113.7", 50000)) as client:
+        yield client
+
+
+def test_remote_clients_are_refused_without_a_token(remote, monkeypatch):
+    monkeypatch.setattr(config, "admin_token", "")
+    for path in ("/api/admin/profiles", "/api/admin/stalls", "/api/admin/memory"):
+        assert remote.get(path).status_code == 403
+    assert remote.post("/api/admin/memory/start").status_code == 403
+
+
+def test_localhost_is_allowed_without_a_token(monkeypatch):
+    monkeypatch.setattr(config, "admin_token", "")
+    with TestClient(server.app, client=("127.0.0.1", 50000)) as client:
+        assert client.get("/api/admin/stalls").status_code == 200
+
+
+def test_token_is_required_when_configured(remote, monkeypatch):
+    monkeypatch.setattr(config, "admin_token", "secret")
+    assert remote.get("/api/admin/stalls").status_code == 401
+    assert remote.get("/api/admin/stalls", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert remote.get("/api/admin/stalls", headers={"Authorization": "Bearer secret"}).status_code == 200
+
+
+def test_memory_tracing_start_and_stop(monkeypatch):
+    monkeypatch.setattr(config, "admin_token", "secret")
+    headers = {"Authorization": "Bearer secret"}
+    with TestClient(server.app) as client:
+        assert client.post("/api/admin/memory/start", headers=headers).json()["tracing"]
+        assert not client.post("/api/admin/memory/stop", headers=headers).json()["tracing"]
+
+
+def test_profiling_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("PROFILING", raising=False)
+    assert Config().profiling == "off"
@@ -0,0 +1,90 @@
+"""Domain grouping, fairness and browser reuse of the batch scheduler."""
+
+import asyncio
+import itertools
+
+from automation.batch_scheduler import DomainScheduler, task_domain
+
+
+class FakeBrowser:
+    def __init__(self, number: int):
+        self.number = number
+        self.killed = False
+    
+    async def kill(self) -> None:
+        self.killed = True
+
+
+class FakeRunner:
+    """Records which browser ran each task; tasks containing "fail" fail."""
+    
+    def __init__(self):
+        self.browsers: list[FakeBrowser] = []
+        self.order: list[str] = []
+        self._numbers = itertools.count(1)
+    
+    async def launch_browser(self, keep_alive: bool = False) -> FakeBrowser:
+        browser = FakeBrowser(next(self._numbers))
+        self.browsers.append(browser)
+        return browser
+    
+    async def run_task(self, task: str, browser=None) -> dict:
+        self.order.append(task)
+        await asyncio.sleep(0)
+        return {"success": "fail" not in task, "task": task, "browser": browser.number}
+
+
+def schedule(runner: FakeRunner, tasks: list[str], **kwargs) -> DomainScheduler:
+    scheduler = DomainScheduler(runner, **kwargs)
+    for task in tasks:
+        scheduler.add(task)
+    return scheduler
+
+
+def test_task_domain():
+    assert task_domain("Search", "https://www.github.com/x") == "github.com"
+    assert task_domain("Open https://Shop.example.com/cart and pay") == "shop.example.com"
+    assert task_domain("Go to google.com and search") == "google.com"
+    assert task_domain("Do something") == ""
+
+
+async def test_same_domain_tasks_share_a_warm_browser():
+    runner = FakeRunner()
+    results = await schedule(runner, ["a.com 1", "a.com 2", "a.com 3"], max_parallel=1).run()
+    assert [r["warm"] for r in results] == [False, True, True]
+    assert {r["browser"] for r in results} == {1}
+    assert [r["domain"] for r in results] == ["a.com"] * 3
+    assert runner.browsers[0].killed
+
+
+async def test_busy_domain_yields_after_its_turn():
+    runner = FakeRunner()
+    tasks = [f"a.com {i}" for i in range(1, 6)] + ["b.com 1"]
+    await schedule(runner, tasks, max_parallel=1, max_consecutive=2).run()
+    assert runner.order == ["a.com 1", "a.com 2", "b.com 1", "a.com 3", "a.com 4", "a.com 5"]
+
+
+async def test_without_a_turn_limit_domains_run_to_completion():
+    runner = FakeRunner()
+    tasks = ["a.com 1", "b.com 1", "a.com 2", "a.com 3"]
+    await schedule(runner, tasks, max_parallel=1, max_consecutive=0).run()
+    assert runner.order == ["a.com 1", "a.com 2", "a.com 3", "b.com 1"]
+
+
+async def test_lanes_serve_different_domains():
+    runner = FakeRunner()
+    tasks = ["a.com 1", "a.com 2", "b.com 1", "b.com 2"]
+    results = await schedule(runner, tasks, max_parallel=2, max_consecutive=0).run()
+    assert results[0]["browser"] == results[1]["browser"]
+    assert results[2]["browser"] == results[3]["browser"]
+    assert results[0]["browser"] != results[2]["browser"]
+    assert [r["warm"] for r in results] == [False, True, False, True]
+
+
+async def test_failed_run_replaces_the_browser():
+    runner = FakeRunner()
+    results = await schedule(runner, ["a.com 1", "a.com fail", "a.com 3"], max_parallel=1).run()
+    assert [r["browser"] for r in results] == [1, 1, 2]
+    assert [r["warm"] for r in results] == [False, True, False]
+    assert not results[1]["success"]
+    assert all(browser.killed for browser in runner.browsers)
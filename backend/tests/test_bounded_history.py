@@ -0,0 +1,35 @@
+"""Step-end hook of AutomationRunner in bounded and full history modes."""
+
+import json
+
+from automation.automation_runner import AutomationRunner
+from benchmarks.soak import FakeAgent
+
+
+async def run_agent(bounded: bool, steps: int = 5):
+    stored = []
+    
+    async def sink(step) -> None:
+        stored.append(step)
+    
+    runner = AutomationRunner(headless=True, bounded_history=bounded, history_sink=sink, storage_profile="")
+    summary = {"steps": 0}
+    agent = FakeAgent("task", steps, result_chars=10)
+    await agent.run(on_step_end=runner._create_step_end_hook(summary, browser=None))
+    return agent, summary, stored
+
+
+async def test_bounded_hook_keeps_only_the_last_step():
+    agent, summary, stored = await run_agent(bounded=True)
+    assert summary["steps"] == 5
+    assert [item.metadata.step_number for item in agent.history.history] == [5]
+    # Every step was streamed before older ones were dropped
+    assert len(stored) == 5
+    assert "step 1 of task" in json.dumps(stored[0], default=str)
+
+
+async def test_full_history_keeps_every_step():
+    agent, summary, stored = await run_agent(bounded=False)
+    assert summary["steps"] == 5
+    assert [item.metadata.step_number for item in agent.history.history] == [1, 2, 3, 4, 5]
+    assert len(stored) == 5
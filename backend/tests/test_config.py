@@ -0,0 +1,36 @@
+"""The global config is created, and .env loaded, on first use rather than on import."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+from automation.config import Config, config, get_config
+
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# The server creates its shared state from the config while importing
+MODULES = sorted(
+    path.stem for path in (BACKEND_DIR / "automation").glob("*.py")
+    if path.stem not in ("__init__", "__main__", "server")
+)
+
+
+def test_importing_modules_does_not_load_env():
+    imports = "; ".join(f"import automation.{name}" for name in MODULES)
+    code = f"{imports}; import automation.config as c; print(c._env_loaded, c._config is None)"
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=BACKEND_DIR, check=True)
+    assert proc.stdout.split() == ["False", "True"]
+
+
+def test_first_read_loads_config():
+    code = "from automation.config import config; import automation.config as c; config.workers; print(c._env_loaded)"
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=BACKEND_DIR, check=True)
+    assert proc.stdout.split() == ["True"]
+
+
+def test_config_proxy_reads_and_writes_the_global_config(monkeypatch):
+    monkeypatch.setattr(config, "workers", 7)
+    assert get_config().workers == 7
+    assert config.workers == 7
+    assert isinstance(get_config(), Config)
@@ -0,0 +1,107 @@
+"""Prefix reuse and drift of the incremental describe cache."""
+
+import pytest
+
+from automation import llm_client
+from automation.config import config
+from automation.describe_cache import PrefixCache, describe_cache, prefix_digests
+from automation.llm_client import INCREMENTAL_STEPS_PROMPT, WORKFLOW_STEPS_PROMPT, LLMClient
+from conftest import make_events
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """LLMClient on the fake provider, recording the system prompt of every analysis call."""
+    describe_cache.clear()
+    client = LLMClient()
+    client.prompts = []
+    invoke = client._invoke
+    
+    def recording_invoke(llm, model, system_prompt, user_prompt):
+        client.prompts.append(system_prompt)
+        return invoke(llm, model, system_prompt, user_prompt)
+    
+    monkeypatch.setattr(client, "_invoke", recording_invoke)
+    monkeypatch.setattr(config, "describe_drift_threshold", 0.5)
+    yield client
+    describe_cache.clear()
+
+
+def test_prefix_digests_are_shared_by_longer_recordings():
+    events = make_events(5)
+    short = prefix_digests(events[:3], "https://example.com")
+    long = prefix_digests(events, "https://example.com")
+    assert long[:3] == short
+    assert prefix_digests(events[:3], "https://other.com") != short
+
+
+def test_lookup_returns_longest_cached_prefix():
+    cache = PrefixCache(max_entries=10)
+    digests = prefix_digests(make_events(6))
+    cache.store(digests[1], 2, {"steps": [1, 2]})
+    cache.store(digests[3], 4, {"steps": [1, 2, 3, 4]})
+    
+    entry = cache.lookup(digests)
+    assert entry.event_count == 4
+    assert entry.full_count == 4
+    # Results are copies, so callers cannot corrupt the cache
+    entry.result["steps"].clear()
+    assert cache.lookup(digests).result == {"steps": [1, 2, 3, 4]}
+
+
+def test_lru_eviction():
+    cache = PrefixCache(max_entries=2)
+    digests = prefix_digests(make_events(3))
+    for i, digest in enumerate(digests):
+        cache.store(digest, i + 1, {"n": i})
+    assert len(cache) == 2
+    assert cache.lookup(digests[:1]) is None
+
+
+def test_identical_recording_is_answered_from_cache(client):
+    events = make_events(10)
+    first = client.generate_workflow_steps(events, "https://example.com")
+    again = client.generate_workflow_steps(events, "https://example.com")
+    assert again == first
+    assert client.prompts == [WORKFLOW_STEPS_PROMPT]
+
+
+def test_grown_recording_sends_only_new_events(client, monkeypatch):
+    events = make_events(12)
+    client.generate_workflow_steps(events[:10], "https://example.com")
+    
+    formatted = []
+    format_events = llm_client.format_events
+    monkeypatch.setattr(llm_client, "format_events", lambda evs, **kw: formatted.append(len(evs)) or format_events(evs, **kw))
+    client.generate_workflow_steps(events, "https://example.com")
+    
+    assert client.prompts == [WORKFLOW_STEPS_PROMPT, INCREMENTAL_STEPS_PROMPT]
+    assert formatted == [2]
+
+
+def test_drift_since_last_full_analysis_forces_full_reanalysis(client):
+    events = make_events(30)
+    client.generate_workflow_steps(events[:10], "https://example.com")
+    # 4 of 14 events are new since the full analysis: incremental
+    client.generate_workflow_steps(events[:14], "https://example.com")
+    # 10 of 20 are new since the full analysis (not since the last update): still incremental
+    client.generate_workflow_steps(events[:20], "https://example.com")
+    # 20 of 30 new since the full analysis exceeds the threshold
+    client.generate_workflow_steps(events, "https://example.com")
+    
+    assert client.prompts == [
+        WORKFLOW_STEPS_PROMPT, INCREMENTAL_STEPS_PROMPT, INCREMENTAL_STEPS_PROMPT, WORKFLOW_STEPS_PROMPT,
+    ]
+    assert describe_cache.lookup(prefix_digests(events, "https://example.com")).full_count == 30
+
+
+def test_failed_analysis_is_not_cached(client, monkeypatch):
+    events = make_events(5)
+    
+    def failing_invoke(llm, model, system_prompt, user_prompt):
+        raise RuntimeError("provider down")
+    
+    monkeypatch.setattr(client, "_invoke", failing_invoke)
+    result = client.generate_workflow_steps(events, "https://example.com")
+    assert result == llm_client.fallback_steps(events)
+    assert describe_cache.lookup(prefix_digests(events, "https://example.com")) is None
@@ -0,0 +1,217 @@
+"""Event formatters shared by workflow summaries and LLM prompts."""
+
+import pytest
+
+from automation.event_formatters import TEXT_LIMIT, describe_events, format_events
+from automation.workflow_loader import Workflow, WorkflowEvent
+
+
+def test_first_non_empty_payload_key_wins():
+    event = {
+        "event_type": "click",
+        "url": "https://a.com/",
+        "raw": {"text": ""},
+        "data": {"text": "Buy now", "element_type": "button"},
+        "automation": {"tag": "BUTTON"},
+    }
+    assert format_events([event]) == ["1. Clicked on: 'Buy now' (BUTTON element) on page: https://a.com/"]
+
+
+def test_defaults_and_truncation():
+    events = [
+        {"event_type": "input", "url": "u", "data": {"value": "x" * 100}},
+        {"event": "scroll", "url": "u", "title": "T"},
+    ]
+    assert format_events(events, start=None) == [
+        f"Entered '{'x' * 80}' in field: field on page: u",
+        "Scrolled to position 0px on page: u (T)",
+    ]
+
+
+def test_unknown_events_include_their_details():
+    event = {"event_type": "drag", "url": "u", "data": {"a": 1}, "raw": {"b": 2}}
+    assert format_events([event], start=5) == ["5. drag on u: {'a': 1, 'b': 2}"]
+
+
+def test_workflow_events_match_dict_events():
+    data = {"field": "q", "value": "laptop"}
+    event = WorkflowEvent(event_type="input", timestamp=0, url="u", title="", data=data)
+    assert describe_events([event], start=1) == format_events([{"event_type": "input", "url": "u", "data": data}])
+
+
+# Reference copies of the formatting before the shared formatters (01f96e3),
+# kept to pin which lines still match and which changed on purpose
+
+def old_format_events(events: list[dict], start: int = 1) -> list[str]:
+    lines = []
+    for i, event in enumerate(events, start):
+        event_type = event.get("event_type", event.get("event", "unknown"))
+        url = event.get("url", "")
+        title = event.get("title", "")
+        data = event.get("data", {})
+        raw = event.get("raw", {})
+        automation = event.get("automation", {})
+        if event_type in ["navigation", "page_visit"]:
+            lines.append(f"{i}. Navigated to: {url} (Page: {title})")
+        elif event_type == "click":
+            target = raw.get("text") or data.get("text") or data.get("target") or automation.get("tag", "element")
+            lines.append(f"{i}. Clicked on: '{target}' ({automation.get('tag', '')} element) on page: {url}")
+        elif event_type == "input":
+            field = data.get("field", data.get("target", raw.get("field", "field")))
+            value = data.get("value", raw.get("value", "[text entered]"))
+            lines.append(f"{i}. Entered '{value}' in field: {field} on page: {url}")
+        elif event_type == "scroll":
+            lines.append(f"{i}. Scrolled to position {raw.get('y', data.get('y', 0))}px on page: {url} ({title})")
+        elif event_type == "keypress":
+            lines.append(f"{i}. Pressed key: {raw.get('key', data.get('key', 'key'))}")
+        else:
+            lines.append(f"{i}. {event_type} on {url}: {({**data, **raw})}")
+    return lines
+
+
+def old_description(event: WorkflowEvent) -> str:
+    if event.event_type == "click":
+        element = event.data.get("element_type", "element")
+        text = event.data.get("text", "")[:50] if event.data.get("text") else ""
+        return f"Clicked on {element} with text '{text}'" if text else f"Clicked on {element}"
+    if event.event_type == "input":
+        return f"Typed in {event.data.get('field_name', 'field')}"
+    if event.event_type in ("navigation", "page_visit"):
+        return f"Navigated to {event.url}"
+    if event.event_type == "scroll":
+        return "Scrolled on page"
+    if event.event_type == "focus":
+        return f"Focused on {event.data.get('element_type', 'element')}"
+    return f"Performed {event.event_type}"
+
+
+# Extension events, which carry the keys the old formatter read
+UNCHANGED = [
+    {"event_type": "navigation", "url": "https://a.com/", "title": "Home"},
+    {"event": "page_visit", "url": "https://a.com/", "title": "Home"},
+    {"event_type": "click", "url": "u", "raw": {"text": "Buy"}, "automation": {"tag": "BUTTON"}},
+    {"event_type": "click", "url": "u", "data": {"target": "#buy"}, "automation": {"tag": "A"}},
+    {"event_type": "click", "url": "u", "automation": {"tag": "DIV"}},
+    {"event_type": "input", "url": "u", "data": {"field": "q", "value": "laptop"}},
+    {"event_type": "input", "url": "u", "raw": {"field": "email", "value": "a@b.c"}},
+    {"event_type": "input", "url": "u"},
+    {"event_type": "scroll", "url": "u", "title": "T", "raw": {"y": 1200}},
+    {"event_type": "scroll", "url": "u", "title": "T", "data": {"y": 40}},
+    {"event_type": "keypress", "raw": {"key": "Enter"}},
+    {"event_type": "keypress", "data": {"key": "Tab"}},
+    {"event_type": "drag", "url": "u", "data": {"a": 1}, "raw": {"b": 2}},
+]
+
+
+def test_extension_events_match_the_old_output():
+    assert format_events(UNCHANGED) == old_format_events(UNCHANGED)
+    assert format_events(UNCHANGED, start=7) == old_format_events(UNCHANGED, start=7)
+
+
+@pytest.mark.parametrize("event, old, new", [
+    # Empty values fall through to the next key instead of printing ''
+    (
+        {"event_type": "input", "url": "u", "data": {"field": "", "value": ""}, "raw": {"field": "q", "value": "x"}},
+        "1. Entered '' in field:  on page: u",
+        "1. Entered 'x' in field: q on page: u",
+    ),
+    (
+        {"event_type": "keypress", "raw": {"key": ""}, "data": {"key": "Enter"}},
+        "1. Pressed key: ",
+        "1. Pressed key: Enter",
+    ),
+    # CSV events keep their element, field and scroll position in other keys
+    (
+        {"event_type": "click", "url": "u", "data": {"text": "Save", "element_type": "BUTTON"}},
+        "1. Clicked on: 'Save' ( element) on page: u",
+        "1. Clicked on: 'Save' (BUTTON element) on page: u",
+    ),
+    (
+        {"event_type": "input", "url": "u", "data": {"field_name": "email"}},
+        "1. Entered '[text entered]' in field: field on page: u",
+        "1. Entered '[text entered]' in field: email on page: u",
+    ),
+    (
+        {"event_type": "scroll", "url": "u", "title": "T", "data": {"scroll_y": 300}},
+        "1. Scrolled to position 0px on page: u (T)",
+        "1. Scrolled to position 300px on page: u (T)",
+    ),
+    # Focus events have their own formatter
+    (
+        {"event_type": "focus", "url": "u", "automation": {"tag": "INPUT"}},
+        "1. focus on u: {}",
+        "1. Focused on: INPUT on page: u",
+    ),
+    # Click targets and typed values are truncated
+    (
+        {"event_type": "click", "url": "u", "raw": {"text": "x" * 100}, "automation": {"tag": "P"}},
+        f"1. Clicked on: '{'x' * 100}' (P element) on page: u",
+        f"1. Clicked on: '{'x' * TEXT_LIMIT}' (P element) on page: u",
+    ),
+    (
+        {"event_type": "input", "url": "u", "data": {"field": "q", "value": "y" * 100}},
+        f"1. Entered '{'y' * 100}' in field: q on page: u",
+        f"1. Entered '{'y' * TEXT_LIMIT}' in field: q on page: u",
+    ),
+])
+def test_intended_changes_from_the_old_output(event, old, new):
+    assert old_format_events([event]) == [old]
+    assert format_events([event]) == [new]
+
+
+@pytest.mark.parametrize("event_type, data, old, new", [
+    (
+        "click", {"element_type": "BUTTON", "text": "Sign in"},
+        "Clicked on BUTTON with text 'Sign in'",
+        "Clicked on: 'Sign in' (BUTTON element) on page: https://a.com/",
+    ),
+    (
+        "click", {"element_type": "DIV"},
+        "Clicked on DIV",
+        "Clicked on: 'DIV' (DIV element) on page: https://a.com/",
+    ),
+    # Typed values now reach the summary
+    (
+        "input", {"field_name": "q", "value": "laptop"},
+        "Typed in q",
+        "Entered 'laptop' in field: q on page: https://a.com/",
+    ),
+    (
+        "page_visit", {},
+        "Navigated to https://a.com/",
+        "Navigated to: https://a.com/ (Page: Home)",
+    ),
+    (
+        "scroll", {"scroll_y": 300},
+        "Scrolled on page",
+        "Scrolled to position 300px on page: https://a.com/ (Home)",
+    ),
+    (
+        "focus", {"element_type": "INPUT"},
+        "Focused on INPUT",
+        "Focused on: INPUT on page: https://a.com/",
+    ),
+    (
+        "drag", {},
+        "Performed drag",
+        "drag on https://a.com/: {}",
+    ),
+])
+def test_descriptions_against_the_old_output(event_type, data, old, new):
+    event = WorkflowEvent(event_type=event_type, timestamp=0, url="https://a.com/", title="Home", data=data)
+    assert old_description(event) == old
+    assert event.description == new
+
+
+def test_summary_lists_the_same_events_as_before():
+    events = [
+        WorkflowEvent(event_type=event_type, timestamp=i, url=f"https://a.com/{i}", title="", data={"field_name": "q"})
+        for i, event_type in enumerate(["click", "scroll", "input", "focus", "page_visit", "navigation"] * 6)
+    ]
+    workflow = Workflow("w", events)
+    significant = [e for e in events if e.event_type in ("click", "input", "navigation", "page_visit")][:20]
+    old = [f"{i + 1}. {old_description(e)}" for i, e in enumerate(significant)]
+    lines = workflow.summary.split("\n")
+    assert len(lines) == len(old) == 20
+    assert lines == [f"{i + 1}. {e.description}" for i, e in enumerate(significant)]
+    assert [line.split(" ", 1)[0] for line in lines] == [line.split(" ", 1)[0] for line in old]
@@ -0,0 +1,96 @@
+"""Keys and tiers of the page-extraction cache."""
+
+from browser_use.llm.messages import SystemMessage, UserMessage
+from browser_use.llm.views import ChatInvokeCompletion
+from pydantic import BaseModel
+
+from automation.extraction_cache import CachedExtractionModel, ExtractionCache, extraction_key
+
+
+URL = "https://shop.example.com/item/1"
+
+
+def extraction_messages(page: str, query: str = "Find the price", stats: str = "chars: 120") -> list:
+    prompt = (
+        f"<query>\n{query}\n</query>\n"
+        f"<content_stats>\n{stats}\n</content_stats>\n"
+        f"<webpage_content>\n{page}\n</webpage_content>"
+    )
+    return [SystemMessage(content="Extract information from the page."), UserMessage(content=prompt)]
+
+
+class Price(BaseModel):
+    price: str
+
+
+def key(page: str = "Price: $10", query: str = "Find the price", stats: str = "chars: 120",
+        model: str = "m", url: str = URL, output_format=None) -> str:
+    return extraction_key(model, url, extraction_messages(page, query, stats), output_format)
+
+
+def test_key_ignores_whitespace_and_content_stats():
+    assert key("Price:   $10\n") == key("Price: $10")
+    assert key(stats="chars: 999") == key()
+
+
+def test_key_changes_with_page_and_request():
+    base = key()
+    assert key("Price: $12") != base
+    assert key(query="Find the title") != base
+    assert key(url=URL + "?page=2") != base
+    assert key(model="other") != base
+    assert key(output_format=Price) != base
+
+
+def test_other_prompts_are_not_cached():
+    assert extraction_key("m", URL, [UserMessage(content="Plan the next step")]) is None
+
+
+def test_disk_tier_is_shared_and_entries_expire(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    first = ExtractionCache(path, max_entries=10, max_disk_entries=10, ttl=60)
+    first.put("k", URL, '{"price": "$10"}')
+    assert first.get("k") == '{"price": "$10"}'
+    assert first.counters["memory_hits"] == 1
+    
+    second = ExtractionCache(path, max_entries=10, max_disk_entries=10, ttl=60)
+    assert second.get("k") == '{"price": "$10"}'
+    assert second.counters["disk_hits"] == 1
+    
+    expired = ExtractionCache(path, max_entries=10, max_disk_entries=10, ttl=0)
+    assert expired.get("k") is None
+    for cache in (first, second, expired):
+        cache.close()
+
+
+class FakeBrowser:
+    async def get_current_page_url(self) -> str:
+        return URL
+
+
+class CountingLLM:
+    model = "m"
+    
+    def __init__(self):
+        self.calls = 0
+    
+    async def ainvoke(self, messages, output_format=None, **kwargs):
+        self.calls += 1
+        return ChatInvokeCompletion(completion=Price(price=f"${self.calls}0"), usage=None)
+
+
+async def test_repeat_extraction_hits_until_the_page_changes(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache.sqlite3", max_entries=10, max_disk_entries=10, ttl=60)
+    llm = CountingLLM()
+    model = CachedExtractionModel(llm, FakeBrowser(), cache)
+    
+    first = await model.ainvoke(extraction_messages("Price: $10"), Price)
+    again = await model.ainvoke(extraction_messages("Price:  $10"), Price)
+    assert llm.calls == 1
+    assert again.completion == first.completion
+    
+    changed = await model.ainvoke(extraction_messages("Price: $20"), Price)
+    assert llm.calls == 2
+    assert changed.completion.price == "$20"
+    assert cache.counters["misses"] == 2
+    cache.close()
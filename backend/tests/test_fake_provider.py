@@ -0,0 +1,43 @@
+"""The fake provider drives a real browser-use agent."""
+
+import pytest
+
+from automation.automation_runner import AutomationRunner
+
+
+@pytest.fixture
+def offline_browser(monkeypatch):
+    """No browser process: an empty page state, and actions report their own result."""
+    from browser_use import ActionResult, Tools
+    from browser_use.browser import BrowserSession
+    from browser_use.browser.views import BrowserStateSummary
+    from browser_use.dom.views import SerializedDOMState
+    
+    async def get_browser_state_summary(self, **kwargs):
+        return BrowserStateSummary(
+            dom_state=SerializedDOMState(_root=None, selector_map={}), url="about:blank", title="", tabs=[],
+        )
+    
+    async def act(self, action, browser_session, **kwargs):
+        done = action.model_dump(exclude_unset=True)["done"]
+        return ActionResult(is_done=True, success=done["success"], extracted_content=done["text"])
+    
+    monkeypatch.setenv("ANONYMIZED_TELEMETRY", "false")
+    monkeypatch.setattr(BrowserSession, "get_browser_state_summary", get_browser_state_summary)
+    monkeypatch.setattr(Tools, "act", act)
+
+
+async def test_agent_step_with_fake_provider(offline_browser):
+    runner = AutomationRunner(headless=True, llm_provider="fake")
+    agent = runner._create_agent("Say hello", None)
+    try:
+        # The agent calls ainvoke(messages, output_format=..., session_id=...)
+        await agent.step()
+    finally:
+        await agent.close()
+        await agent.eventbus.stop(clear=True, timeout=1)
+    
+    assert agent.history.errors() == [None]
+    assert agent.history.is_done()
+    assert agent.history.is_successful()
+    assert agent.history.final_result() == "Completed by fake provider"
@@ -0,0 +1,97 @@
+"""The fast event decoder matches Pydantic validation of the same payloads."""
+
+import json
+
+import pytest
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from automation import fast_json
+from automation.fast_json import decode_events, decode_request
+from automation.server import DescribeRequest, WorkflowEventModel
+
+
+# Events the fast path accepts as decoded
+FAST = [
+    {"event_type": "click", "timestamp": 1, "url": "https://a.com/", "title": "A", "data": {"text": "Go"}},
+    {"event": "input", "timestamp": 2, "url": "https://a.com/", "title": "A", "data": {"value": "x"}},
+    {"event_type": "scroll"},
+    {},
+    {"event_type": "click", "timestamp": 3, "extra": "ignored", "data": {"nested": {"a": [1, 2]}}},
+]
+
+# Valid events the fast path hands to the Pydantic model
+COERCED = [
+    {"event_type": "click", "timestamp": "4"},
+    {"event_type": "click", "timestamp": 5.0},
+    {"event_type": "click", "timestamp": True},
+]
+
+INVALID = [
+    {"event_type": 1},
+    {"event_type": "click", "timestamp": "soon"},
+    {"event_type": "click", "timestamp": 1.5},
+    {"event_type": "click", "url": None},
+    {"event_type": "click", "data": []},
+    "click",
+    None,
+]
+
+
+class NoFallback:
+    """An event model that fails the test if the fast path falls back to it."""
+    
+    @staticmethod
+    def model_validate(item):
+        pytest.fail(f"fast path fell back to the model for {item!r}")
+
+
+def pydantic_events(items: list) -> list[dict]:
+    events = [WorkflowEventModel.model_validate(item) for item in items]
+    return [
+        {"event_type": e.event, "timestamp": e.timestamp, "url": e.url, "title": e.title, "data": e.data}
+        for e in events
+    ]
+
+
+def pydantic_errors(items: list) -> list[dict]:
+    with pytest.raises(ValidationError) as info:
+        DescribeRequest.model_validate({"events": items})
+    return [{**err, "loc": ("body", *err["loc"])} for err in info.value.errors(include_url=False)]
+
+
+def test_fast_path_matches_pydantic():
+    assert decode_events(FAST, NoFallback) == pydantic_events(FAST)
+
+
+def test_fallback_matches_pydantic():
+    assert decode_events(COERCED, WorkflowEventModel) == pydantic_events(COERCED)
+    assert [e["timestamp"] for e in decode_events(COERCED, WorkflowEventModel)] == [4, 5, 1]
+
+
+@pytest.mark.parametrize("item", INVALID)
+def test_invalid_events_are_rejected_like_pydantic(item):
+    items = FAST[:2] + [item]
+    with pytest.raises(RequestValidationError) as info:
+        decode_events(items, WorkflowEventModel)
+    assert info.value.errors() == pydantic_errors(items)
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_decode_request_with_and_without_orjson(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(fast_json, "orjson", None)
+    items = FAST + COERCED
+    body = json.dumps({"events": items, "start_url": "https://a.com/"}).encode()
+    request, events = decode_request(DescribeRequest, body, WorkflowEventModel)
+    assert request.start_url == "https://a.com/"
+    assert request.events == []
+    assert events == pydantic_events(items)
+    
+    with pytest.raises(RequestValidationError) as info:
+        decode_request(DescribeRequest, b'{"events": [', WorkflowEventModel)
+    assert info.value.errors()[0]["type"] == "json_invalid"
+    
+    with pytest.raises(RequestValidationError) as info:
+        decode_request(DescribeRequest, b'{"start_url": ""}', WorkflowEventModel)
+    assert info.value.errors()[0]["loc"] == ("body", "events")
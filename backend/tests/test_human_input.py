@@ -0,0 +1,76 @@
+"""Human-in-the-loop routing to WebSocket clients."""
+
+import asyncio
+
+from automation.human_input import CLOSE_TRY_AGAIN_LATER, HumanInputManager
+
+
+class FakeWebSocket:
+    """Records sent messages; `stalled` sends never complete."""
+    
+    def __init__(self, stalled: bool = False):
+        self.stalled = stalled
+        self.sent: list[dict] = []
+        self.close_code = None
+    
+    async def accept(self) -> None:
+        pass
+    
+    async def send_json(self, message: dict) -> None:
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.sent.append(message)
+    
+    async def close(self, code: int = 1000) -> None:
+        self.close_code = code
+
+
+async def test_client_not_keeping_up_is_closed_so_it_can_reconnect():
+    manager = HumanInputManager(max_queue=2, send_timeout=5)
+    websocket = FakeWebSocket(stalled=True)
+    connection = await manager.connect(websocket)
+    
+    for n in range(4):
+        manager.publish("job", {"type": "status", "n": n})
+    await asyncio.sleep(0.01)
+    
+    assert connection.closed
+    assert websocket not in manager.connections
+    assert websocket.close_code == CLOSE_TRY_AGAIN_LATER
+
+
+async def test_client_disconnect_does_not_close_again():
+    manager = HumanInputManager()
+    websocket = FakeWebSocket()
+    await manager.connect(websocket)
+    manager.disconnect(websocket)
+    await asyncio.sleep(0.01)
+    assert websocket.close_code is None
+    assert not manager.connections
+
+
+async def test_question_ids_are_dropped_once_answered():
+    manager = HumanInputManager()
+    websocket = FakeWebSocket()
+    connection = await manager.connect(websocket, {"job"})
+    
+    ask = asyncio.create_task(manager.ask_human("Which account?", job_id="job"))
+    await asyncio.sleep(0.01)
+    question = next(m for m in websocket.sent if m["type"] == "question")
+    assert connection.question_ids == {question["id"]}
+    
+    manager.receive_answer(question["id"], "personal")
+    assert await ask == "personal"
+    assert connection.question_ids == set()
+    await asyncio.sleep(0.01)
+    assert websocket.sent[-1] == {"type": "answered", "id": question["id"], "job_id": "job"}
+
+
+async def test_question_ids_are_dropped_on_timeout():
+    manager = HumanInputManager()
+    connection = await manager.connect(FakeWebSocket(), {"job"})
+    
+    answer = await manager.ask_human("Continue?", job_id="job", timeout=0.01)
+    assert answer == "No response received (timeout)"
+    assert connection.question_ids == set()
+    assert manager.pending_questions == {}
@@ -0,0 +1,65 @@
+"""Complexity scoring and tier routing of ModelRouter."""
+
+import pytest
+
+from automation.model_router import ModelRouter, WorkflowComplexity
+from automation.workflow_loader import Workflow, WorkflowEvent
+from conftest import make_events
+
+
+TIERS = ["small", "medium", "large"]
+
+
+def make_router(max_escalations: int = 1) -> ModelRouter:
+    return ModelRouter(tiers=TIERS, thresholds=[5, 15], max_escalations=max_escalations)
+
+
+def test_score_weights_features():
+    assert WorkflowComplexity().score == 0
+    assert WorkflowComplexity(events=10, domains=1).score == 1
+    assert WorkflowComplexity(events=10, domains=3, inputs=2, pages=4).score == 1 + 6 + 4 + 2
+
+
+@pytest.mark.parametrize("score, tier", [
+    (0, 0), (5, 0), (5.5, 1), (15, 1), (15.5, 2), (100, 2),
+])
+def test_tier_thresholds_are_inclusive(score, tier):
+    # Each event adds 0.1 to the score
+    complexity = WorkflowComplexity(events=int(score * 10))
+    assert complexity.score == score
+    assert make_router().tier_for(complexity) == tier
+
+
+def test_ladder_escalates_to_larger_tiers_in_order():
+    router = make_router(max_escalations=1)
+    assert router.ladder(WorkflowComplexity(events=10)) == ["small", "medium"]
+    assert router.ladder(WorkflowComplexity(events=100)) == ["medium", "large"]
+    assert router.ladder(WorkflowComplexity(events=1000)) == ["large"]
+    
+    assert make_router(max_escalations=0).ladder(WorkflowComplexity(events=10)) == ["small"]
+    assert make_router(max_escalations=5).ladder(WorkflowComplexity(events=10)) == TIERS
+
+
+def test_thresholds_must_match_tiers():
+    with pytest.raises(ValueError):
+        ModelRouter(tiers=TIERS, thresholds=[5])
+
+
+def test_event_and_workflow_complexity_agree():
+    events = make_events(40) + make_events(20, start=40, domain="shop.example.org")
+    workflow = Workflow("w", [
+        WorkflowEvent(event_type=e["event_type"], timestamp=e["timestamp"], url=e["url"], title=e["title"], data=e["data"])
+        for e in events
+    ])
+    from_events = WorkflowComplexity.from_events(events)
+    assert from_events.events == 60
+    assert from_events.domains == 2
+    assert from_events == WorkflowComplexity.from_workflow(workflow)
+
+
+def test_task_complexity_counts_urls_and_domains():
+    complexity = WorkflowComplexity.from_task(
+        "Open https://a.com/login and sign in, then compare prices on https://b.com/ and https://b.com/deals"
+    )
+    assert complexity.domains == 2
+    assert complexity.pages == 3
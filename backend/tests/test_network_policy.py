@@ -0,0 +1,112 @@
+"""Request blocking on browsers, including warm browsers and proxy authentication."""
+
+from types import SimpleNamespace
+
+from cdp_use.cdp.registry import EventRegistry
+
+from automation.automation_runner import AutomationRunner
+from automation.network_policy import REQUEST_PAUSED, NetworkPolicy, blocker_for, release_blocker
+
+
+class FakeFetch:
+    def __init__(self, calls: list):
+        self.calls = calls
+    
+    def __getattr__(self, command: str):
+        async def send(params: dict = None, session_id: str = None):
+            self.calls.append((command, params, session_id))
+        return send
+
+
+class FakeCDPClient:
+    """Records Fetch commands; events are registered like in cdp_use (one handler per event)."""
+    
+    def __init__(self):
+        self.calls: list = []
+        self._event_registry = EventRegistry()
+        self.send = SimpleNamespace(Fetch=FakeFetch(self.calls))
+        self.register = SimpleNamespace(Fetch=SimpleNamespace(
+            requestPaused=lambda callback: self._event_registry.register(REQUEST_PAUSED, callback),
+        ))
+    
+    async def pause(self, url: str, resource_type: str = "Document", request_id: str = "r1") -> None:
+        event = {"requestId": request_id, "request": {"url": url}, "resourceType": resource_type}
+        await self._event_registry.handle_event(REQUEST_PAUSED, event, "s1")
+
+
+class FakeBrowser:
+    def __init__(self, proxy=None):
+        self._cdp_client_root = FakeCDPClient()
+        self.browser_profile = SimpleNamespace(proxy=proxy)
+        self.event_bus = SimpleNamespace(on=lambda event, handler: None)
+        self.session_manager = SimpleNamespace(
+            get_all_page_targets=lambda: [SimpleNamespace(target_id="target-1")],
+        )
+    
+    async def start(self) -> None:
+        pass
+    
+    async def get_or_create_cdp_session(self, target_id: str, focus: bool = False):
+        return SimpleNamespace(cdp_client=self._cdp_client_root, session_id="s1")
+    
+    def commands(self, name: str) -> list:
+        return [params for command, params, _ in self._cdp_client_root.calls if command == name]
+
+
+IMAGES = NetworkPolicy(block_types=("image",))
+PROXY = SimpleNamespace(server="http://proxy:8080", username="user", password="pass")
+
+
+async def test_blocks_matching_requests_and_continues_others():
+    browser = FakeBrowser()
+    blocker = await blocker_for(browser, IMAGES)
+    assert browser.commands("enable") == [{"patterns": IMAGES.patterns()}]
+    
+    client = browser._cdp_client_root
+    await client.pause("https://a.com/logo.png", "Image")
+    await client.pause("https://a.com/", "Document", request_id="r2")
+    assert browser.commands("failRequest") == [{"requestId": "r1", "errorReason": "BlockedByClient"}]
+    assert browser.commands("continueRequest") == [{"requestId": "r2"}]
+    assert blocker.stats.blocked == 1
+    await release_blocker(browser)
+
+
+async def test_warm_browser_without_a_policy_stops_blocking():
+    browser = FakeBrowser()
+    await AutomationRunner(headless=True, network_policy=IMAGES)._block_requests(browser)
+    
+    blocker = await AutomationRunner(headless=True, network_policy=NetworkPolicy())._block_requests(browser)
+    assert blocker is None
+    assert browser.commands("disable") == [None]
+    assert REQUEST_PAUSED not in browser._cdp_client_root._event_registry.get_registered_methods()
+    
+    # The next run with a policy attaches again
+    assert await blocker_for(browser, IMAGES) is not None
+    assert len(browser.commands("enable")) == 2
+    await release_blocker(browser)
+
+
+async def test_proxy_auth_handler_keeps_working():
+    browser = FakeBrowser(proxy=PROXY)
+    continued = []
+    
+    def browser_use_handler(event: dict, session_id=None) -> None:
+        continued.append(event["requestId"])
+    
+    browser._cdp_client_root.register.Fetch.requestPaused(browser_use_handler)
+    await blocker_for(browser, IMAGES)
+    # Re-enabling Fetch must not turn off auth challenges
+    assert browser.commands("enable") == [{"patterns": IMAGES.patterns(), "handleAuthRequests": True}]
+    
+    client = browser._cdp_client_root
+    await client.pause("https://a.com/logo.png", "Image")
+    await client.pause("https://a.com/", "Document", request_id="r2")
+    # Allowed requests go to browser-use's handler, blocked ones are failed here
+    assert continued == ["r2"]
+    assert len(browser.commands("failRequest")) == 1
+    assert browser.commands("continueRequest") == []
+    
+    await release_blocker(browser)
+    assert client._event_registry._handlers[REQUEST_PAUSED] is browser_use_handler
+    assert browser.commands("enable")[-1] == {"handleAuthRequests": True}
+    assert browser.commands("disable") == []
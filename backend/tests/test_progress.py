@@ -0,0 +1,54 @@
+"""Coalescing of agent progress updates by ProgressThrottler."""
+
+import asyncio
+
+from automation.progress import ProgressThrottler
+
+
+def make_throttler(min_interval: float) -> tuple[ProgressThrottler, list[dict]]:
+    sent = []
+    return ProgressThrottler(sent.append, min_interval=min_interval), sent
+
+
+async def test_first_update_is_sent_immediately():
+    throttler, sent = make_throttler(60)
+    throttler.update({"step": 1})
+    assert sent == [{"step": 1}]
+
+
+async def test_updates_within_interval_are_coalesced():
+    throttler, sent = make_throttler(0.05)
+    for step in range(1, 6):
+        throttler.update({"step": step})
+    assert sent == [{"step": 1}]
+    
+    await asyncio.sleep(0.1)
+    # Steps 2-5 arrived within the interval; only the latest is sent
+    assert sent == [{"step": 1}, {"step": 5, "coalesced": 3}]
+    
+    await asyncio.sleep(0.1)
+    assert len(sent) == 2
+
+
+async def test_update_after_interval_is_sent_immediately():
+    throttler, sent = make_throttler(0.02)
+    throttler.update({"step": 1})
+    await asyncio.sleep(0.05)
+    throttler.update({"step": 2})
+    assert sent == [{"step": 1}, {"step": 2}]
+
+
+async def test_close_flushes_the_final_update():
+    throttler, sent = make_throttler(60)
+    throttler.update({"step": 1})
+    throttler.update({"step": 2})
+    throttler.update({"status": "completed"})
+    assert sent == [{"step": 1}]
+    
+    throttler.close()
+    assert sent == [{"step": 1}, {"status": "completed", "coalesced": 1}]
+    
+    # The pending timer was cancelled with the flush
+    await asyncio.sleep(0)
+    throttler.close()
+    assert len(sent) == 2
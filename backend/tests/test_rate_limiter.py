@@ -0,0 +1,119 @@
+"""Priority order and per-call accounting of the model rate limiters."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from automation import rate_limiter
+from automation.config import config
+from automation.llm_client import LLMClient
+from automation.rate_limiter import BATCH, INTERACTIVE, ModelLimiter
+
+
+def wait_for_queue(limiter: ModelLimiter, length: int) -> None:
+    deadline = time.monotonic() + 2
+    while len(limiter._queue) < length:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def drained(rpm: int = 600) -> ModelLimiter:
+    """A limiter whose next request slot frees up in a few hundredths of a second."""
+    limiter = ModelLimiter("test", rpm=rpm)
+    limiter.requests.level = -1
+    return limiter
+
+
+def test_interactive_calls_go_before_batch_calls():
+    limiter = drained()
+    granted = []
+    
+    def acquire(name: str, level: int) -> None:
+        limiter.acquire(1, level)
+        granted.append(name)
+    
+    threads = []
+    for name, level in [("batch 1", BATCH), ("batch 2", BATCH), ("interactive", INTERACTIVE)]:
+        thread = threading.Thread(target=acquire, args=(name, level))
+        thread.start()
+        threads.append(thread)
+        wait_for_queue(limiter, len(threads))
+    for thread in threads:
+        thread.join(5)
+    
+    assert granted == ["interactive", "batch 1", "batch 2"]
+    assert limiter.counters["granted"] == 3
+
+
+async def test_async_waiters_follow_priority():
+    limiter = drained()
+    granted = []
+    
+    async def acquire(name: str, level: int) -> None:
+        await limiter.aacquire(1, level)
+        granted.append(name)
+    
+    batch = asyncio.create_task(acquire("batch", BATCH))
+    await asyncio.sleep(0.01)
+    interactive = asyncio.create_task(acquire("interactive", INTERACTIVE))
+    await asyncio.gather(batch, interactive)
+    assert granted == ["interactive", "batch"]
+
+
+def test_priority_context_sets_the_level():
+    limiter = drained()
+    granted = []
+    
+    def acquire(name: str, level: str) -> None:
+        with rate_limiter.priority(level):
+            limiter.acquire(1)
+        granted.append(name)
+    
+    batch = threading.Thread(target=acquire, args=("batch", "batch"))
+    batch.start()
+    wait_for_queue(limiter, 1)
+    interactive = threading.Thread(target=acquire, args=("interactive", "interactive"))
+    interactive.start()
+    batch.join(5)
+    interactive.join(5)
+    assert granted == ["interactive", "batch"]
+
+
+@pytest.fixture
+def limited_model(monkeypatch):
+    monkeypatch.setattr(config, "llm_default_rpm", 600)
+    monkeypatch.setattr(config, "llm_rate_limits", {})
+    rate_limiter.reset()
+    yield
+    rate_limiter.reset()
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FlakyLLM:
+    """Fails with a rate limit error `failures` times, then replies."""
+    
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+    
+    def invoke(self, messages):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RateLimitError("rate limit")
+        return AIMessage(content="ok")
+
+
+def test_retries_acquire_the_limiter_once(limited_model, monkeypatch):
+    monkeypatch.setattr(config, "llm_retry_base_delay", 0.001)
+    client = LLMClient(model="limited-model", analysis_model="limited-model", provider="fake")
+    llm = FlakyLLM(failures=2)
+    
+    assert client._invoke(llm, "limited-model", "system", "user") == "ok"
+    assert llm.calls == 3
+    assert rate_limiter.get_limiter("limited-model").counters["granted"] == 1
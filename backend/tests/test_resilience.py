@@ -0,0 +1,182 @@
+"""Retries, deadlines, hedging and the circuit breaker of ResilientCaller."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from automation import server
+from automation.config import config
+from automation.resilience import (
+    CircuitOpenError,
+    DeadlineExceeded,
+    ResiliencePolicy,
+    ResilientCaller,
+    is_retryable,
+)
+from conftest import make_events
+
+
+class ProviderError(Exception):
+    """An SDK error carrying the HTTP status of the failed response."""
+    
+    def __init__(self, status_code: int, message: str = ""):
+        super().__init__(message or f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class APITimeoutError(Exception):
+    """Named like the OpenAI SDK's timeout error, which is not a TimeoutError."""
+
+
+def make_caller(**overrides) -> ResilientCaller:
+    policy = ResiliencePolicy(
+        deadline_s=2.0, max_retries=2, base_delay_s=0.001, hedge=False,
+        breaker_threshold=2, breaker_reset_s=60.0,
+    )
+    for name, value in overrides.items():
+        setattr(policy, name, value)
+    return ResilientCaller("test", policy)
+
+
+def failing(*errors):
+    """A call raising each error in turn, then returning "ok"."""
+    remaining = list(errors)
+    calls = []
+    
+    def fn():
+        calls.append(time.monotonic())
+        if remaining:
+            raise remaining.pop(0)
+        return "ok"
+    
+    return fn, calls
+
+
+def test_retryable_errors_are_retried():
+    caller = make_caller()
+    fn, calls = failing(ProviderError(429, "rate limit"), ConnectionError("reset"))
+    assert caller.call(fn) == "ok"
+    assert len(calls) == 3
+    assert caller.counters["retries"] == 2
+    assert caller.counters["successes"] == 1
+    assert caller.breaker.state == "closed"
+
+
+def test_other_errors_are_not_retried():
+    caller = make_caller()
+    fn, calls = failing(ValueError("bad prompt"))
+    with pytest.raises(ValueError):
+        caller.call(fn)
+    assert len(calls) == 1
+    assert caller.counters["retries"] == 0
+    assert caller.counters["failures"] == 1
+
+
+def test_retries_stop_after_max_retries():
+    caller = make_caller(max_retries=1)
+    fn, calls = failing(*[ProviderError(503, "unavailable")] * 3)
+    with pytest.raises(ProviderError):
+        caller.call(fn)
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (ProviderError(429), True),
+    (ProviderError(503), True),
+    (ProviderError(400), False),
+    (ConnectionResetError(), True),
+    (APITimeoutError("Request timed out"), True),
+    # Status codes in messages do not count
+    (ValueError("Expected 500 characters, got 429"), False),
+    (RuntimeError("connection string is invalid"), False),
+])
+def test_retryable_by_type_and_status(error, retryable):
+    assert is_retryable(error) is retryable
+
+
+def test_deadline_is_not_retried():
+    caller = make_caller(deadline_s=0.05)
+    release = threading.Event()
+    with pytest.raises(DeadlineExceeded):
+        caller.call(lambda: release.wait(1))
+    release.set()
+    assert caller.counters["timeouts"] == 1
+    assert caller.counters["retries"] == 0
+
+
+def test_breaker_opens_then_half_opens():
+    caller = make_caller(max_retries=0)
+    for _ in range(2):
+        with pytest.raises(ProviderError):
+            caller.call(failing(ProviderError(500))[0])
+    assert caller.breaker.state == "open"
+    
+    fn, calls = failing()
+    with pytest.raises(CircuitOpenError):
+        caller.call(fn)
+    assert not calls
+    assert caller.counters["short_circuited"] == 1
+    
+    # After reset_s one trial call goes through; a failure re-opens the circuit
+    caller.breaker._opened_at -= 60
+    with pytest.raises(ProviderError):
+        caller.call(failing(ProviderError(500))[0])
+    assert caller.breaker.state == "open"
+    
+    caller.breaker._opened_at -= 60
+    assert caller.call(fn) == "ok"
+    assert caller.breaker.state == "closed"
+
+
+def test_slow_attempt_is_hedged():
+    caller = make_caller(hedge=True, hedge_min_samples=3)
+    for _ in range(3):
+        caller.latency.add(0.01)
+    
+    first = threading.Event()
+    release = threading.Event()
+    
+    def fn():
+        if not first.is_set():
+            first.set()
+            release.wait(1)
+            return "slow"
+        return "fast"
+    
+    assert caller.call(fn) == "fast"
+    release.set()
+    assert caller.counters["hedges"] == 1
+    assert caller.counters["hedge_wins"] == 1
+
+
+def test_describe_runs_off_the_event_loop(monkeypatch):
+    on_loop = []
+    
+    def generate_workflow_steps(self, events, start_url="", fallback=True):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return {"title": "t", "description": "d", "steps": []}
+    
+    monkeypatch.setattr(server.LLMClient, "generate_workflow_steps", generate_workflow_steps)
+    monkeypatch.setattr(config, "adaptive_routing", False)
+    with TestClient(server.app) as client:
+        response = client.post("/api/describe", json={"events": [], "start_url": ""})
+    assert response.status_code == 200
+    assert on_loop == [False]
+
+
+def test_failed_task_generation_is_503(monkeypatch):
+    def invoke(self, llm, model, system_prompt, user_prompt):
+        raise ProviderError(503)
+    
+    monkeypatch.setattr(server.LLMClient, "_invoke", invoke)
+    with TestClient(server.app) as client:
+        response = client.post("/api/automate", json={"events": make_events(2), "headless": True})
+    assert response.status_code == 503
+    assert "Task description generation failed" in response.json()["detail"]
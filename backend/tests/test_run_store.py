@@ -0,0 +1,63 @@
+"""Run store: keyset pagination and run IDs."""
+
+import pytest
+
+from automation.run_store import DuplicateRunError, RunStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RunStore(tmp_path / "runs.sqlite3")
+    yield store
+    store.close()
+
+
+def test_keyset_pagination_walks_every_run_once(store):
+    # Several runs share a start time, so the cursor needs the ID as a tiebreaker
+    for n in range(7):
+        store.start(f"run-{n}", f"task {n}", "fp", started_at=1000.0 + n // 3)
+    
+    seen, cursor = [], None
+    while True:
+        runs, cursor = store.list_runs(limit=3, cursor=cursor)
+        seen.extend(run.id for run in runs)
+        if cursor is None:
+            break
+    
+    assert seen == ["run-6", "run-5", "run-4", "run-3", "run-2", "run-1", "run-0"]
+
+
+def test_pagination_with_filters(store):
+    for n in range(5):
+        store.start(f"run-{n}", "task", "a" if n % 2 else "b", started_at=1000.0 + n)
+    store.finish("run-3", success=True)
+    
+    runs, cursor = store.list_runs(limit=1, fingerprint="a")
+    assert [r.id for r in runs] == ["run-3"]
+    runs, cursor = store.list_runs(limit=1, cursor=cursor, fingerprint="a")
+    assert [r.id for r in runs] == ["run-1"]
+    assert cursor is None
+    
+    runs, _ = store.list_runs(status="success")
+    assert [r.id for r in runs] == ["run-3"]
+
+
+def test_invalid_cursor(store):
+    with pytest.raises(ValueError):
+        store.list_runs(cursor="not-a-cursor")
+
+
+def test_duplicate_run_id_is_rejected(store):
+    store.start("job", "first task", "fp")
+    store.append_step("job", ["https://example.com", [], None, "first", 0.1])
+    store.finish("job", success=True)
+    
+    with pytest.raises(DuplicateRunError):
+        store.start("job", "second task", "fp")
+    
+    run, history = store.get("job")
+    assert run.task == "first task"
+    assert run.status == "success"
+    assert [step["result"] for step in history] == ["first"]
+    assert store.exists("job")
+    assert not store.exists("other")
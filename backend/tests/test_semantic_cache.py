@@ -0,0 +1,118 @@
+"""Reuse of plans and task descriptions for similar recordings."""
+
+import pytest
+
+from automation import semantic_cache
+from automation.config import config
+from automation.describe_cache import describe_cache, prefix_digests
+from automation.llm_client import LLMClient
+from automation.semantic_cache import SemanticCache, exact_values
+from automation.workflow_loader import Workflow, WorkflowEvent
+
+
+START_URL = "https://shop.example.com/"
+
+
+def recording(query: str = "laptop", product_url: str = "https://shop.example.com/p/123",
+              scroll_offset: int = 0, timestamp: int = 1768626815538) -> list[dict]:
+    """A 15-event shopping routine; scrolls and timestamps differ between re-recordings."""
+    steps = [
+        ("navigation", START_URL, {}),
+        ("click", START_URL, {"text": "Search", "element_type": "INPUT"}),
+        ("input", START_URL, {"field": "search", "value": query}),
+        ("keypress", START_URL, {"key": "Enter"}),
+        ("navigation", "https://shop.example.com/search", {}),
+        ("scroll", "", {"y": 400 + scroll_offset}),
+        ("scroll", "", {"y": 900 + scroll_offset}),
+        ("click", "", {"text": "Sort by price", "element_type": "BUTTON"}),
+        ("click", "", {"text": "First result", "element_type": "A"}),
+        ("navigation", product_url, {}),
+        ("scroll", product_url, {"y": 300 + scroll_offset}),
+        ("click", product_url, {"text": "Add to cart", "element_type": "BUTTON"}),
+        ("click", product_url, {"text": "Cart", "element_type": "A"}),
+        ("navigation", "https://shop.example.com/cart", {}),
+        ("click", "https://shop.example.com/cart", {"text": "Checkout", "element_type": "BUTTON"}),
+    ]
+    events = []
+    for i, (event_type, url, data) in enumerate(steps):
+        url = url or events[-1]["url"]
+        events.append({"event_type": event_type, "timestamp": timestamp + i * 1000 + scroll_offset,
+                       "url": url, "title": "Shop", "data": data})
+    return events
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = SemanticCache(tmp_path / "semantic.sqlite3", max_entries=100, threshold=0.95)
+    monkeypatch.setattr(config, "semantic_cache", True)
+    monkeypatch.setattr(semantic_cache, "_cache", cache)
+    describe_cache.clear()
+    yield cache
+    describe_cache.clear()
+    cache.close()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = LLMClient()
+    client.calls = 0
+    invoke = client._invoke
+    
+    def counting_invoke(*args):
+        client.calls += 1
+        return invoke(*args)
+    
+    monkeypatch.setattr(client, "_invoke", counting_invoke)
+    return client
+
+
+def test_exact_values_are_typed_values_and_urls():
+    values = exact_values(recording(), START_URL)
+    assert "typed:laptop" in values
+    assert "url:https://shop.example.com/p/123" in values
+    assert exact_values(recording(scroll_offset=37), START_URL) == values
+
+
+def test_re_recording_hits(cache, client):
+    first = client.generate_workflow_steps(recording(), START_URL)
+    again = client.generate_workflow_steps(recording(scroll_offset=37, timestamp=1770000000000), START_URL)
+    assert again == first
+    assert client.calls == 1
+    assert cache.counters["hits"] == 1
+
+
+def test_changed_typed_value_misses(cache, client):
+    # The summaries are more than 0.95 similar; only the search term differs
+    client.generate_workflow_steps(recording(), START_URL)
+    client.generate_workflow_steps(recording(query="iphone 15 case"), START_URL)
+    assert client.calls == 2
+    assert cache.counters["hits"] == 0
+
+
+def test_changed_url_misses(cache, client):
+    client.generate_workflow_steps(recording(), START_URL)
+    client.generate_workflow_steps(recording(product_url="https://shop.example.com/p/456"), START_URL)
+    assert client.calls == 2
+    assert cache.counters["hits"] == 0
+
+
+def test_semantic_hits_are_not_added_to_the_describe_cache(cache, client):
+    client.generate_workflow_steps(recording(), START_URL)
+    similar = recording(scroll_offset=37)
+    client.generate_workflow_steps(similar, START_URL)
+    assert describe_cache.lookup(prefix_digests(similar, START_URL)) is None
+
+
+def test_task_descriptions_need_the_same_typed_values(cache, client):
+    def workflow(**kwargs) -> Workflow:
+        return Workflow(workflow_id="w", events=[
+            WorkflowEvent(event_type=e["event_type"], timestamp=e["timestamp"], url=e["url"],
+                          title=e["title"], data=e["data"])
+            for e in recording(**kwargs)
+        ])
+    
+    client.generate_task_description(workflow())
+    client.generate_task_description(workflow(scroll_offset=37))
+    assert client.calls == 1
+    client.generate_task_description(workflow(query="iphone 15 case"))
+    assert client.calls == 2
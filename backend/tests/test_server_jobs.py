@@ -0,0 +1,83 @@
+"""Job IDs of automate requests."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from automation import server
+from benchmarks.soak import soak_runner_class
+
+
+@pytest.fixture
+def client(monkeypatch):
+    runner_class = soak_runner_class()
+    runner_class.steps = 2
+    runner_class.result_chars = 10
+    monkeypatch.setattr(server, "AutomationRunner", runner_class)
+    with TestClient(server.app) as client:
+        yield client
+
+
+def test_reused_job_id_is_rejected(client):
+    first = client.post("/api/automate/task", json={"job_id": "reused", "task": "first task", "headless": True})
+    assert first.status_code == 200
+    assert first.json()["success"]
+    
+    again = client.post("/api/automate/task", json={"job_id": "reused", "task": "second task", "headless": True})
+    assert again.status_code == 409
+    
+    run = client.get("/api/runs/reused").json()["run"]
+    assert run["task"] == "first task"
+    assert run["status"] == "success"
+    assert "reused" not in server.active_jobs
+
+
+def test_running_job_id_is_rejected(client):
+    server.active_jobs["busy"] = cancel = server.asyncio.Event()
+    try:
+        response = client.post("/api/automate/task", json={"job_id": "busy", "task": "task", "headless": True})
+        assert response.status_code == 409
+        # The running job keeps its cancel event
+        assert server.active_jobs["busy"] is cancel
+    finally:
+        server.active_jobs.pop("busy", None)
+
+
+def test_generated_job_ids_are_unique(client):
+    ids = {
+        client.post("/api/automate/task", json={"task": "task", "headless": True}).json()["job_id"]
+        for _ in range(3)
+    }
+    assert len(ids) == 3
+
+
+class TimingOutRunner:
+    """Runner whose every attempt fails after using up `duration` seconds of its budget."""
+    
+    def __init__(self, timeout: float, duration: float):
+        self.timeout = timeout
+        self.duration = duration
+        self.llm_model = "tier-1"
+        self.bounded_history = False
+        self.cancel_event = self.step_callback = self.history_sink = None
+        self.budgets: list[float] = []
+    
+    async def run_task(self, task_description: str, browser=None) -> dict:
+        self.budgets.append(self.timeout)
+        await server.asyncio.sleep(min(self.duration, self.timeout))
+        return {"success": False, "error": "Run exceeded its time budget", "task": task_description}
+
+
+async def test_escalations_share_the_time_budget():
+    runner = TimingOutRunner(timeout=0.3, duration=0.2)
+    result = await server._run_job("escalated", runner, "task", models=["tier-1", "tier-2", "tier-3"])
+    assert not result["success"]
+    # The second attempt gets what is left; no time is left for a third
+    assert len(runner.budgets) == 2
+    assert runner.budgets[0] == 0.3
+    assert 0 < runner.budgets[1] <= 0.1 + 0.05
+
+
+def test_zero_run_timeout_means_no_time_budget():
+    assert server.AutomationRunner(timeout=0).timeout is None
+    assert server.AutomationRunner(timeout=-1).timeout is None
+    assert server.AutomationRunner(timeout=5).timeout == 5
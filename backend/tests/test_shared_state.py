@@ -0,0 +1,99 @@
+"""Settings, registry entries and human-in-the-loop messages shared between workers."""
+
+import asyncio
+import time
+
+import pytest
+
+from automation import shared_state
+from automation.human_input import HumanInputManager
+from automation.shared_state import SQLiteSharedState
+
+
+@pytest.fixture
+async def workers(tmp_path):
+    """Two workers sharing one database, as two server processes would."""
+    first = SQLiteSharedState(tmp_path / "shared.sqlite3", poll_interval=0.01)
+    second = SQLiteSharedState(tmp_path / "shared.sqlite3", poll_interval=0.01)
+    await first.start()
+    await second.start()
+    yield first, second
+    await first.close()
+    await second.close()
+
+
+async def eventually(condition, timeout: float = 2.0) -> None:
+    """Wait until `condition()` (or the coroutine it returns) is truthy."""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = condition()
+        if asyncio.iscoroutine(result):
+            result = await result
+        if result:
+            return
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+async def test_settings_reach_the_other_worker(workers):
+    first, second = workers
+    received = []
+    second.on("settings", received.append)
+    
+    await first.save_settings({"llm_model": "m1"})
+    await eventually(lambda: received)
+    assert received == [{"llm_model": "m1"}]
+    assert await second.load_settings() == {"llm_model": "m1"}
+    
+    # The last saved settings are what a (re)starting worker loads
+    await second.save_settings({"llm_model": "m2"})
+    assert await first.load_settings() == {"llm_model": "m2"}
+
+
+async def test_question_is_answered_through_another_worker(workers):
+    first, second = workers
+    asking = HumanInputManager(shared=first)
+    answering = HumanInputManager(shared=second)
+    
+    question = asyncio.create_task(asking.ask_human("Which account?", job_id="job", timeout=5))
+    await eventually(lambda: asking.pending_questions)
+    (question_id,) = asking.pending_questions
+    
+    # The other worker lists the open question and forwards the answer to it
+    await eventually(lambda: second.entries("question"))
+    assert [q["id"] for q in await second.entries("question")] == [question_id]
+    answering.receive_answer(question_id, "the work one")
+    assert await asyncio.wait_for(question, 2) == "the work one"
+    
+    async def closed():
+        return await second.entries("question") == []
+    await eventually(closed)
+
+
+async def test_registry_entries_of_a_dead_worker_are_released(workers):
+    first, second = workers
+    first.register("job", "j1", {"job_id": "j1"})
+    await eventually(lambda: second.lookup("job", "j1"))
+    
+    # The first worker stops beating, as if its process had crashed
+    first._poller.cancel()
+    await first._run(
+        first._execute, "UPDATE workers SET heartbeat_at = ? WHERE worker_id = ?",
+        (time.time() - shared_state.WORKER_TIMEOUT_SECONDS - 1, first.worker_id),
+    )
+    assert await second.lookup("job", "j1") is None
+    
+    await second._run(second._prune)
+    rows = await second._run(second._query, "SELECT COUNT(*) FROM entries", ())
+    assert rows == [(0,)]
+
+
+async def test_close_with_jobs_still_running(workers):
+    first, second = workers
+    first.register("job", "j1")
+    await first.close()
+    
+    # A job finishing after shutdown unregisters and broadcasts without raising
+    first.unregister("job", "j1")
+    first.broadcast("cancel", {"job_id": "j1"})
+    assert await second.lookup("job", "j1") is None
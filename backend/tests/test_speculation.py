@@ -0,0 +1,151 @@
+"""Adopting and discarding work started speculatively after /api/describe."""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from automation import server
+from automation.config import config
+from automation.speculation import SpeculationManager
+from benchmarks.soak import soak_runner_class
+from conftest import make_events
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.killed = False
+    
+    async def kill(self) -> None:
+        self.killed = True
+
+
+async def returning(value, delay: float = 0):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def test_adopt_waits_for_task_and_browser():
+    manager = SpeculationManager(ttl=60)
+    browser = FakeBrowser()
+    manager.start("k", generate_task=lambda: returning("task", 0.01), launch_browser=lambda: returning(browser))
+    assert await manager.adopt("k") == ("task", browser)
+    assert not manager.entries
+    assert manager.stats["adopted"] == 1
+    assert await manager.adopt("k") == (None, None)
+
+
+async def test_adopt_without_task_cancels_generation():
+    manager = SpeculationManager(ttl=60)
+    browser = FakeBrowser()
+    manager.start("k", generate_task=lambda: returning("task", 60), launch_browser=lambda: returning(browser))
+    task = manager.entries["k"].task
+    assert await manager.adopt("k", task=False) == (None, browser)
+    await asyncio.sleep(0)
+    assert task.cancelled()
+    assert not browser.killed
+
+
+async def test_failed_work_is_ignored():
+    async def failing():
+        raise RuntimeError("no browser")
+    
+    manager = SpeculationManager(ttl=60)
+    manager.start("k", generate_task=lambda: returning("task"), launch_browser=failing)
+    assert await manager.adopt("k") == ("task", None)
+
+
+async def test_expired_work_is_discarded():
+    manager = SpeculationManager(ttl=0.01)
+    browser = FakeBrowser()
+    manager.start("k", generate_task=lambda: returning("task", 60), launch_browser=lambda: returning(browser))
+    task = manager.entries["k"].task
+    await asyncio.sleep(0.05)
+    assert not manager.entries
+    assert manager.stats["expired"] == 1
+    assert task.cancelled()
+    assert browser.killed
+
+
+async def test_oldest_work_is_evicted():
+    manager = SpeculationManager(ttl=60, max_entries=2)
+    browsers = [FakeBrowser() for _ in range(3)]
+    for i, browser in enumerate(browsers):
+        manager.start(str(i), launch_browser=lambda browser=browser: returning(browser))
+    await asyncio.sleep(0.01)
+    assert list(manager.entries) == ["1", "2"]
+    assert manager.stats["evicted"] == 1
+    assert browsers[0].killed
+    
+    await manager.close()
+    assert not manager.entries
+    assert all(browser.killed for browser in browsers)
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """Task descriptions generated by the LLM client; each waits for `release`."""
+    release = threading.Event()
+    calls = []
+    
+    def generate_task_description(self, workflow):
+        calls.append(workflow.workflow_id)
+        release.wait(5)
+        return f"task for {workflow.workflow_id}"
+    
+    monkeypatch.setattr(server.LLMClient, "generate_task_description", generate_task_description)
+    runner_class = soak_runner_class()
+    runner_class.steps = 2
+    runner_class.result_chars = 10
+    monkeypatch.setattr(server, "AutomationRunner", runner_class)
+    monkeypatch.setattr(config, "speculation", "task")
+    yield calls, release
+    release.set()
+
+
+def test_automate_adopts_speculative_task(generated):
+    calls, release = generated
+    release.set()
+    events = make_events(3)
+    with TestClient(server.app) as client:
+        client.post("/api/describe", json={"events": events, "start_url": ""})
+        response = client.post("/api/automate", json={"events": events, "start_url": ""}).json()
+    assert response["success"]
+    assert response["task_description"] == "task for speculative"
+    assert calls == ["speculative"]
+
+
+def test_automate_with_task_description_adopts_by_speculation_id(generated):
+    calls, release = generated
+    adopted = server.speculation_manager.stats["adopted"]
+    with TestClient(server.app) as client:
+        described = client.post("/api/describe", json={"events": make_events(3), "start_url": ""}).json()
+        assert described["speculation_id"]
+        (speculation,) = server.speculation_manager.entries.values()
+        
+        # The dashboard sends its edited plan without events
+        response = client.post("/api/automate", json={
+            "events": [],
+            "task_description": "edited plan",
+            "speculation_id": described["speculation_id"],
+        }).json()
+        assert response["success"]
+        assert response["task_description"] == "edited plan"
+        assert server.speculation_manager.stats["adopted"] == adopted + 1
+        assert not server.speculation_manager.entries
+        # The speculative task was cancelled rather than awaited
+        assert speculation.task.cancelled()
+        release.set()
+
+
+def test_other_workflow_does_not_adopt(generated):
+    calls, release = generated
+    release.set()
+    with TestClient(server.app) as client:
+        client.post("/api/describe", json={"events": make_events(3), "start_url": ""})
+        response = client.post("/api/automate", json={"events": make_events(4), "start_url": ""}).json()
+        assert response["task_description"] == "task for 1"
+        assert len(server.speculation_manager.entries) == 1
+    # Shutdown discards the unused work
+    assert not server.speculation_manager.entries
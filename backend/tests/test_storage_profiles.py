@@ -0,0 +1,27 @@
+"""Saving and loading storage-state profiles."""
+
+import stat
+
+from automation.storage_profiles import StorageProfileStore
+
+
+COOKIE = {"name": "sid", "value": "secret", "domain": "a.com", "path": "/", "expires": -1}
+
+
+async def test_profiles_are_private_to_the_owner(tmp_path):
+    store = StorageProfileStore(tmp_path / "profiles", ttl=0)
+    await store.save("github", {"cookies": [COOKIE], "origins": []})
+    
+    path = store.path("github")
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert stat.S_IMODE(path.parent.stat().st_mode) == 0o700
+    assert store.load("github")["cookies"][0]["value"] == "secret"
+    assert not list(path.parent.glob("*.tmp"))
+
+
+async def test_saves_merge_new_values(tmp_path):
+    store = StorageProfileStore(tmp_path, ttl=0)
+    await store.save("p", {"cookies": [COOKIE], "origins": []})
+    await store.save("p", {"cookies": [{**COOKIE, "value": "new"}, {**COOKIE, "name": "other"}], "origins": []})
+    cookies = {c["name"]: c["value"] for c in store.load("p")["cookies"]}
+    assert cookies == {"sid": "new", "other": "secret"}
@@ -0,0 +1,63 @@
+"""Workflow query indexes stay in sync with the events."""
+
+import pytest
+
+from automation.workflow_loader import Workflow, WorkflowEvent
+
+
+def event(event_type: str, timestamp: int, url: str) -> WorkflowEvent:
+    return WorkflowEvent(event_type=event_type, timestamp=timestamp, url=url, title="")
+
+
+@pytest.fixture
+def workflow() -> Workflow:
+    return Workflow("w", [
+        event("page_visit", 3, "https://b.com/"),
+        event("click", 1, "https://a.com/"),
+        event("input", 2, "https://a.com/"),
+    ])
+
+
+def test_events_are_immutable(workflow):
+    assert isinstance(workflow.events, tuple)
+    with pytest.raises(AttributeError):
+        workflow.events.sort(key=lambda e: e.timestamp)
+
+
+def test_reordered_events_rebuild_the_index(workflow):
+    assert workflow.domains == ["b.com", "a.com"]
+    assert workflow.start_url == "https://b.com/"
+    
+    # Same count, new order
+    workflow.events = sorted(workflow.events, key=lambda e: e.timestamp)
+    assert workflow.domains == ["a.com", "b.com"]
+    assert workflow.start_url == "https://a.com/"
+    assert [s.url for s in workflow.page_segments] == ["https://a.com/", "https://b.com/"]
+    assert [e.timestamp for e in workflow.events_of_type("click", "page_visit")] == [1, 3]
+
+
+def test_replaced_events_rebuild_the_index(workflow):
+    assert workflow.summary
+    fingerprint = workflow.fingerprint
+    workflow.events = [event("click", 1, "https://c.com/"), event("click", 2, "https://c.com/"), event("click", 3, "https://c.com/")]
+    assert workflow.domains == ["c.com"]
+    assert workflow.fingerprint != fingerprint
+    assert "c.com" in workflow.summary
+
+
+def test_modified_event_needs_invalidate(workflow):
+    assert workflow.start_url == "https://b.com/"
+    workflow.events[0].url = "https://d.com/"
+    workflow.invalidate()
+    assert workflow.start_url == "https://d.com/"
+
+
+def test_start_url_is_prepended_to_request_workflows():
+    from automation.server import _build_workflow
+    
+    events = [{"event_type": "click", "timestamp": 1, "url": "https://a.com/x", "title": "", "data": {}}]
+    plain, fingerprint = _build_workflow("w", events, "")
+    workflow, same_fingerprint = _build_workflow("w", events, "https://a.com/")
+    assert same_fingerprint == fingerprint
+    assert workflow.start_url == "https://a.com/"
+    assert [e.event_type for e in workflow.events] == ["navigation", "click"]
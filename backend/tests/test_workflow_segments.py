@@ -0,0 +1,83 @@
+"""Splitting workflows into independently replayable segments."""
+
+from automation.workflow_loader import Workflow, WorkflowEvent
+from automation.workflow_segments import split_independent_segments
+
+
+def visit(url: str, ts: int) -> WorkflowEvent:
+    return WorkflowEvent(event_type="page_visit", timestamp=ts, url=url, title="")
+
+
+def click(url: str, ts: int, text: str = "Go") -> WorkflowEvent:
+    return WorkflowEvent(event_type="click", timestamp=ts, url=url, title="", data={"text": text})
+
+
+def typed(url: str, ts: int, value: str) -> WorkflowEvent:
+    return WorkflowEvent(event_type="input", timestamp=ts, url=url, title="", data={"value": value})
+
+
+def domains(segment: Workflow) -> list[str]:
+    return list(dict.fromkeys(e.url.split("/")[2] for e in segment.events))
+
+
+def test_unrelated_domains_are_split():
+    workflow = Workflow("w", [
+        visit("https://a.com/", 1), click("https://a.com/", 2),
+        visit("https://b.com/", 3), click("https://b.com/", 4),
+        visit("https://c.com/", 5),
+    ])
+    segments = split_independent_segments(workflow)
+    assert [domains(s) for s in segments] == [["a.com"], ["b.com"], ["c.com"]]
+    assert [s.workflow_id for s in segments] == ["w.1", "w.2", "w.3"]
+
+
+def test_return_to_earlier_domain_keeps_one_segment():
+    workflow = Workflow("w", [
+        visit("https://a.com/login", 1), typed("https://a.com/login", 2, "alice"),
+        visit("https://b.com/", 3), click("https://b.com/", 4),
+        visit("https://a.com/orders", 5), click("https://a.com/orders", 6),
+    ])
+    assert split_independent_segments(workflow) == [workflow]
+
+
+def test_return_merges_only_from_the_domain_first_segment():
+    workflow = Workflow("w", [
+        visit("https://a.com/", 1),
+        visit("https://b.com/login", 2),
+        visit("https://c.com/", 3),
+        visit("https://b.com/account", 4),
+        visit("https://d.com/", 5),
+    ])
+    segments = split_independent_segments(workflow)
+    assert [domains(s) for s in segments] == [["a.com"], ["b.com", "c.com"], ["d.com"]]
+
+
+def test_carried_value_merges_with_previous_segment():
+    workflow = Workflow("w", [
+        visit("https://a.com/", 1), typed("https://a.com/", 2, "running shoes"),
+        visit("https://b.com/search?q=running shoes", 3),
+        visit("https://c.com/", 4),
+    ])
+    segments = split_independent_segments(workflow)
+    assert [domains(s) for s in segments] == [["a.com", "b.com"], ["c.com"]]
+
+
+def test_value_typed_two_segments_earlier_is_carried():
+    workflow = Workflow("w", [
+        visit("https://a.com/", 1), typed("https://a.com/", 2, "running shoes"),
+        visit("https://b.com/", 3), typed("https://b.com/", 4, "size 42"),
+        visit("https://c.com/search?q=running shoes", 5),
+        visit("https://d.com/", 6),
+    ])
+    segments = split_independent_segments(workflow)
+    assert [domains(s) for s in segments] == [["a.com", "b.com", "c.com"], ["d.com"]]
+
+
+def test_segments_start_with_navigation():
+    workflow = Workflow("w", [
+        visit("https://a.com/", 1),
+        click("https://b.com/", 2),
+    ])
+    segments = split_independent_segments(workflow)
+    assert [s.events[0].event_type for s in segments] == ["page_visit", "navigation"]
+    assert segments[1].events[0].url == "https://b.com/"
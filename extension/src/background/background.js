@@ -140,6 +140,7 @@ async function fetchWorkflowDescription(workflowId, events, startUrl) {
                 workflow.aiTitle = result.title;
                 workflow.description = result.description;
                 workflow.steps = result.steps;
+                workflow.speculationId = result.speculation_id || null;
                 workflow.descriptionStatus = 'success';
                 store.put(workflow);
                 
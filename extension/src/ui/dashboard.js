@@ -337,6 +337,7 @@ async function runWorkflowDirectly(wf) {
                 workflow_id: wf.id?.toString() || '1',
                 events: [],
                 task_description: taskDescription,
+                speculation_id: wf.speculationId || null,
                 headless: false
             })
         });
@@ -378,6 +379,7 @@ async function automateWorkflow(wf) {
                 workflow_id: wf.id?.toString() || '1',
                 events: wf.events || [],
                 task_description: wf.description || null,
+                speculation_id: wf.speculationId || null,
                 headless: false
             })
         });
@@ -509,6 +511,7 @@ async function reanalyzeWorkflow(wf) {
         currentEditorTitle = result.title || '';
         currentEditorDescription = result.description;
         currentEditorSteps = result.steps || [];
+        wf.speculationId = result.speculation_id || null;
         
         // Update the UI
         document.getElementById('editor-title').value = currentEditorTitle;
@@ -524,6 +527,7 @@ async function reanalyzeWorkflow(wf) {
                 aiTitle: result.title,
                 description: result.description,
                 steps: result.steps,
+                speculationId: result.speculation_id || null,
                 descriptionStatus: 'success'
             }
         }, () => {
@@ -818,6 +822,7 @@ async function runEditedWorkflow(overlay) {
                 workflow_id: currentEditorWorkflow.id?.toString() || '1',
                 events: [],
                 task_description: taskDescription,
+                speculation_id: currentEditorWorkflow.speculationId || null,
                 headless: false
             })
         });